@@ -0,0 +1,21 @@
+# Generated by Django 3.2.18 on 2026-10-18 07:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='listcomment',
+            index=models.Index(fields=['-created_at', '-id'], name='comments_li_created_52a53f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ratingcomment',
+            index=models.Index(fields=['-created_at', '-id'], name='comments_ra_created_6f9f9c_idx'),
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
+from django.db.models.signals import post_save
 from django.contrib.auth.models import User
+from movies.models import add_trending_activity
 from lists.models import List
 from ratings.models import Rating
 
@@ -16,6 +18,7 @@ class CommentBase(models.Model):
     class Meta:
         abstract = True
         ordering = ['-created_at']
+        indexes = [models.Index(fields=['-created_at', '-id'])]
 
     def __str__(self):
         return self.content
@@ -37,3 +40,25 @@ class RatingComment(CommentBase):
     rating = models.ForeignKey(
         Rating, related_name='ratingcomment', on_delete=models.CASCADE
     )
+
+
+def add_list_comment_activity(sender, instance, created, **kwargs):
+    if created:
+        add_trending_activity(
+            List.movies.through.objects.filter(
+                list_id=instance.list_id
+            ).values('movie_id'),
+            'comment'
+        )
+
+
+def add_rating_comment_activity(sender, instance, created, **kwargs):
+    if created:
+        add_trending_activity(
+            Rating.objects.filter(pk=instance.rating_id).values('movie_id'),
+            'comment'
+        )
+
+
+post_save.connect(add_list_comment_activity, sender=ListComment)
+post_save.connect(add_rating_comment_activity, sender=RatingComment)
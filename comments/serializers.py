@@ -12,7 +12,9 @@ class BaseCommentSerializer(serializers.ModelSerializer):
     owner = serializers.ReadOnlyField(source='owner.username')
     is_owner = serializers.SerializerMethodField()
     profile_id = serializers.ReadOnlyField(source='owner.profile.id')
-    profile_image = serializers.ReadOnlyField(source='owner.profile.image.url')
+    profile_image = serializers.ReadOnlyField(
+        source='owner.profile.image_thumbnail'
+    )
     created_at = serializers.SerializerMethodField()
     updated_at = serializers.SerializerMethodField()
 
@@ -1,5 +1,7 @@
 from rest_framework import generics, permissions, filters
 from django_filters.rest_framework import DjangoFilterBackend
+from flixmix_rest_api.cache import get_versions
+from flixmix_rest_api.conditional import ConditionalGetMixin
 from flixmix_rest_api.permissions import IsOwnerOrAdminOrReadOnly
 from .models import RatingComment, ListComment
 from .serializers import (
@@ -13,21 +15,32 @@ from .serializers import (
 List of comments for lists. Without log in status only has
 reading permissions.
 Comments are filtered by lists.
+Supports conditional GETs, based on the changes of the list comments (of
+the filtered list, of every comment when unfiltered as the unfiltered list
+has them all) and on the current minute, as the comment times are relative
+("3 minutes ago").
 """
 
 
-class ListCommentList(generics.ListCreateAPIView):
+class ListCommentList(ConditionalGetMixin, generics.ListCreateAPIView):
     serializer_class = ListCommentSerializer
     permission_classes = [
         permissions.IsAuthenticatedOrReadOnly
     ]
-    queryset = ListComment.objects.all()
+    queryset = ListComment.objects.select_related('owner__profile')
     filter_backends = [
         DjangoFilterBackend,
     ]
     filterset_fields = [
         'list',
     ]
+    # The relative comment times change every minute
+    stamp_interval = 60
+
+    def get_change_stamps(self):
+        list_id = self.request.query_params.get('list')
+        versions = [f'list:{list_id}' if list_id else 'comment', 'profile']
+        return list(get_versions(versions).values())
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
@@ -43,28 +56,41 @@ Comments are filtered by lists.
 class ListCommentDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsOwnerOrAdminOrReadOnly]
     serializer_class = ListCommentDetailSerializer
-    queryset = ListComment.objects.all()
+    queryset = ListComment.objects.select_related('owner__profile', 'list')
 
 
 """
 List of comments for ratings. Without log in status only has
 reading permissions.
 Comments are filtered by ratings.
+Supports conditional GETs, based on the changes of the rating comments (of
+the filtered rating, of every comment when unfiltered as the unfiltered
+list has them all) and on the current minute, as the comment times are
+relative ("3 minutes ago").
 """
 
 
-class RatingCommentList(generics.ListCreateAPIView):
+class RatingCommentList(ConditionalGetMixin, generics.ListCreateAPIView):
     serializer_class = RatingCommentSerializer
     permission_classes = [
         permissions.IsAuthenticatedOrReadOnly
     ]
-    queryset = RatingComment.objects.all()
+    queryset = RatingComment.objects.select_related('owner__profile')
     filter_backends = [
         DjangoFilterBackend,
     ]
     filterset_fields = [
         'rating',
     ]
+    # The relative comment times change every minute
+    stamp_interval = 60
+
+    def get_change_stamps(self):
+        rating_id = self.request.query_params.get('rating')
+        versions = [
+            f'rating:{rating_id}' if rating_id else 'comment', 'profile'
+        ]
+        return list(get_versions(versions).values())
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
@@ -80,4 +106,6 @@ Comments are filtered by rating.
 class RatingCommentDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsOwnerOrAdminOrReadOnly]
     serializer_class = RatingCommentDetailSerializer
-    queryset = RatingComment.objects.all()
+    queryset = RatingComment.objects.select_related(
+        'owner__profile', 'rating'
+    )
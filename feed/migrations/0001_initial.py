@@ -0,0 +1,84 @@
+# Generated by Django 3.2.18 on 2026-10-18 07:27
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+BACKFILL_SIZE = 50
+
+
+def backfill_feed_items(apps, schema_editor):
+    """
+    Fills the feed of every existing follow with the most recent items of
+    the followed user, as a new follow does.
+    """
+    FeedItem = apps.get_model('feed', 'FeedItem')
+    Follower = apps.get_model('followers', 'Follower')
+    sources = {
+        'movie': apps.get_model('movies', 'Movie'),
+        'rating': apps.get_model('ratings', 'Rating'),
+        'list': apps.get_model('lists', 'List'),
+        'listcomment': apps.get_model('comments', 'ListComment'),
+        'ratingcomment': apps.get_model('comments', 'RatingComment'),
+    }
+    recent = {}
+    follows = Follower.objects.values_list('owner_id', 'followed_id')
+    for owner_id, followed_id in follows.iterator():
+        if followed_id not in recent:
+            items = []
+            for kind, model in sources.items():
+                rows = model.objects.filter(owner_id=followed_id).order_by(
+                    '-created_at', '-id'
+                ).values_list('id', 'created_at')[:BACKFILL_SIZE]
+                items += [(kind, row_id, created) for row_id, created in rows]
+            items.sort(key=lambda item: item[2], reverse=True)
+            recent[followed_id] = items[:BACKFILL_SIZE]
+        FeedItem.objects.bulk_create([
+            FeedItem(
+                owner_id=owner_id, actor_id=followed_id, kind=kind,
+                object_id=object_id, created_at=created_at
+            )
+            for kind, object_id, created_at in recent[followed_id]
+        ])
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('comments', '0002_created_at_id_indexes'),
+        ('followers', '0002_follower_followers_f_created_19ebd2_idx'),
+        ('lists', '0002_list_lists_list_created_3f9545_idx'),
+        ('movies', '0005_movie_search'),
+        ('ratings', '0003_rating_ratings_rat_created_68aebc_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('movie', 'Movie'), ('rating', 'Rating'), ('list', 'List'), ('listcomment', 'List comment'), ('ratingcomment', 'Rating comment')], max_length=20)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('created_at', models.DateTimeField()),
+                ('actor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_items', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at', '-id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='feeditem',
+            index=models.Index(fields=['owner', '-created_at', '-id'], name='feed_feedit_owner_i_77334a_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='feeditem',
+            unique_together={('kind', 'object_id', 'owner')},
+        ),
+        migrations.RunPython(
+            backfill_feed_items, migrations.RunPython.noop
+        ),
+    ]
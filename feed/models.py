@@ -0,0 +1,123 @@
+from django.db import models
+from django.db.models.signals import post_save, post_delete
+from django.contrib.auth.models import User
+from comments.models import ListComment, RatingComment
+from followers.models import Follower
+from lists.models import List
+from movies.models import Movie
+from ratings.models import Rating
+from utils.choices import FEED_KIND_CHOICES
+
+# Models whose instances are published in the followers feeds, by kind
+FEED_MODELS = {
+    'movie': Movie,
+    'rating': Rating,
+    'list': List,
+    'listcomment': ListComment,
+    'ratingcomment': RatingComment,
+}
+
+FEED_KINDS = {model: kind for kind, model in FEED_MODELS.items()}
+
+# Amount of recent items of a user added to the feed of a new follower
+BACKFILL_SIZE = 50
+
+
+class FeedItem(models.Model):
+    """
+    FeedItem model, an entry of the home feed of 'owner': a movie, rating,
+    list or comment (kind and object_id) created by 'actor', a user the
+    owner follows.
+    created_at is copied from the content so the feed is read with a single
+    range scan of the owner, created_at, id index.
+    """
+    owner = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='feed_items'
+    )
+    actor = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='+'
+    )
+    kind = models.CharField(max_length=20, choices=FEED_KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    created_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        indexes = [models.Index(fields=['owner', '-created_at', '-id'])]
+        unique_together = ['kind', 'object_id', 'owner']
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id} for {self.owner}'
+
+
+def get_backfill_items(follower_id, followed_id):
+    """
+    The most recent items of the followed user, to be added to the feed of
+    the follower.
+    """
+    items = []
+    for kind, model in FEED_MODELS.items():
+        recent = model.objects.filter(owner_id=followed_id).order_by(
+            '-created_at', '-id'
+        ).values_list('id', 'created_at')[:BACKFILL_SIZE]
+        items += [
+            FeedItem(
+                owner_id=follower_id, actor_id=followed_id, kind=kind,
+                object_id=object_id, created_at=created_at
+            )
+            for object_id, created_at in recent
+        ]
+    items.sort(key=lambda item: item.created_at, reverse=True)
+    return items[:BACKFILL_SIZE]
+
+
+def add_feed_items(kind, actor_id, objects):
+    """
+    Adds new content of the actor to the feed of every follower, objects
+    being a list of (object id, created_at).
+    """
+    followers = Follower.objects.filter(
+        followed_id=actor_id
+    ).values_list('owner_id', flat=True)
+    FeedItem.objects.bulk_create([
+        FeedItem(
+            owner_id=follower_id, actor_id=actor_id, kind=kind,
+            object_id=object_id, created_at=created_at
+        )
+        for follower_id in followers.iterator()
+        for object_id, created_at in objects
+    ], batch_size=1000)
+
+
+def fan_out_feed_item(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        add_feed_items(
+            FEED_KINDS[sender], instance.owner_id,
+            [(instance.pk, instance.created_at)]
+        )
+
+
+def remove_feed_items(sender, instance, **kwargs):
+    kind = FEED_KINDS[sender]
+    FeedItem.objects.filter(kind=kind, object_id=instance.pk).delete()
+
+
+def backfill_feed(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        FeedItem.objects.bulk_create(
+            get_backfill_items(instance.owner_id, instance.followed_id),
+            ignore_conflicts=True
+        )
+
+
+def prune_feed(sender, instance, **kwargs):
+    FeedItem.objects.filter(
+        owner_id=instance.owner_id, actor_id=instance.followed_id
+    ).delete()
+
+
+for model in FEED_MODELS.values():
+    post_save.connect(fan_out_feed_item, sender=model)
+    post_delete.connect(remove_feed_items, sender=model)
+post_save.connect(backfill_feed, sender=Follower)
+post_delete.connect(prune_feed, sender=Follower)
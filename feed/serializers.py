@@ -0,0 +1,29 @@
+from rest_framework import serializers
+from .models import FeedItem
+
+
+class FeedItemSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the feed items.
+    Provides the actor information (id, image and username).
+    Provides the content serialized as in its own endpoint, loaded by the
+    view for the whole page.
+    """
+    actor = serializers.ReadOnlyField(source='actor.username')
+    profile_id = serializers.ReadOnlyField(source='actor.profile.id')
+    profile_image = serializers.ReadOnlyField(
+        source='actor.profile.image_thumbnail'
+    )
+    content = serializers.SerializerMethodField()
+
+    def get_content(self, obj):
+        return self.context.get('feed_content', {}).get(
+            (obj.kind, obj.object_id)
+        )
+
+    class Meta:
+        model = FeedItem
+        fields = [
+            'id', 'actor', 'profile_id', 'profile_image', 'kind',
+            'object_id', 'created_at', 'content',
+        ]
@@ -0,0 +1,101 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+from comments.models import ListComment, RatingComment
+from followers.models import Follower
+from lists.models import List
+from movies.models import Movie
+from ratings.models import Rating
+from .models import FeedItem
+
+
+class FeedListViewTests(APITestCase):
+    def setUp(self):
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.brian = User.objects.create_user(
+            username='brian', password='pass'
+        )
+        self.carl = User.objects.create_user(username='carl', password='pass')
+        Follower.objects.create(owner=self.adam, followed=self.brian)
+        self.client.login(username='adam', password='pass')
+
+    def create_content(self, owner, title='Heat'):
+        movie = Movie.objects.create(
+            owner=owner, title=title, synopsis='synopsis',
+            directors='Michael Mann', main_cast='Al Pacino',
+            release_year=1995, movie_genre='crime'
+        )
+        rating = Rating.objects.create(
+            owner=owner, movie=movie, value=5, title='title',
+            content='content'
+        )
+        movie_list = List.objects.create(owner=owner, title='list')
+        movie_list.movies.add(movie)
+        ListComment.objects.create(
+            owner=owner, list=movie_list, content='content'
+        )
+        RatingComment.objects.create(
+            owner=owner, rating=rating, content='content'
+        )
+        return movie
+
+    def get_feed(self, url='/feed/'):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_feed_requires_login(self):
+        self.client.logout()
+        response = self.client.get('/feed/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_feed_shows_content_of_followed_users_newest_first(self):
+        self.create_content(self.brian)
+        self.create_content(self.carl)
+        results = self.get_feed()['results']
+        self.assertEqual(
+            [item['kind'] for item in results],
+            ['ratingcomment', 'listcomment', 'list', 'rating', 'movie']
+        )
+        self.assertTrue(all(item['actor'] == 'brian' for item in results))
+        self.assertEqual(results[-1]['content']['title'], 'Heat')
+        self.assertEqual(results[3]['content']['value'], 5)
+
+    def test_follow_backfills_and_unfollow_prunes_the_feed(self):
+        self.create_content(self.carl)
+        follow = Follower.objects.create(owner=self.adam, followed=self.carl)
+        self.assertEqual(len(self.get_feed()['results']), 5)
+        follow.delete()
+        self.assertEqual(self.get_feed()['results'], [])
+
+    def test_deleted_content_leaves_the_feed(self):
+        movie = self.create_content(self.brian)
+        movie.delete()
+        self.assertEqual(
+            [item['kind'] for item in self.get_feed()['results']],
+            ['listcomment', 'list']
+        )
+
+    def test_feed_is_cursor_paginated(self):
+        self.create_content(self.brian)
+        self.create_content(self.brian, title='Collateral')
+        data = self.get_feed('/feed/?page_size=4')
+        self.assertNotIn('count', data)
+        kinds = [item['kind'] for item in data['results']]
+        while data['next']:
+            data = self.get_feed(data['next'])
+            kinds += [item['kind'] for item in data['results']]
+        self.assertEqual(len(kinds), 10)
+        self.assertEqual(FeedItem.objects.filter(owner=self.adam).count(), 10)
+
+    def test_feed_queries_do_not_grow_with_the_page(self):
+        self.create_content(self.brian)
+        self.create_content(self.brian, title='Collateral')
+        with CaptureQueriesContext(connection) as context:
+            self.get_feed('/feed/?page_size=5')
+        small_page = len(context.captured_queries)
+        with CaptureQueriesContext(connection) as context:
+            self.get_feed('/feed/?page_size=10')
+        self.assertEqual(len(context.captured_queries), small_page)
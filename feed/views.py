@@ -0,0 +1,78 @@
+from collections import defaultdict
+from rest_framework import generics, permissions
+from flixmix_rest_api.pagination import KeysetPagination
+from flixmix_rest_api.viewer_state import resolve_viewer_state
+from comments.views import ListCommentList, RatingCommentList
+from lists.views import ListList
+from movies.views import MovieList
+from ratings.views import RatingList
+from .models import FeedItem
+from .serializers import FeedItemSerializer
+
+# Queryset and serializer of the content of each kind, the ones of its
+# list endpoint
+FEED_SOURCES = {
+    'movie': MovieList,
+    'rating': RatingList,
+    'list': ListList,
+    'listcomment': ListCommentList,
+    'ratingcomment': RatingCommentList,
+}
+
+
+def get_feed_content(items, context):
+    """
+    Returns {(kind, object_id): data} for the feed items, using one query
+    (plus the ones of its serializer) per kind.
+    """
+    object_ids = defaultdict(set)
+    for item in items:
+        object_ids[item.kind].add(item.object_id)
+
+    content = {}
+    for kind, ids in object_ids.items():
+        view = FEED_SOURCES[kind]
+        serializer_class = view.serializer_class
+        objects = list(view.queryset.filter(id__in=ids))
+        kind_context = dict(context)
+        relations = getattr(serializer_class, 'viewer_state_relations', None)
+        if relations:
+            kind_context['viewer_state'] = resolve_viewer_state(
+                relations, context['request'].user,
+                [
+                    getattr(obj, serializer_class.viewer_state_key)
+                    for obj in objects
+                ]
+            )
+        data = serializer_class(
+            objects, many=True, context=kind_context
+        ).data
+        content.update(
+            ((kind, obj.id), obj_data) for obj, obj_data in zip(objects, data)
+        )
+    return content
+
+
+class FeedList(generics.ListAPIView):
+    """
+    Home feed of the logged in user: the movies, ratings, lists and comments
+    created by the users they follow, newest first.
+    Reads the user's feed items (written when the content is created) with
+    cursor pagination, then loads the content of the page by kind.
+    """
+    serializer_class = FeedItemSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        return FeedItem.objects.filter(
+            owner=self.request.user
+        ).select_related('actor__profile')
+
+    def get_serializer(self, *args, **kwargs):
+        if args and kwargs.get('many'):
+            kwargs.setdefault('context', self.get_serializer_context())
+            kwargs['context']['feed_content'] = get_feed_content(
+                args[0], kwargs['context']
+            )
+        return super().get_serializer(*args, **kwargs)
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class FlixmixRestApiConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'flixmix_rest_api'
+
+    def ready(self):
+        from .cache import connect_version_signals
+        connect_version_signals()
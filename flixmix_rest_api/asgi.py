@@ -14,3 +14,9 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'flixmix_rest_api.settings')
 
 application = get_asgi_application()
+
+# Load the in-process title index as the worker starts, so the first
+# autocomplete requests don't wait for it
+from movies.autocomplete import title_index  # noqa: E402
+
+title_index.rebuild_in_background()
@@ -0,0 +1,197 @@
+"""
+Bulk writes of the movie collections of a user (seen, watchlist, ratings).
+Rows are written with set-based queries in one transaction. As bulk_create
+skips the model signals, and the per row handlers are skipped on bulk
+deletes (see utils.signals), the movie and profile stats and the cache
+versions those signals keep are updated here, with one query per counter.
+"""
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import permissions
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from movies.models import (
+    Movie, MovieState, add_trending_activity, update_movie_stats,
+)
+from profiles.models import update_profile_stats
+from utils.signals import bulk_write
+from .cache import bump_versions
+
+# Max amount of items of a bulk request
+MAX_BULK_ITEMS = 1000
+
+
+def get_bulk_items(data, key):
+    """
+    Returns the list of items sent in data[key], raising a validation error
+    if it is not a list of up to MAX_BULK_ITEMS items.
+    """
+    items = data.get(key) if hasattr(data, 'get') else None
+    if not isinstance(items, list):
+        raise ValidationError({key: 'Expected a list.'})
+    if len(items) > MAX_BULK_ITEMS:
+        raise ValidationError({
+            key: f'Up to {MAX_BULK_ITEMS} items can be sent at once.'
+        })
+    return items
+
+
+def get_movie_ids(data):
+    """
+    Returns the movie ids sent in data['movies'], without duplicates.
+    """
+    movie_ids = get_bulk_items(data, 'movies')
+    if not all(
+        isinstance(movie_id, int) and not isinstance(movie_id, bool)
+        for movie_id in movie_ids
+    ):
+        raise ValidationError({'movies': 'Expected a list of movie ids.'})
+    return list(dict.fromkeys(movie_ids))
+
+
+def create_missing_rows(model, found, read_existing, make_row):
+    """
+    Inserts a row, make_row(movie_id), for each movie of found that is not
+    in read_existing() (the movie ids that already have one), in a
+    savepoint.
+    A row inserted by a concurrent request since they were read makes the
+    whole insert fail, and it is retried with the movies read again, so the
+    returned new movie ids are exactly the rows this request inserted and
+    can be counted (ignore_conflicts would drop the row but not the count).
+    Returns (new movie ids, what read_existing returned).
+    """
+    new = None
+    while True:
+        existing = read_existing()
+        previous, new = new, found - set(existing)
+        try:
+            with transaction.atomic():
+                model.objects.bulk_create(
+                    [make_row(movie_id) for movie_id in new], batch_size=500
+                )
+            return new, existing
+        except IntegrityError:
+            # Retried only while the conflicts turn into existing rows
+            if previous is not None and not new < previous:
+                raise
+
+
+def delete_movie_rows(queryset, counter):
+    """
+    Deletes the rows of the queryset with the ORM, so whatever depends on
+    them is deleted (with its signals) like with Model.delete(), without
+    their own per row handlers, and decrements the counter of their movies.
+    The rows are locked first, so only the movies of the rows this request
+    deletes are counted.
+    Returns the ids of the movies.
+    """
+    rows = dict(queryset.select_for_update().values_list('pk', 'movie_id'))
+    movie_ids = set(rows.values())
+    if movie_ids:
+        with bulk_write(queryset.model):
+            queryset.model.objects.filter(pk__in=rows).delete()
+        update_movie_stats(movie_ids, **{counter: -1})
+    return movie_ids
+
+
+def bump_movie_versions(names, movie_ids):
+    bump_versions(
+        list(names) + [f'movie:{movie_id}' for movie_id in movie_ids]
+    )
+
+
+class BulkMovieCollectionView(APIView):
+    """
+    Base view of the bulk endpoints of a movie state of the logged in user
+    (model, a MovieState proxy, with the movie stats counter field).
+    POST moves the movies to the state (a movie is either seen or in the
+    watchlist, exclusive_counter is the counter of the other state).
+    DELETE removes them from it.
+    Both take {"movies": [ids]} and return a result per movie:
+    created, moved (from the other state), exists or not_found for POST,
+    deleted or not_found for DELETE.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    model = None
+    counter = None
+    exclusive_counter = None
+    version = 'movie_state'
+
+    def post(self, request):
+        movie_ids = get_movie_ids(request.data)
+        user = request.user
+        state = self.model.proxy_state
+        with transaction.atomic():
+            found = set(Movie.objects.filter(
+                id__in=movie_ids
+            ).values_list('id', flat=True))
+            new, states = create_missing_rows(
+                MovieState, found,
+                lambda: dict(MovieState.objects.select_for_update().filter(
+                    owner=user, movie__in=found
+                ).values_list('movie_id', 'state')),
+                lambda movie_id: MovieState(
+                    owner=user, movie_id=movie_id, state=state
+                )
+            )
+            existing = {
+                movie_id for movie_id, current in states.items()
+                if current == state
+            }
+            moved = set(states) - existing
+            if moved:
+                MovieState.objects.filter(
+                    owner=user, movie__in=moved
+                ).update(state=state, created_at=timezone.now())
+                update_movie_stats(moved, **{
+                    self.counter: 1, self.exclusive_counter: -1
+                })
+            update_movie_stats(new, **{self.counter: 1})
+            add_trending_activity(new | moved, state)
+            update_profile_stats([user.id], **{
+                self.counter: len(new) + len(moved),
+                self.exclusive_counter: -len(moved),
+            })
+        changed = new | moved
+        bump_movie_versions(
+            [self.version, f'user:{user.id}'] if changed else [], changed
+        )
+
+        results = []
+        for movie_id in movie_ids:
+            if movie_id not in found:
+                status = 'not_found'
+            elif movie_id in existing:
+                status = 'exists'
+            elif movie_id in moved:
+                status = 'moved'
+            else:
+                status = 'created'
+            results.append({'movie': movie_id, 'status': status})
+        return Response({'results': results})
+
+    def delete(self, request):
+        movie_ids = get_movie_ids(request.data)
+        with transaction.atomic():
+            deleted = delete_movie_rows(
+                self.model.objects.filter(
+                    owner=request.user, movie__in=movie_ids
+                ),
+                self.counter
+            )
+            if deleted:
+                update_profile_stats(
+                    [request.user.id], **{self.counter: -len(deleted)}
+                )
+        bump_movie_versions(
+            [self.version, f'user:{request.user.id}'] if deleted else [],
+            deleted
+        )
+        return Response({'results': [
+            {
+                'movie': movie_id,
+                'status': 'deleted' if movie_id in deleted else 'not_found',
+            }
+            for movie_id in movie_ids
+        ]})
@@ -0,0 +1,217 @@
+"""
+Response cache of the anonymous GET requests.
+Cached responses are keyed by the path, the query params and the version of
+every model the response depends on. Versions are counters kept in the cache
+and bumped by the model signals, so a write makes the stale entries
+unreachable instead of deleting them (they expire with the timeout).
+Besides the version of each model, writes bump the version of the objects
+they change (e.g. 'movie:<id>' when the movie is marked as seen), used by
+the conditional GETs, and of the user whose movies they change
+('user:<id>'), used by the profile statistics.
+Versions are bumped once the writing transaction commits, so a request
+running meanwhile can't cache the data it read before the commit under the
+new version.
+Versions are the time of the last change in milliseconds, so they never
+repeat an older version after being evicted and they double as a
+last modified date.
+Works with any Django cache backend shared by the workers (local-memory is
+per process, file based is shared by the workers of a machine). With a
+cache local to the process, a worker only sees its own writes: cached
+responses go stale until their timeout, and the conditional GETs, that
+could answer 304 forever, are disabled (see is_shared).
+"""
+import hashlib
+import time
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from rest_framework.response import Response
+from utils.signals import in_bulk_write
+
+CACHE_ALIAS = getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')
+CACHE_TIMEOUT = getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+
+# Version bumped by the writes of each model
+VERSIONED_MODELS = {
+    'movies.Movie': 'movie',
+    'ratings.Rating': 'rating',
+    'movies.MovieState': 'movie_state',
+    'seen_movie.Seen': 'movie_state',
+    'watchlist.Watchlist': 'movie_state',
+    'lists.List': 'list',
+    'reports.Report': 'report',
+    'comments.ListComment': 'comment',
+    'comments.RatingComment': 'comment',
+    'profiles.Profile': 'profile',
+    'followers.Follower': 'follower',
+}
+
+# Object versions bumped by the writes of each model, as
+# (version prefix, attribute with the object id)
+VERSIONED_OBJECTS = {
+    'movies.Movie': [('movie', 'pk')],
+    'ratings.Rating': [
+        ('movie', 'movie_id'), ('rating', 'pk'), ('user', 'owner_id'),
+    ],
+    'movies.MovieState': [('movie', 'movie_id'), ('user', 'owner_id')],
+    'seen_movie.Seen': [('movie', 'movie_id'), ('user', 'owner_id')],
+    'watchlist.Watchlist': [('movie', 'movie_id'), ('user', 'owner_id')],
+    'lists.List': [('list', 'pk')],
+    'reports.Report': [('movie', 'movie_id')],
+    'comments.ListComment': [('list', 'list_id')],
+    'comments.RatingComment': [('rating', 'rating_id')],
+}
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def is_shared():
+    """
+    True unless the cache is local to the process, where the versions
+    bumped by the other workers are never seen.
+    """
+    return not isinstance(get_cache(), (LocMemCache, DummyCache))
+
+
+def get_timestamp():
+    return int(time.time() * 1000)
+
+
+def get_versions(names):
+    """
+    Returns {name: version}, in the order of the names. Missing versions
+    (new or evicted) start at the current time.
+    """
+    cache = get_cache()
+    keys = {name: f'version:{name}' for name in names}
+    versions = cache.get_many(keys.values())
+    for key in set(keys.values()) - versions.keys():
+        cache.add(key, get_timestamp(), None)
+        versions[key] = cache.get(key)
+    return {name: versions[key] for name, key in keys.items()}
+
+
+def bump_versions(names):
+    """
+    Sets the versions to the current time, or one more than the current
+    version if it was bumped in the same millisecond, once the current
+    transaction (if any) commits.
+    """
+    keys = [f'version:{name}' for name in set(names)]
+    if keys:
+        transaction.on_commit(lambda: set_versions(keys))
+
+
+def set_versions(keys):
+    cache = get_cache()
+    versions = cache.get_many(keys)
+    timestamp = get_timestamp()
+    cache.set_many({
+        key: max(versions.get(key, 0) + 1, timestamp) for key in keys
+    }, None)
+
+
+def bump_version(name):
+    bump_versions([name])
+
+
+def bump_model_version(sender, instance, **kwargs):
+    # Bulk writes bump the versions of all their rows at once
+    if in_bulk_write(sender):
+        return
+    label = sender._meta.label
+    bump_versions([VERSIONED_MODELS[label]] + [
+        f'{prefix}:{getattr(instance, attribute)}'
+        for prefix, attribute in VERSIONED_OBJECTS.get(label, [])
+    ])
+
+
+def bump_list_version(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    lists, movies = [instance.pk], pk_set or []
+    if reverse:
+        lists, movies = pk_set or [], [instance.pk]
+    bump_versions(
+        ['list'] + [f'list:{list_id}' for list_id in lists] +
+        [f'movie:{movie_id}' for movie_id in movies]
+    )
+
+
+def connect_version_signals():
+    for label in VERSIONED_MODELS:
+        model = apps.get_model(label)
+        post_save.connect(bump_model_version, sender=model)
+        post_delete.connect(bump_model_version, sender=model)
+    m2m_changed.connect(
+        bump_list_version, sender=apps.get_model('lists.List').movies.through
+    )
+
+
+def record(outcome):
+    cache = get_cache()
+    try:
+        cache.incr(f'response_cache:{outcome}')
+    except ValueError:
+        cache.set(f'response_cache:{outcome}', 1, None)
+
+
+def get_stats():
+    """
+    Returns the hits and misses of the response cache.
+    """
+    stats = get_cache().get_many(
+        ['response_cache:hits', 'response_cache:misses']
+    )
+    return {
+        'hits': stats.get('response_cache:hits', 0),
+        'misses': stats.get('response_cache:misses', 0),
+    }
+
+
+def get_cache_key(request, version_names):
+    """
+    Cache key of the request: host, path, query params (sorted by name) and
+    the current version of the models the response depends on.
+    """
+    params = sorted(request.query_params.lists())
+    versions = sorted(get_versions(version_names).items())
+    raw = f'{request.get_host()}{request.path}|{params}|{versions}'
+    return 'response:' + hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+
+class CachedResponseMixin:
+    """
+    View mixin that caches the data of the anonymous GET responses.
+    cache_versions lists the versions (see VERSIONED_MODELS) of the models
+    the response depends on. Responses have an X-Cache header with HIT or
+    MISS.
+    """
+    cache_versions = ()
+    cache_timeout = CACHE_TIMEOUT
+
+    def get(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().get(request, *args, **kwargs)
+
+        cache = get_cache()
+        key = get_cache_key(request, self.cache_versions)
+        data = cache.get(key)
+        if data is not None:
+            record('hits')
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        record('misses')
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, self.cache_timeout)
+        response['X-Cache'] = 'MISS'
+        return response
@@ -0,0 +1,84 @@
+"""
+Conditional GETs: ETag and Last-Modified headers computed from the change
+stamps of a response, and 304 Not Modified answers to requests that already
+have the current response.
+"""
+import hashlib
+import time
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from .cache import get_versions, is_shared
+
+
+def get_stamp(moment):
+    return int(moment.timestamp() * 1000)
+
+
+def get_object_stamps(queryset, pk, version_names):
+    """
+    Change stamps of a single object: its updated_at plus the given
+    versions, or None if it doesn't exist.
+    Only updated_at is read from the database.
+    """
+    updated_at = queryset.filter(pk=pk).values_list(
+        'updated_at', flat=True
+    ).first()
+    if updated_at is None:
+        return None
+    return [get_stamp(updated_at)] + list(
+        get_versions(version_names).values()
+    )
+
+
+class ConditionalGetMixin:
+    """
+    View mixin that adds a strong ETag and a Last-Modified header to the GET
+    responses and answers 304 Not Modified to a matching If-None-Match or
+    If-Modified-Since before the view queryset runs.
+    Views provide the change stamps (milliseconds since the epoch) of the
+    response in get_change_stamps, or None to skip the conditional logic.
+    The stamps include versions of the response cache, so the conditional
+    logic is skipped unless that cache is shared by the workers
+    (CACHE_LOCATION), as each worker would have its own versions.
+    The ETag is also based on the user, as responses include fields relative
+    to them.
+    Views whose responses change with time alone (e.g. relative times like
+    "3 minutes ago") set stamp_interval to a number of seconds: the start of
+    the current interval is added to the change stamps, so the validators
+    expire with it, and the ETag is weak as the response may still change
+    within the interval.
+    """
+    stamp_interval = None
+
+    def get_change_stamps(self):
+        return None
+
+    def get(self, request, *args, **kwargs):
+        stamps = self.get_change_stamps() if is_shared() else None
+        if stamps is None:
+            return super().get(request, *args, **kwargs)
+        if self.stamp_interval:
+            interval = self.stamp_interval * 1000
+            stamps = stamps + [int(time.time() * 1000) // interval * interval]
+
+        validator = '|'.join([
+            request.path,
+            str(sorted(request.query_params.lists())),
+            str(request.user.pk),
+            str(stamps),
+        ])
+        etag = quote_etag(hashlib.md5(validator.encode('utf-8')).hexdigest())
+        if self.stamp_interval:
+            etag = f'W/{etag}'
+        last_modified = max(stamps) // 1000
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_vary_headers(response, ['Authorization', 'Cookie'])
+        return response
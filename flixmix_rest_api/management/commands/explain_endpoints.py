@@ -0,0 +1,184 @@
+import re
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import RequestFactory
+from django.urls import URLResolver, get_resolver
+from rest_framework.generics import GenericAPIView
+from rest_framework.mixins import RetrieveModelMixin
+from rest_framework.settings import api_settings
+
+# Full table scans and sorts in the plans of each database
+SCAN_PATTERNS = {
+    'sqlite': re.compile(r'\bSCAN (?:TABLE )?(\w+)\b(?! USING)'),
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+}
+SORT_PATTERNS = {
+    'sqlite': re.compile(r'USE TEMP B-TREE FOR (ORDER BY|GROUP BY|DISTINCT)'),
+    'postgresql': re.compile(r'Sort Key: (.+)'),
+}
+
+ROUTE_PARAMETER = re.compile(r'<(?:\w+:)?(\w+)>')
+
+
+def get_endpoints(patterns, prefix=''):
+    """
+    Yields (route, view class) of the generic API views in the url patterns.
+    """
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from get_endpoints(
+                pattern.url_patterns, prefix + str(pattern.pattern)
+            )
+            continue
+        view_class = getattr(pattern.callback, 'cls', None)
+        if view_class and issubclass(view_class, GenericAPIView):
+            yield prefix + str(pattern.pattern), view_class
+
+
+def get_project_apps():
+    return {
+        config.name for config in apps.get_app_configs()
+        if config.path.startswith(str(settings.BASE_DIR))
+    }
+
+
+class Command(BaseCommand):
+    """
+    Runs EXPLAIN on the queryset of every generic API endpoint of the
+    project apps, for each of its filter fields, ordering fields (both
+    directions) and search, with the pagination limit applied.
+    Reports full table scans and sorts that no index serves, and suggests
+    indexes for the filter and ordering fields of the endpoint model.
+    Querysets that fail to build (e.g. invalid ordering fields) are
+    reported too.
+    Endpoints are explained for a logged in user (with id 1) and the
+    parameters of their routes set to 1, the sample primary key.
+    """
+    help = 'Reports table scans and sorts of the endpoint querysets.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--app', action='append', dest='apps',
+            help='Only explain the endpoints of this app (repeatable).'
+        )
+        parser.add_argument(
+            '--show-plans', action='store_true',
+            help='Print every query plan.'
+        )
+
+    def handle(self, *args, **options):
+        self.show_plans = options['show_plans']
+        self.suggestions = set()
+        project_apps = get_project_apps()
+        endpoints = get_endpoints(get_resolver().url_patterns)
+        for route, view_class in endpoints:
+            app = view_class.__module__.split('.')[0]
+            if app not in (options['apps'] or project_apps):
+                continue
+            for params, filters in self.get_combinations(route, view_class):
+                self.explain(route, view_class, params, filters)
+
+        if self.suggestions:
+            self.stdout.write('\nSuggested indexes:')
+            for suggestion in sorted(self.suggestions):
+                self.stdout.write(f'  {suggestion}')
+        else:
+            self.stdout.write('\nNo index suggestions.')
+
+    def get_combinations(self, route, view_class):
+        """
+        Yields (query params, filters) to explain for the endpoint.
+        """
+        if '<' in route:
+            if issubclass(view_class, RetrieveModelMixin):
+                yield {}, {'pk': 1}
+            else:
+                # Lists of an object, e.g. the similar movies of a movie
+                yield {}, {}
+            return
+        yield {}, {}
+        for field in getattr(view_class, 'filterset_fields', []) or []:
+            yield {}, {field: 1}
+        for field in getattr(view_class, 'ordering_fields', []) or []:
+            if field == '__all__':
+                continue
+            yield {api_settings.ORDERING_PARAM: field}, {}
+            yield {api_settings.ORDERING_PARAM: f'-{field}'}, {}
+        if getattr(view_class, 'search_fields', None):
+            yield {api_settings.SEARCH_PARAM: 'a'}, {}
+
+    def get_queryset(self, route, view_class, params, filters):
+        view = view_class()
+        request = view.initialize_request(RequestFactory().get('/', params))
+        # Not saved, only its id is read by the querysets
+        request.user = get_user_model()(pk=1)
+        view.request = request
+        view.args = ()
+        view.kwargs = {name: 1 for name in ROUTE_PARAMETER.findall(route)}
+        view.format_kwarg = None
+        queryset = view.filter_queryset(view.get_queryset()).filter(**filters)
+        if 'pk' in filters:
+            return queryset.order_by()
+        return queryset[:api_settings.PAGE_SIZE]
+
+    def explain(self, route, view_class, params, filters):
+        combination = ', '.join(
+            f'{key}={value}' for key, value in {**params, **filters}.items()
+        ) or 'default'
+        label = f'{route} ({view_class.__name__}) [{combination}]'
+        try:
+            queryset = self.get_queryset(route, view_class, params, filters)
+            plan = queryset.explain()
+        except Exception as error:
+            self.stdout.write(f'{label}\n  ERROR {error}')
+            return
+
+        vendor = connections[queryset.db].vendor
+        scans = SCAN_PATTERNS.get(vendor, re.compile('$^')).findall(plan)
+        sorts = SORT_PATTERNS.get(vendor, re.compile('$^')).findall(plan)
+        if not (scans or sorts or self.show_plans):
+            return
+        self.stdout.write(label)
+        for table in scans:
+            self.stdout.write(f'  SCAN {table}')
+        for sort in sorts:
+            self.stdout.write(f'  SORT {sort}')
+        if self.show_plans:
+            self.stdout.write('  ' + plan.replace('\n', '\n  '))
+        self.suggest(queryset.model, scans, sorts, params, filters)
+
+    def suggest(self, model, scans, sorts, params, filters):
+        """
+        Suggests an index on the endpoint model for the filter or ordering
+        field of the combination when the model table is scanned or sorted.
+        """
+        fields = [name.split('__')[0] for name in filters if name != 'pk']
+        ordering = params.get(api_settings.ORDERING_PARAM)
+        if ordering and sorts:
+            fields.append(ordering)
+        elif model._meta.db_table not in scans:
+            return
+
+        label = model._meta.label
+        concrete = {field.name for field in model._meta.concrete_fields}
+        for field in fields:
+            name = field.lstrip('-')
+            if field == ordering and name in concrete:
+                direction = '-' if field.startswith('-') else ''
+                self.suggestions.add(
+                    f"{label}: models.Index(fields=['{field}', "
+                    f"'{direction}id'])"
+                )
+            elif name in concrete:
+                self.suggestions.add(
+                    f"{label}: models.Index(fields=['{field}'])"
+                )
+            elif field == ordering:
+                self.suggestions.add(
+                    f'{label}: {name} is not a column of '
+                    f'{model._meta.db_table}, store it in an indexed column '
+                    'to sort by it'
+                )
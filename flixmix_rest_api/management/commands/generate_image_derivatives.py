@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand
+from movies.models import POSTER_THUMBNAIL_SIZE, Movie
+from profiles.models import IMAGE_THUMBNAIL_SIZE, Profile
+from utils.images import create_thumbnail, update_image_urls
+
+# (model, image field, url field, thumbnail url field, thumbnail size)
+IMAGE_FIELDS = [
+    (
+        Movie, 'poster', 'poster_url', 'poster_thumbnail_url',
+        POSTER_THUMBNAIL_SIZE
+    ),
+    (
+        Profile, 'image', 'image_url', 'image_thumbnail_url',
+        IMAGE_THUMBNAIL_SIZE
+    ),
+]
+
+
+class Command(BaseCommand):
+    """
+    Stores the image URLs and generates the thumbnails of the movies and
+    profiles that don't have them, e.g. rows uploaded before the URLs were
+    stored or whose background thumbnail failed.
+    """
+    help = 'Generates the missing image URLs and thumbnails.'
+
+    def handle(self, *args, **options):
+        for model, field, url_field, thumbnail_field, size in IMAGE_FIELDS:
+            created = failed = 0
+            queryset = model.objects.filter(
+                **{thumbnail_field: ''}
+            ).only('pk', field, url_field, thumbnail_field)
+            for instance in queryset.iterator():
+                changed, needs_thumbnail = update_image_urls(
+                    instance, field, url_field, thumbnail_field
+                )
+                # A stored URL without thumbnail is an upload whose
+                # thumbnail wasn't generated
+                needs_thumbnail = needs_thumbnail or not changed
+                if changed:
+                    model.objects.filter(pk=instance.pk).update(**{
+                        name: getattr(instance, name) for name in changed
+                        if name != field
+                    })
+                if not needs_thumbnail:
+                    continue
+                try:
+                    create_thumbnail(
+                        model, instance.pk, field,
+                        getattr(instance, field).name, thumbnail_field, size
+                    )
+                    created += 1
+                except Exception as error:
+                    failed += 1
+                    self.stderr.write(
+                        f'{model.__name__} {instance.pk}: {error}'
+                    )
+            self.stdout.write(
+                f'{model.__name__}: {created} thumbnails created, '
+                f'{failed} failed.'
+            )
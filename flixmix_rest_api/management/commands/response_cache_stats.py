@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from flixmix_rest_api.cache import get_stats
+
+
+class Command(BaseCommand):
+    """
+    Prints the hits, misses and hit ratio of the response cache.
+    """
+    help = 'Prints the hit/miss counters of the response cache.'
+
+    def handle(self, *args, **options):
+        stats = get_stats()
+        total = stats['hits'] + stats['misses']
+        ratio = stats['hits'] / total if total else 0
+        self.stdout.write(
+            f"hits: {stats['hits']}\n"
+            f"misses: {stats['misses']}\n"
+            f'hit ratio: {ratio:.2%}'
+        )
@@ -0,0 +1,41 @@
+import logging
+import time
+from contextlib import ExitStack
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger('flixmix_rest_api.slow_queries')
+
+
+class SlowQueryLogMiddleware:
+    """
+    Logs the SQL, duration and view of every query slower than
+    settings.SLOW_QUERY_MS milliseconds (to the flixmix_rest_api.slow_queries
+    logger). Disabled when the setting is not set.
+    """
+    def __init__(self, get_response):
+        self.threshold = getattr(settings, 'SLOW_QUERY_MS', None)
+        if self.threshold is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        def log_slow_query(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                duration = (time.perf_counter() - start) * 1000
+                if duration >= self.threshold:
+                    match = request.resolver_match
+                    logger.warning(
+                        'Slow query (%.1f ms) in %s %s: %s', duration,
+                        match.view_name if match else request.path,
+                        request.method, sql
+                    )
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(log_slow_query))
+            return self.get_response(request)
@@ -0,0 +1,302 @@
+import json
+from base64 import b64decode, b64encode
+from binascii import Error as BinasciiError
+from collections import OrderedDict
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def estimate_count(queryset):
+    """
+    Returns the planner row estimate of the queryset on Postgres, and falls
+    back to an exact count on databases without one (SQLite).
+    The plan is read with a cursor, as QuerySet.explain joins the columns
+    of psycopg2 rows that already hold the decoded JSON.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        sql, params = queryset.query.get_compiler(queryset.db).as_sql()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return plan[0]['Plan']['Plan Rows']
+    return queryset.count()
+
+
+class PageNumberPagination(pagination.PageNumberPagination):
+    """
+    Page number pagination of the API.
+    The client can ask for a different page size with ?page_size=
+    (up to max_page_size).
+    ?count=none skips the COUNT(*) of the queryset (count is null) and
+    ?count=estimate replaces it with the database estimate. In both modes
+    one extra row is fetched to know if there is a next page.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    count_query_param = 'count'
+    count_modes = ('none', 'estimate')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_mode = request.query_params.get(self.count_query_param)
+        if self.count_mode not in self.count_modes:
+            return super().paginate_queryset(queryset, request, view)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        self.request = request
+        try:
+            self.page_number = int(
+                request.query_params.get(self.page_query_param, 1)
+            )
+        except ValueError:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=request.query_params.get(self.page_query_param),
+                message='That page number is not an integer'
+            ))
+        if self.page_number < 1:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=self.page_number,
+                message='That page number is less than 1'
+            ))
+
+        offset = (self.page_number - 1) * page_size
+        results = list(queryset[offset:offset + page_size + 1])
+        self.has_next = len(results) > page_size
+        self.count = None
+        if self.count_mode == 'estimate':
+            self.count = estimate_count(queryset)
+        return results[:page_size]
+
+    def get_paginated_response(self, data):
+        if self.count_mode not in self.count_modes:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('next', self.get_uncounted_link(self.page_number + 1)
+                if self.has_next else None),
+            ('previous', self.get_uncounted_link(self.page_number - 1)
+                if self.page_number > 1 else None),
+            ('results', data),
+        ]))
+
+    def get_uncounted_link(self, page_number):
+        url = self.request.build_absolute_uri()
+        if page_number == 1:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, page_number)
+
+
+class KeysetPagination(pagination.BasePagination):
+    """
+    Cursor pagination keyed on (created_at, id).
+    Pages are read with a WHERE on the ordering columns of the last row seen
+    instead of an OFFSET, and no COUNT(*) is run, so deep pages cost the same
+    as the first one when an index covers the ordering.
+    Views can list index backed ordering fields in cursor_ordering_fields,
+    ?ordering= on those fields is then paginated on
+    (field, created_at, id), or on (field, *cursor_tiebreaker_fields) when
+    the view sets them (e.g. to the columns of the index of the field).
+    """
+    ordering = ('-created_at', '-id')
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, view)
+        position, reverse = self.decode_cursor(request)
+        if position is not None:
+            position = self.parse_position(queryset, position)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = [self.invert(field) for field in ordering]
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(
+                self.get_keyset_filter(ordering, position)
+            )
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+            if page_size > 0:
+                return min(page_size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+
+    def get_ordering(self, request, view):
+        ordering = request.query_params.get(
+            api_settings.ORDERING_PARAM, ''
+        ).strip()
+        allowed = getattr(view, 'cursor_ordering_fields', [])
+        if ordering.lstrip('-') in allowed:
+            direction = '-' if ordering.startswith('-') else ''
+            tiebreakers = getattr(
+                view, 'cursor_tiebreaker_fields', ('created_at', 'id')
+            )
+            return (ordering, *(
+                f'{direction}{field}' for field in tiebreakers
+            ))
+        return self.ordering
+
+    def invert(self, field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    def get_keyset_filter(self, ordering, position):
+        """
+        Rows after the position in the given ordering, e.g. for
+        ('-created_at', '-id'):
+        created_at < x OR (created_at = x AND id < y)
+        """
+        keyset_filter = Q()
+        equal = {}
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            keyset_filter |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return keyset_filter
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            cursor = json.loads(b64decode(encoded.encode('ascii')))
+            position, reverse = cursor['p'], bool(cursor['r'])
+        except (BinasciiError, KeyError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or (
+            len(position) != len(self.ordering)
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def parse_position(self, queryset, position):
+        """
+        Converts the cursor values to the types of their ordering fields,
+        model fields or annotations of the queryset.
+        """
+        values = []
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            try:
+                model_field = queryset.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                model_field = queryset.query.annotations[name].output_field
+            try:
+                value = model_field.to_python(value)
+            except (TypeError, ValidationError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+            if value is None:
+                raise NotFound(self.invalid_cursor_message)
+            values.append(value)
+        return values
+
+    def encode_cursor(self, obj, reverse):
+        position = []
+        for field in self.ordering:
+            value = getattr(obj, field.lstrip('-'))
+            position.append(
+                value.isoformat() if hasattr(value, 'isoformat') else value
+            )
+        cursor = json.dumps({'p': position, 'r': int(reverse)})
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param,
+            b64encode(cursor.encode('utf-8')).decode('ascii')
+        )
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+
+class HybridPagination(pagination.BasePagination):
+    """
+    Default pagination class of the API.
+    Uses keyset pagination when the request asks for it (?pagination=cursor,
+    or a ?cursor= link) or the view sets pagination_mode = 'cursor', and
+    page number pagination otherwise.
+    """
+    mode_query_param = 'pagination'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request, view):
+            self.paginator = KeysetPagination()
+        else:
+            self.paginator = PageNumberPagination()
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def use_cursor(self, request, view):
+        mode = request.query_params.get(
+            self.mode_query_param, getattr(view, 'pagination_mode', 'page')
+        )
+        return (
+            mode == 'cursor' or
+            KeysetPagination.cursor_query_param in request.query_params
+        )
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return PageNumberPagination().get_paginated_response_schema(schema)
+
+    def to_html(self):
+        return self.paginator.to_html()
+
+    @property
+    def display_page_controls(self):
+        return getattr(self.paginator, 'display_page_controls', False)
@@ -22,7 +22,7 @@ REST_FRAMEWORK = {
         else 'dj_rest_auth.jwt_auth.JWTCookieAuthentication'
     )],
     'DEFAULT_PAGINATION_CLASS':
-        'rest_framework.pagination.PageNumberPagination',
+        'flixmix_rest_api.pagination.HybridPagination',
     'PAGE_SIZE': 10,
     'DATETIME_FORMAT': '%B %d, %Y at %H:%M',
 }
@@ -82,6 +82,7 @@ INSTALLED_APPS = [
     'dj_rest_auth.registration',
     'corsheaders',
 
+    'flixmix_rest_api',
     'profiles',
     'followers',
     'movies',
@@ -91,6 +92,7 @@ INSTALLED_APPS = [
     'lists',
     'comments',
     'reports',
+    'feed',
 ]
 
 SITE_ID = 1
@@ -106,6 +108,11 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Opt-in log of the queries slower than SLOW_QUERY_MS milliseconds
+if 'SLOW_QUERY_MS' in os.environ:
+    SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS'))
+    MIDDLEWARE.append('flixmix_rest_api.middleware.SlowQueryLogMiddleware')
+
 if 'CLIENT_ORIGIN' in os.environ:
     CORS_ALLOWED_ORIGINS = [
         os.environ.get('CLIENT_ORIGIN')
@@ -158,6 +165,19 @@ else:
     }
 
 
+# Cache
+# Local-memory by default, CACHE_LOCATION switches to a file based cache
+# shared by the workers of the machine (required by the conditional GETs)
+
+if 'CACHE_LOCATION' in os.environ:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_LOCATION'),
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
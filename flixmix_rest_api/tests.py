@@ -0,0 +1,636 @@
+import json
+import tempfile
+import time
+from base64 import b64encode
+from unittest import mock
+from io import StringIO
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+from comments.models import ListComment, RatingComment
+from flixmix_rest_api.pagination import estimate_count
+from followers.models import Follower
+from lists.models import List
+from movies.models import Movie, TrendingLandmark
+from profiles.models import ProfileStats
+from ratings.models import Rating
+from reports.models import Report
+from seen_movie.models import Seen
+from watchlist.models import Watchlist
+
+
+class QueryBudgetTests(APITestCase):
+    """
+    Every list endpoint has to run the same number of queries whatever the
+    page size, and every detail endpoint the same number of queries whatever
+    the amount of related rows.
+    """
+    list_urls = [
+        '/profiles/', '/movies/', '/ratings/', '/reports/', '/lists/',
+        '/listcomments/', '/ratingcomments/', '/followers/', '/seen/',
+        '/watchlist/',
+    ]
+    rows = 6
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(username=f'user{number}', password='pass')
+            for number in range(cls.rows)
+        ]
+        cls.movies = [
+            Movie.objects.create(
+                owner=user, title=f'Movie {number}', synopsis='synopsis',
+                directors='Test Director', main_cast='Test Cast',
+                release_year=2000, movie_genre='crime'
+            )
+            for number, user in enumerate(cls.users)
+        ]
+        for number, user in enumerate(cls.users):
+            movie = cls.movies[number]
+            next_movie = cls.movies[(number + 1) % cls.rows]
+            Seen.objects.create(owner=user, movie=movie)
+            Watchlist.objects.create(owner=user, movie=next_movie)
+            Report.objects.create(owner=user, movie=movie, content='content')
+            rating = Rating.objects.create(
+                owner=user, movie=movie, value=4, title='title',
+                content='content'
+            )
+            RatingComment.objects.create(
+                owner=user, rating=rating, content='content'
+            )
+            movie_list = List.objects.create(owner=user, title='list')
+            movie_list.movies.set(cls.movies[:number + 1])
+            ListComment.objects.create(
+                owner=user, list=movie_list, content='content'
+            )
+            Follower.objects.create(
+                owner=user, followed=cls.users[(number + 1) % cls.rows]
+            )
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries)
+
+    def assert_list_queries_are_constant(self):
+        for url in self.list_urls:
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.count_queries(f'{url}?page_size=1'),
+                    self.count_queries(f'{url}?page_size={self.rows}'),
+                )
+
+    def test_anonymous_list_queries_are_constant(self):
+        self.assert_list_queries_are_constant()
+
+    def test_authenticated_list_queries_are_constant(self):
+        self.client.force_authenticate(user=self.users[0])
+        self.assert_list_queries_are_constant()
+
+    def test_list_detail_queries_do_not_grow_with_movies(self):
+        small_list, big_list = List.objects.filter(
+            owner__in=[self.users[0], self.users[-1]]
+        ).order_by('created_at')
+        self.assertEqual(
+            self.count_queries(f'/lists/{small_list.id}/'),
+            self.count_queries(f'/lists/{big_list.id}/'),
+        )
+
+
+class PaginationTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.adam = User.objects.create_user(username='adam', password='pass')
+        for number in range(7):
+            Movie.objects.create(
+                owner=cls.adam, title=f'Movie {number}', synopsis='synopsis',
+                directors='Test Director', main_cast='Test Cast',
+                release_year=2000, movie_genre='crime'
+            )
+        # Rows sharing created_at must still be paginated exactly once
+        tied_titles = ['Movie 2', 'Movie 3', 'Movie 4']
+        Movie.objects.filter(title__in=tied_titles).update(
+            created_at=Movie.objects.get(title='Movie 2').created_at
+        )
+
+    def walk(self, url, link='next'):
+        titles = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            titles += [movie['title'] for movie in response.data['results']]
+            url = response.data[link]
+        return titles
+
+    def test_cursor_pagination_returns_every_row_once(self):
+        titles = self.walk('/movies/?pagination=cursor&page_size=2')
+        expected = list(Movie.objects.order_by(
+            '-created_at', '-id'
+        ).values_list('title', flat=True))
+        self.assertEqual(titles, expected)
+
+    def test_cursor_pagination_previous_links(self):
+        url = '/movies/?pagination=cursor&page_size=3'
+        first_page = self.client.get(url).data
+        second_page = self.client.get(first_page['next']).data
+        previous_page = self.client.get(second_page['previous']).data
+        self.assertEqual(previous_page['results'], first_page['results'])
+        self.assertIsNone(previous_page['previous'])
+
+    def test_cursor_pagination_on_index_backed_ordering(self):
+        movie = Movie.objects.get(title='Movie 5')
+        Seen.objects.create(owner=self.adam, movie=movie)
+        titles = self.walk(
+            '/movies/?pagination=cursor&page_size=2&ordering=-seen_count'
+        )
+        self.assertEqual(titles[0], 'Movie 5')
+        self.assertEqual(len(titles), 7)
+
+    def test_cursor_pages_of_count_orderings_are_read_in_index_order(self):
+        # Anonymous responses are cached
+        self.client.force_authenticate(user=self.adam)
+        url = '/movies/?pagination=cursor&page_size=2&ordering=-seen_count'
+        next_url = self.client.get(url).data['next']
+        for url in (url, next_url):
+            with CaptureQueriesContext(connection) as context:
+                self.client.get(url)
+            sql = next(
+                query['sql'] for query in context.captured_queries
+                if 'FROM "movies_movie"' in query['sql']
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plan = ' '.join(str(row) for row in cursor.fetchall())
+            self.assertIn('movies_movi_seen_co_9783c9_idx', plan)
+            self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/movies/?cursor=invalid')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_with_invalid_values(self):
+        for position, ordering in [
+            (['x', 'y'], ''),
+            (['2026-01-01T00:00:00+00:00', 'y'], ''),
+            ([None, 1], ''),
+            (['x', 1], '&ordering=-seen_count'),
+        ]:
+            cursor = b64encode(
+                json.dumps({'p': position, 'r': 0}).encode('utf-8')
+            ).decode('ascii')
+            response = self.client.get(f'/movies/?cursor={cursor}{ordering}')
+            self.assertEqual(
+                response.status_code, status.HTTP_404_NOT_FOUND
+            )
+
+    def test_page_number_pagination_without_count(self):
+        response = self.client.get('/movies/?count=none&page_size=5')
+        self.assertIsNone(response.data['count'])
+        self.assertEqual(len(response.data['results']), 5)
+        response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNone(response.data['next'])
+        self.assertIsNotNone(response.data['previous'])
+
+    def test_page_number_pagination_with_estimated_count(self):
+        response = self.client.get('/movies/?count=estimate')
+        self.assertEqual(response.data['count'], 7)
+
+    def test_estimated_count_reads_the_postgres_plan(self):
+        queryset = Movie.objects.filter(release_year__gte=2000)
+        postgres = mock.MagicMock(vendor='postgresql')
+        cursor = postgres.cursor.return_value.__enter__.return_value
+        # psycopg2 returns the JSON column decoded
+        cursor.fetchone.return_value = ([{'Plan': {'Plan Rows': 42}}],)
+        with mock.patch(
+            'flixmix_rest_api.pagination.connections',
+            {queryset.db: postgres}
+        ):
+            self.assertEqual(estimate_count(queryset), 42)
+        sql, params = cursor.execute.call_args[0]
+        self.assertTrue(sql.startswith('EXPLAIN (FORMAT JSON) SELECT'))
+        self.assertEqual(params, (2000,))
+
+
+class ResponseCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.movie = Movie.objects.create(
+            owner=self.adam, title='Heat', synopsis='synopsis',
+            directors='Michael Mann', main_cast='Al Pacino',
+            release_year=1995, movie_genre='crime'
+        )
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_anonymous_responses_are_cached(self):
+        # The conditional GETs of the detail, that read the movie
+        # updated_at, are disabled with the local-memory test cache
+        urls = [
+            '/movies/', f'/movies/{self.movie.id}/', '/lists/', '/ratings/',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.get(url)['X-Cache'], 'MISS')
+                with CaptureQueriesContext(connection) as context:
+                    response = self.get(url)
+                self.assertEqual(response['X-Cache'], 'HIT')
+                self.assertEqual(len(context.captured_queries), 0)
+
+    def test_query_params_are_normalized(self):
+        self.get('/movies/?page_size=5&ordering=title')
+        response = self.get('/movies/?ordering=title&page_size=5')
+        self.assertEqual(response['X-Cache'], 'HIT')
+        response = self.get('/movies/?ordering=-title&page_size=5')
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+    def test_writes_invalidate_the_cached_responses(self):
+        url = f'/movies/{self.movie.id}/'
+        self.assertEqual(self.get(url).data['seen_count'], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            Seen.objects.create(owner=self.adam, movie=self.movie)
+        response = self.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['seen_count'], 1)
+        self.get('/lists/')
+        with self.captureOnCommitCallbacks(execute=True):
+            List.objects.create(owner=self.adam, title='list').movies.add(
+                self.movie
+            )
+        self.assertEqual(len(self.get('/lists/').data['results']), 1)
+
+    def test_versions_are_bumped_once_the_write_commits(self):
+        url = f'/movies/{self.movie.id}/'
+        self.get(url)
+        with self.captureOnCommitCallbacks() as callbacks:
+            Seen.objects.create(owner=self.adam, movie=self.movie)
+            # A request running before the commit keeps the old version
+            self.assertEqual(self.get(url)['X-Cache'], 'HIT')
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.get(url)['X-Cache'], 'MISS')
+
+    def test_follows_invalidate_the_cached_responses(self):
+        brian = User.objects.create_user(username='brian', password='pass')
+        url = f'/movies/?owner__followed__owner__profile={brian.profile.id}'
+        self.assertEqual(self.get(url).data['count'], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            Follower.objects.create(owner=brian, followed=self.adam)
+        self.assertEqual(self.get(url).data['count'], 1)
+
+    def test_authenticated_requests_are_not_cached(self):
+        self.client.force_authenticate(user=self.adam)
+        self.get('/movies/')
+        self.assertNotIn('X-Cache', self.get('/movies/'))
+
+    def test_file_based_cache(self):
+        with tempfile.TemporaryDirectory() as location:
+            file_cache = {'default': {
+                'BACKEND':
+                    'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': location,
+            }}
+            with override_settings(CACHES=file_cache):
+                self.assertEqual(self.get('/movies/')['X-Cache'], 'MISS')
+                self.assertEqual(self.get('/movies/')['X-Cache'], 'HIT')
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.movie.delete()
+                response = self.get('/movies/')
+                self.assertEqual(response['X-Cache'], 'MISS')
+                self.assertEqual(response.data['results'], [])
+
+    def test_hit_and_miss_counters(self):
+        self.get('/movies/')
+        self.get('/movies/')
+        self.get('/movies/')
+        out = StringIO()
+        call_command('response_cache_stats', stdout=out)
+        self.assertIn('hits: 2', out.getvalue())
+        self.assertIn('misses: 1', out.getvalue())
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        # Conditional GETs need a cache shared by the workers
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': directory.name,
+        }})
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.movie = Movie.objects.create(
+            owner=self.adam, title='Heat', synopsis='synopsis',
+            directors='Michael Mann', main_cast='Al Pacino',
+            release_year=1995, movie_genre='crime'
+        )
+        self.rating = Rating.objects.create(
+            owner=self.adam, movie=self.movie, value=4, title='title',
+            content='content'
+        )
+        self.list = List.objects.create(owner=self.adam, title='list')
+        self.brian = User.objects.create_user(
+            username='brian', password='pass'
+        )
+
+    def get(self, url, **headers):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, **headers)
+        self.queries = len(context.captured_queries)
+        return response
+
+    def assert_not_modified(self, url):
+        etag = self.get(url)['ETag']
+        response = self.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        return etag
+
+    def test_detail_not_modified_skips_the_queryset(self):
+        url = f'/movies/{self.movie.id}/'
+        response = self.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.has_header('Last-Modified'))
+        self.assert_not_modified(url)
+        self.assertEqual(self.queries, 1)
+        response = self.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_related_changes_modify_the_detail(self):
+        url = f'/movies/{self.movie.id}/'
+        etag = self.assert_not_modified(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Seen.objects.create(owner=self.adam, movie=self.movie)
+        response = self.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['seen_count'], 1)
+
+        url = f'/lists/{self.list.id}/'
+        etag = self.assert_not_modified(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.list.movies.add(self.movie)
+        response = self.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            ListComment.objects.create(
+                owner=self.adam, list=self.list, content='content'
+            )
+        response = self.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.data['comments_count'], 1)
+
+    def test_deleting_a_list_modifies_the_detail_of_its_movies(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.list.movies.add(self.movie)
+        url = f'/movies/{self.movie.id}/'
+        etag = self.assert_not_modified(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.list.delete()
+        response = self.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['list_count'], 0)
+
+    def test_etag_depends_on_the_user(self):
+        url = f'/movies/{self.movie.id}/'
+        etag = self.get(url)['ETag']
+        self.client.force_authenticate(user=self.adam)
+        response = self.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_filtered_comment_collections(self):
+        other_rating = Rating.objects.create(
+            owner=self.brian, movie=self.movie, value=3, title='title',
+            content='content'
+        )
+        url = f'/ratingcomments/?rating={self.rating.id}'
+        etag = self.assert_not_modified(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            RatingComment.objects.create(
+                owner=self.adam, rating=other_rating, content='content'
+            )
+        response = self.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        with self.captureOnCommitCallbacks(execute=True):
+            RatingComment.objects.create(
+                owner=self.adam, rating=self.rating, content='content'
+            )
+        response = self.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+
+    def test_comment_collections_expire_with_their_relative_times(self):
+        url = f'/ratingcomments/?rating={self.rating.id}'
+        with mock.patch('time.time', return_value=1800000000):
+            etag = self.assert_not_modified(url)
+            self.assertTrue(etag.startswith('W/'))
+        with mock.patch('time.time', return_value=1800000059):
+            response = self.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        with mock.patch('time.time', return_value=1800000061):
+            response = self.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_disabled_with_a_cache_per_process(self):
+        local_cache = {'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }}
+        with override_settings(CACHES=local_cache):
+            response = self.get(f'/movies/{self.movie.id}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_missing_object(self):
+        response = self.get('/movies/0/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(response.has_header('ETag'))
+
+
+class ExplainEndpointsTests(APITestCase):
+    def explain(self, *args):
+        out = StringIO()
+        call_command('explain_endpoints', *args, stdout=out)
+        return out.getvalue()
+
+    def test_reports_scans_and_suggests_indexes(self):
+        output = self.explain('--app', 'reports')
+        self.assertIn('reports/ (ReportList) [ordering=-created_at]', output)
+        self.assertIn('SCAN reports_report', output)
+        self.assertIn(
+            "reports.Report: models.Index(fields=['-created_at', '-id'])",
+            output
+        )
+        self.assertNotIn('movies/', output)
+
+    def test_count_orderings_are_read_from_the_stats_indexes(self):
+        output = self.explain('--app', 'movies', '--app', 'profiles')
+        self.assertNotIn('[ordering=-seen_count]', output)
+        self.assertNotIn('[ordering=-followers_count]', output)
+
+    def test_explains_endpoints_of_an_object_and_of_the_user(self):
+        output = self.explain('--app', 'movies', '--app', 'feed')
+        self.assertNotIn('ERROR', output)
+        output = self.explain(
+            '--app', 'movies', '--app', 'feed', '--show-plans'
+        )
+        self.assertIn('(SimilarMovieList) [default]', output)
+        self.assertIn('feed/ (FeedList) [default]', output)
+
+    def test_reports_sorts_on_computed_fields(self):
+        output = self.explain('--app', 'movies', '--show-plans')
+        self.assertIn('movies/ (MovieList) [ordering=-avg_rating]', output)
+        self.assertIn('movies.Movie: avg_rating is not a column', output)
+
+
+class SlowQueryLogTests(APITestCase):
+    middleware = settings.MIDDLEWARE + [
+        'flixmix_rest_api.middleware.SlowQueryLogMiddleware'
+    ]
+
+    def setUp(self):
+        # Cached responses run no queries
+        cache.clear()
+
+    def test_logs_queries_above_the_threshold(self):
+        with self.settings(MIDDLEWARE=self.middleware, SLOW_QUERY_MS=0):
+            with self.assertLogs('flixmix_rest_api.slow_queries') as logs:
+                self.client.get('/ratings/')
+        self.assertIn('ratings.views.RatingList GET', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
+
+    def test_fast_queries_are_not_logged(self):
+        with self.settings(MIDDLEWARE=self.middleware, SLOW_QUERY_MS=60000):
+            with self.assertNoLogs('flixmix_rest_api.slow_queries'):
+                self.client.get('/ratings/')
+
+
+class BulkMovieCollectionTests(APITestCase):
+    def setUp(self):
+        TrendingLandmark.objects.update(time=time.time())
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.movies = [
+            Movie.objects.create(
+                owner=self.adam, title=f'Movie {number}',
+                synopsis='synopsis', directors='Test Director',
+                main_cast='Test Cast', release_year=2000,
+                movie_genre='crime'
+            )
+            for number in range(4)
+        ]
+        Seen.objects.create(owner=self.adam, movie=self.movies[0])
+        Watchlist.objects.create(owner=self.adam, movie=self.movies[1])
+        self.client.login(username='adam', password='pass')
+
+    def send(self, method, url, movie_ids):
+        response = getattr(self.client, method)(
+            url, {'movies': movie_ids}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [result['status'] for result in response.data['results']]
+
+    def stats(self, movie):
+        movie.stats.refresh_from_db()
+        return movie.stats.seen_count, movie.stats.watchlist_count
+
+    def test_bulk_seen_moves_movies_out_of_the_watchlist(self):
+        movie_ids = [movie.id for movie in self.movies] + [0]
+        self.assertEqual(
+            self.send('post', '/seen/bulk/', movie_ids),
+            ['exists', 'moved', 'created', 'created', 'not_found']
+        )
+        self.assertEqual(Seen.objects.filter(owner=self.adam).count(), 4)
+        self.assertFalse(Watchlist.objects.filter(owner=self.adam).exists())
+        self.assertEqual(self.stats(self.movies[0]), (1, 0))
+        self.assertEqual(self.stats(self.movies[1]), (1, 0))
+        # Only the new and moved movies are trending activity
+        self.assertAlmostEqual(
+            self.movies[0].stats.trending_score, 3, places=3
+        )
+        self.assertAlmostEqual(
+            self.movies[1].stats.trending_score, 4, places=3
+        )
+
+    def test_bulk_watchlist_moves_movies_out_of_seen(self):
+        self.assertEqual(
+            self.send('post', '/watchlist/bulk/', [self.movies[0].id]),
+            ['moved']
+        )
+        self.assertEqual(self.stats(self.movies[0]), (0, 1))
+
+    def test_bulk_delete(self):
+        movie_ids = [self.movies[1].id, self.movies[2].id]
+        self.assertEqual(
+            self.send('delete', '/watchlist/bulk/', movie_ids),
+            ['deleted', 'not_found']
+        )
+        self.assertEqual(self.stats(self.movies[1]), (0, 0))
+
+    def test_bulk_delete_skips_the_per_row_handlers(self):
+        for movie in self.movies[2:]:
+            Watchlist.objects.create(owner=self.adam, movie=movie)
+        with CaptureQueriesContext(connection) as context:
+            self.send(
+                'delete', '/watchlist/bulk/',
+                [movie.id for movie in self.movies]
+            )
+        self.assertFalse(Watchlist.objects.filter(owner=self.adam).exists())
+        for movie in self.movies[1:]:
+            self.assertEqual(self.stats(movie), (0, 0))
+        self.assertEqual(ProfileStats.objects.get(
+            profile__owner=self.adam
+        ).watchlist_count, 0)
+        # A single UPDATE of the movie stats for the three movies
+        self.assertEqual(sum(
+            'UPDATE "movies_moviestats"' in query['sql']
+            for query in context.captured_queries
+        ), 1)
+
+    def test_bulk_queries_do_not_grow_with_the_movies(self):
+        with CaptureQueriesContext(connection) as context:
+            self.send('post', '/seen/bulk/', [self.movies[1].id])
+        Seen.objects.all().delete()
+        Watchlist.objects.bulk_create([
+            Watchlist(owner=self.adam, movie=movie) for movie in self.movies
+        ])
+        with CaptureQueriesContext(connection) as more_context:
+            self.send(
+                'post', '/seen/bulk/', [movie.id for movie in self.movies]
+            )
+        self.assertEqual(
+            len(more_context.captured_queries),
+            len(context.captured_queries)
+        )
+
+    def test_bulk_invalidates_cached_responses(self):
+        cache.clear()
+        url = f'/movies/{self.movies[2].id}/'
+        self.client.logout()
+        self.client.get(url)
+        self.client.login(username='adam', password='pass')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.send('post', '/seen/bulk/', [self.movies[2].id])
+        self.client.logout()
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['seen_count'], 1)
+
+    def test_bulk_requires_a_list_of_ids(self):
+        response = self.client.post(
+            '/seen/bulk/', {'movies': ['one']}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
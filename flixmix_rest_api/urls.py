@@ -20,4 +20,5 @@ urlpatterns = [
     path('', include('lists.urls')),
     path('', include('comments.urls')),
     path('', include('reports.urls')),
+    path('', include('feed.urls')),
 ]
@@ -0,0 +1,63 @@
+def resolve_viewer_state(relations, user, keys):
+    """
+    Returns {name: {key: id}} with the ids of the rows the user owns in each
+    relation for the given keys, using one IN query per relation.
+    relations maps a name to (model, field), where field is the foreign key
+    of the model the keys are matched against, or to (model, field, values)
+    to get a tuple of the values fields instead of the id.
+    """
+    keys = set(keys)
+    if not user.is_authenticated or not keys:
+        return {name: {} for name in relations}
+    viewer_state = {}
+    for name, (model, field, *values) in relations.items():
+        rows = model.objects.filter(
+            owner=user, **{f'{field}__in': keys}
+        ).values_list(field, *(values[0] if values else ['id']))
+        viewer_state[name] = {
+            key: tuple(row) if values else row[0] for key, *row in rows
+        }
+    return viewer_state
+
+
+class ViewerStateSerializerMixin:
+    """
+    Serializer mixin for fields relative to the logged in user, e.g. the id
+    of the user's seen instance for a movie.
+    The view provides them for the whole page in context['viewer_state'],
+    otherwise (e.g. when creating) they are resolved for the single object.
+    """
+    viewer_state_relations = {}
+    viewer_state_key = 'id'
+
+    def get_viewer_state_id(self, name, obj):
+        key = getattr(obj, self.viewer_state_key)
+        viewer_state = self.context.get('viewer_state')
+        if viewer_state is None:
+            viewer_state = resolve_viewer_state(
+                {name: self.viewer_state_relations[name]},
+                self.context['request'].user, [key]
+            )
+        return viewer_state[name].get(key)
+
+
+class ViewerStateMixin:
+    """
+    View mixin that resolves the viewer state declared by the serializer for
+    every object that is being serialized at once, so the number of queries
+    does not grow with the page size.
+    """
+    def get_serializer(self, *args, **kwargs):
+        if args and args[0] is not None:
+            objects = args[0] if kwargs.get('many') else [args[0]]
+            serializer_class = self.get_serializer_class()
+            kwargs.setdefault('context', self.get_serializer_context())
+            kwargs['context']['viewer_state'] = resolve_viewer_state(
+                serializer_class.viewer_state_relations,
+                self.request.user,
+                [
+                    getattr(obj, serializer_class.viewer_state_key)
+                    for obj in objects
+                ],
+            )
+        return super().get_serializer(*args, **kwargs)
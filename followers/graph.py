@@ -0,0 +1,189 @@
+"""
+In-process follow graph, used by the follow suggestions and the mutual
+follow counts so they are set operations on sorted id arrays instead of
+self joins of the follower table.
+"""
+import threading
+import time
+import numpy as np
+from django.conf import settings
+
+# Seconds after which the graph is rebuilt (in the background) to pick up
+# the follows of other workers
+MAX_AGE = getattr(settings, 'FOLLOW_GRAPH_MAX_AGE', 600)
+
+EMPTY = np.array([], dtype=np.int32)
+
+
+def group_sorted(keys, values):
+    """
+    Returns {key: sorted array of its values} from two arrays of pairs.
+    """
+    order = np.lexsort((values, keys))
+    keys, values = keys[order], values[order]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(keys)]
+    return {
+        int(keys[start]): values[start:end]
+        for start, end in zip(starts, ends)
+    }
+
+
+def insert_sorted(array, value):
+    position = np.searchsorted(array, value)
+    if position < len(array) and array[position] == value:
+        return array
+    return np.insert(array, position, value)
+
+
+def remove_sorted(array, value):
+    position = np.searchsorted(array, value)
+    if position < len(array) and array[position] == value:
+        return np.delete(array, position)
+    return array
+
+
+class FollowGraph:
+    """
+    The ids of the users each user follows and of their followers, as
+    sorted int32 arrays per user.
+    Built lazily on first use, updated by the Follower signals and rebuilt
+    in the background once older than MAX_AGE. The follows added or removed
+    while a rebuild loads are replayed on the new graph before it replaces
+    the current one. Arrays are replaced, never changed in place, so they
+    can be read outside of the lock.
+    """
+    def __init__(self, max_age=MAX_AGE):
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        # Only one build loads at a time, as they share the change log
+        self.build_lock = threading.Lock()
+        self.following = None
+        self.followers = {}
+        self.built_at = 0
+        self.rebuilding = False
+        self.changes = None
+
+    @property
+    def is_built(self):
+        return self.following is not None
+
+    def load(self):
+        from .models import Follower
+        pairs = np.array(
+            list(Follower.objects.order_by().values_list(
+                'owner_id', 'followed_id'
+            ).iterator()),
+            dtype=np.int32
+        ).reshape(-1, 2)
+        if not len(pairs):
+            return {}, {}
+        owners, followed = pairs[:, 0], pairs[:, 1]
+        return group_sorted(owners, followed), group_sorted(followed, owners)
+
+    def build(self):
+        """
+        Loads the graph and replaces the current one, with the changes made
+        while it loaded replayed on it.
+        """
+        with self.build_lock:
+            try:
+                with self.lock:
+                    self.changes = []
+                following, followers = self.load()
+                with self.lock:
+                    self.following = following
+                    self.followers = followers
+                    changes, self.changes = self.changes, None
+                    for method, args in changes:
+                        method(*args)
+                    self.built_at = time.monotonic()
+            finally:
+                with self.lock:
+                    self.changes = None
+                    self.rebuilding = False
+
+    def rebuild_in_background(self):
+        with self.lock:
+            if self.rebuilding:
+                return
+            self.rebuilding = True
+        thread = threading.Thread(target=self.build, daemon=True)
+        thread.start()
+
+    def check(self):
+        if not self.is_built:
+            self.build()
+        elif time.monotonic() - self.built_at > self.max_age:
+            self.rebuild_in_background()
+
+    def add(self, owner_id, followed_id):
+        if not self.is_built and self.changes is None:
+            return
+        with self.lock:
+            self.add_follow(owner_id, followed_id)
+
+    def add_follow(self, owner_id, followed_id):
+        if self.changes is not None:
+            self.changes.append((self.add_follow, (owner_id, followed_id)))
+        if not self.is_built:
+            return
+        self.following[owner_id] = insert_sorted(
+            self.following.get(owner_id, EMPTY), followed_id
+        )
+        self.followers[followed_id] = insert_sorted(
+            self.followers.get(followed_id, EMPTY), owner_id
+        )
+
+    def remove(self, owner_id, followed_id):
+        if not self.is_built and self.changes is None:
+            return
+        with self.lock:
+            self.remove_follow(owner_id, followed_id)
+
+    def remove_follow(self, owner_id, followed_id):
+        if self.changes is not None:
+            self.changes.append((self.remove_follow, (owner_id, followed_id)))
+        if not self.is_built:
+            return
+        self.following[owner_id] = remove_sorted(
+            self.following.get(owner_id, EMPTY), followed_id
+        )
+        self.followers[followed_id] = remove_sorted(
+            self.followers.get(followed_id, EMPTY), owner_id
+        )
+
+    def mutual_followers_count(self, user_id, other_id):
+        """
+        Amount of the users user_id follows that follow other_id.
+        """
+        self.check()
+        with self.lock:
+            following = self.following.get(user_id, EMPTY)
+            followers = self.followers.get(other_id, EMPTY)
+        return len(np.intersect1d(following, followers, assume_unique=True))
+
+    def suggest(self, user_id, limit=10):
+        """
+        Returns the (user id, overlap) of the users followed by the most of
+        the users user_id follows (friends of friends), excluding the user
+        and the users they follow, best first.
+        """
+        self.check()
+        with self.lock:
+            following = self.following.get(user_id, EMPTY)
+            second = [self.following.get(int(i), EMPTY) for i in following]
+        if not second:
+            return []
+        user_ids, overlaps = np.unique(
+            np.concatenate(second), return_counts=True
+        )
+        keep = ~np.isin(user_ids, following, assume_unique=True) & (
+            user_ids != user_id
+        )
+        user_ids, overlaps = user_ids[keep], overlaps[keep]
+        best = np.lexsort((user_ids, -overlaps))[:limit]
+        return [(int(user_ids[i]), int(overlaps[i])) for i in best]
+
+
+follow_graph = FollowGraph()
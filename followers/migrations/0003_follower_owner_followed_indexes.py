@@ -0,0 +1,21 @@
+# Generated by Django 3.2.18 on 2026-10-18 08:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('followers', '0002_follower_followers_f_created_19ebd2_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='follower',
+            index=models.Index(fields=['owner', '-created_at', '-id'], name='followers_f_owner_i_56e396_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='follower',
+            index=models.Index(fields=['followed', '-created_at', '-id'], name='followers_f_followe_a60334_idx'),
+        ),
+    ]
@@ -1,5 +1,8 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
 from django.contrib.auth.models import User
+from profiles.models import update_profile_stats
+from .graph import follow_graph
 
 
 class Follower(models.Model):
@@ -16,7 +19,42 @@ class Follower(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['owner', '-created_at', '-id']),
+            models.Index(fields=['followed', '-created_at', '-id']),
+        ]
         unique_together = ['owner', 'followed']
 
     def __str__(self):
         return f"{self.owner} {self.followed}"
+
+
+def add_follower_counts(sender, instance, created, **kwargs):
+    if created:
+        update_profile_stats([instance.owner_id], following_count=1)
+        update_profile_stats([instance.followed_id], followers_count=1)
+
+
+def remove_follower_counts(sender, instance, **kwargs):
+    update_profile_stats([instance.owner_id], following_count=-1)
+    update_profile_stats([instance.followed_id], followers_count=-1)
+
+
+post_save.connect(add_follower_counts, sender=Follower)
+post_delete.connect(remove_follower_counts, sender=Follower)
+
+
+def add_to_follow_graph(sender, instance, created, **kwargs):
+    if created:
+        owner_id, followed_id = instance.owner_id, instance.followed_id
+        transaction.on_commit(lambda: follow_graph.add(owner_id, followed_id))
+
+
+def remove_from_follow_graph(sender, instance, **kwargs):
+    owner_id, followed_id = instance.owner_id, instance.followed_id
+    transaction.on_commit(lambda: follow_graph.remove(owner_id, followed_id))
+
+
+post_save.connect(add_to_follow_graph, sender=Follower)
+post_delete.connect(remove_from_follow_graph, sender=Follower)
@@ -9,12 +9,19 @@ class FollowerSerializer(serializers.ModelSerializer):
     user and tries to create a new follow instance to that user.
     """
     owner = serializers.ReadOnlyField(source='owner.username')
+    owner_image = serializers.ReadOnlyField(
+        source='owner.profile.image_thumbnail'
+    )
     followed_name = serializers.ReadOnlyField(source='followed.username')
+    followed_image = serializers.ReadOnlyField(
+        source='followed.profile.image_thumbnail'
+    )
 
     class Meta:
         model = Follower
         fields = [
-            'id', 'owner', 'followed', 'followed_name', 'created_at',
+            'id', 'owner', 'owner_image', 'followed', 'followed_name',
+            'followed_image', 'created_at',
         ]
 
     def create(self, validated_data):
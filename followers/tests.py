@@ -1,5 +1,6 @@
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import connection, models
+from django.test.utils import CaptureQueriesContext
 from .models import Follower
 from rest_framework import status
 from rest_framework.test import APITestCase
@@ -32,3 +33,51 @@ class FollowerListTest(APITestCase):
         response = self.client.post('/followers/', {'followed': self.adam.pk})
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
         self.assertEqual(Follower.objects.count(), 1)
+
+    def test_can_filter_follows_by_owner_and_followed(self):
+        Follower.objects.create(owner=self.brad, followed=self.brian)
+        response = self.client.get(f'/followers/?owner={self.brad.pk}')
+        self.assertEqual(
+            [follow['followed_name'] for follow in response.data['results']],
+            ['brian']
+        )
+        response = self.client.get(f'/followers/?followed={self.adam.pk}')
+        self.assertEqual(
+            [follow['owner'] for follow in response.data['results']],
+            ['brian']
+        )
+
+    def test_follows_of_a_user_are_paged_with_a_cursor(self):
+        users = [
+            User.objects.create_user(username=f'fan{number}', password='pass')
+            for number in range(5)
+        ]
+        for user in users:
+            Follower.objects.create(owner=user, followed=self.brad)
+        url = f'/followers/?followed={self.brad.pk}'
+        response = self.client.get(f'{url}&page_size=3')
+        self.assertNotIn('count', response.data)
+        owners = [follow['owner'] for follow in response.data['results']]
+        response = self.client.get(response.data['next'])
+        owners += [follow['owner'] for follow in response.data['results']]
+        self.assertIsNone(response.data['next'])
+        self.assertEqual(owners, [user.username for user in reversed(users)])
+        response = self.client.get(f'{url}&pagination=page')
+        self.assertEqual(response.data['count'], 5)
+
+    def test_listing_follows_does_not_fetch_users_per_row(self):
+        url = f'/followers/?followed={self.adam.pk}'
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+        for number in range(5):
+            user = User.objects.create_user(
+                username=f'fan{number}', password='pass'
+            )
+            Follower.objects.create(owner=user, followed=self.adam)
+        with CaptureQueriesContext(connection) as more_context:
+            response = self.client.get(url)
+        self.assertEqual(len(response.data['results']), 6)
+        self.assertIn('followed_image', response.data['results'][0])
+        self.assertEqual(
+            len(more_context.captured_queries), len(context.captured_queries)
+        )
@@ -1,3 +1,4 @@
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import generics, permissions
 from flixmix_rest_api.permissions import IsOwnerOrReadOnly
 from .models import Follower
@@ -10,10 +11,32 @@ class FollowerList(generics.ListCreateAPIView):
     following another user'.
     Create a follower, i.e. follow a user if logged in.
     Perform_create: associate the current logged in user with a follower.
+    Filtered by owner (who a user follows) or followed (who follows a
+    user), both indexed with the created_at ordering. The follows of a
+    user are paged with a cursor by default, as counting them for page
+    numbers would scan all of them (?pagination=page keeps the count).
     """
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    queryset = Follower.objects.all()
+    queryset = Follower.objects.select_related(
+        'owner__profile', 'followed__profile'
+    )
     serializer_class = FollowerSerializer
+    filter_backends = [
+        DjangoFilterBackend,
+    ]
+    filterset_fields = [
+        'owner',
+        'followed',
+    ]
+
+    @property
+    def pagination_mode(self):
+        if any(
+            self.request.query_params.get(field)
+            for field in self.filterset_fields
+        ):
+            return 'cursor'
+        return 'page'
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
@@ -26,5 +49,7 @@ class FollowerDetailView(generics.RetrieveDestroyAPIView):
     Destroy a follower, i.e. unfollow someone if owner
     """
     permission_classes = [IsOwnerOrReadOnly]
-    queryset = Follower.objects.all()
+    queryset = Follower.objects.select_related(
+        'owner__profile', 'followed__profile'
+    )
     serializer_class = FollowerSerializer
@@ -1,6 +1,11 @@
 from django.db import models
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_delete,
+)
 from django.contrib.auth.models import User
-from movies.models import Movie
+from flixmix_rest_api.cache import bump_versions
+from movies.models import Movie, add_trending_activity, update_movie_stats
+from profiles.models import update_profile_stats
 
 
 class List(models.Model):
@@ -16,6 +21,67 @@ class List(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [models.Index(fields=['-created_at', '-id'])]
 
     def __str__(self):
         return self.title
+
+
+def update_list_count(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Keeps the movies list count in sync with the list/movie relation.
+    Removals are resolved against the through table before they happen so
+    only the links that really exist are counted.
+    """
+    if action in ('pre_remove', 'pre_clear'):
+        if reverse:
+            links = sender.objects.filter(movie=instance)
+            if pk_set is not None:
+                links = links.filter(list__in=pk_set)
+        else:
+            links = sender.objects.filter(list=instance)
+            if pk_set is not None:
+                links = links.filter(movie__in=pk_set)
+        instance._removed_list_links = list(
+            links.values_list('movie_id', flat=True)
+        )
+    elif action in ('post_remove', 'post_clear'):
+        movie_ids = instance.__dict__.pop('_removed_list_links', [])
+        if reverse and movie_ids:
+            update_movie_stats([instance.pk], list_count=-len(movie_ids))
+        elif movie_ids:
+            update_movie_stats(movie_ids, list_count=-1)
+    elif action == 'post_add' and pk_set:
+        if reverse:
+            update_movie_stats([instance.pk], list_count=len(pk_set))
+            add_trending_activity([instance.pk], 'list', len(pk_set))
+        else:
+            update_movie_stats(pk_set, list_count=1)
+            add_trending_activity(pk_set, 'list')
+
+
+def remove_list_count(sender, instance, **kwargs):
+    """
+    Deleting a list removes its links without sending m2m_changed, so the
+    versions of its movies (whose list count changes) are bumped here.
+    """
+    movie_ids = list(instance.movies.values_list('id', flat=True))
+    update_movie_stats(movie_ids, list_count=-1)
+    bump_versions([f'movie:{movie_id}' for movie_id in movie_ids])
+
+
+m2m_changed.connect(update_list_count, sender=List.movies.through)
+pre_delete.connect(remove_list_count, sender=List)
+
+
+def add_profile_list_count(sender, instance, created, **kwargs):
+    if created:
+        update_profile_stats([instance.owner_id], list_count=1)
+
+
+def remove_profile_list_count(sender, instance, **kwargs):
+    update_profile_stats([instance.owner_id], list_count=-1)
+
+
+post_save.connect(add_profile_list_count, sender=List)
+post_delete.connect(remove_profile_list_count, sender=List)
@@ -6,8 +6,10 @@ from movies.models import Movie
 class MovieDetailsSerializer(serializers.ModelSerializer):
     """
     Movie serializer to provide movie information in the list.
-    Provides the movie id, title, poster and release year.
+    Provides the movie id, title, poster (thumbnail) and release year.
     """
+    poster = serializers.ReadOnlyField(source='poster_thumbnail')
+
     class Meta:
         model = Movie
         fields = ['id', 'title', 'poster', 'release_year']
@@ -23,7 +25,9 @@ class ListSerializer(serializers.ModelSerializer):
     owner = serializers.ReadOnlyField(source='owner.username')
     is_owner = serializers.SerializerMethodField()
     profile_id = serializers.ReadOnlyField(source='owner.profile.id')
-    profile_image = serializers.ReadOnlyField(source='owner.profile.image.url')
+    profile_image = serializers.ReadOnlyField(
+        source='owner.profile.image_thumbnail'
+    )
     comments_count = serializers.ReadOnlyField()
     movies_details = MovieDetailsSerializer(
         many=True, read_only=True, source='movies')
@@ -1,24 +1,32 @@
 from django.db.models import Count
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import generics, permissions, filters
+from flixmix_rest_api.cache import CachedResponseMixin
+from flixmix_rest_api.conditional import (
+    ConditionalGetMixin, get_object_stamps
+)
 from flixmix_rest_api.permissions import IsOwnerOrAdminOrReadOnly
 from .models import List
 from .serializers import ListSerializer
 
 
-class ListList(generics.ListCreateAPIView):
+class ListList(CachedResponseMixin, generics.ListCreateAPIView):
     """
     List of lists. Without log in status only has reading permissions.
     Provides the ammount of comments the list has.
     Has a search field for the movie title.
     Provides filtering for the owner and owner a user follows.
     Provides custom search fields for list title, owner username, owner id.
+    Anonymous responses are cached until a related model changes.
     """
     serializer_class = ListSerializer
+    cache_versions = ('list', 'comment', 'movie', 'profile', 'follower')
     permission_classes = [
         permissions.IsAuthenticatedOrReadOnly
     ]
-    queryset = List.objects.annotate(
+    queryset = List.objects.select_related(
+        'owner__profile'
+    ).prefetch_related('movies').annotate(
         comments_count=Count('listcomment', distinct=True),
     ).order_by('-created_at')
     filter_backends = [
@@ -61,15 +69,27 @@ class ListList(generics.ListCreateAPIView):
         serializer.save(owner=self.request.user)
 
 
-class ListDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ListDetailView(
+    ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView
+):
     """
     Detail of lists. If the user is not the owner or admin
     they only have reading permissions.
     Comments are filtered by lists.
     Provides the ammount of comments the list has.
+    Supports conditional GETs, based on the list updated_at and the changes
+    of its movies and comments.
     """
     permission_classes = [IsOwnerOrAdminOrReadOnly]
     serializer_class = ListSerializer
-    queryset = List.objects.annotate(
+    queryset = List.objects.select_related(
+        'owner__profile'
+    ).prefetch_related('movies').annotate(
         comments_count=Count('listcomment', distinct=True),
     ).order_by('-created_at')
+
+    def get_change_stamps(self):
+        pk = self.kwargs['pk']
+        return get_object_stamps(
+            List.objects.all(), pk, [f'list:{pk}', 'movie', 'profile']
+        )
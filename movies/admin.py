@@ -6,6 +6,10 @@ class MovieAdmin(admin.ModelAdmin):
     list_display = (
         'title', 'owner', 'release_year', 'movie_genre', 'avg_rating'
     )
+    list_select_related = ['stats']
+
+    def avg_rating(self, obj):
+        return obj.stats.avg_rating
 
 
 admin.site.register(Movie, MovieAdmin)
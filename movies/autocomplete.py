@@ -0,0 +1,317 @@
+"""
+In-process prefix index of the movie titles, used by the autocomplete
+endpoint so typeahead requests don't query the database.
+"""
+import heapq
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from django.conf import settings
+from django.db.models import F, Q
+
+# Seconds after which the index is rebuilt (in the background) to pick up
+# movies changed by other workers
+MAX_AGE = getattr(settings, 'MOVIE_AUTOCOMPLETE_MAX_AGE', 600)
+
+# Prefixes matching more keys than this keep a precomputed list of their
+# TOP_COUNT most popular movies, so short prefixes don't scan their matches
+MAX_SCAN = getattr(settings, 'MOVIE_AUTOCOMPLETE_MAX_SCAN', 1000)
+TOP_COUNT = 20
+
+# Movie stats counters a movie popularity is the sum of
+POPULARITY_FIELDS = ('seen_count', 'watchlist_count', 'rating_count')
+
+LAST_CHARACTER = '\U0010ffff'
+
+
+def normalize(text):
+    return ' '.join(re.findall(r'\w+', text.lower()))
+
+
+def get_keys(title):
+    """
+    Every suffix of the title starting at a word, so 'The Godfather' can be
+    found typing 'the go' or 'godf'.
+    """
+    words = normalize(title).split(' ')
+    return [' '.join(words[start:]) for start in range(len(words))]
+
+
+def get_prefixes(key):
+    return [key[:length] for length in range(1, len(key) + 1)]
+
+
+class TitleIndex:
+    """
+    Sorted array of (key, movie id) searched with bisect.
+    Suggestions are ranked by popularity (seen + watchlist + rating count),
+    kept up to date by update_movie_stats. The prefixes with more than
+    MAX_SCAN matches keep their top movies.
+    Built in the background at worker start (see wsgi.py), updated
+    incrementally by the Movie signals and rebuilt in the background once
+    older than MAX_AGE. Searches before the first build query the database.
+    The movies added or removed while a rebuild loads are replayed on the
+    new index before it replaces the current one.
+    """
+    def __init__(self, max_age=MAX_AGE):
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.entries = None
+        self.movies = {}
+        self.popularity = {}
+        self.top = {}
+        self.stale = set()
+        self.built_at = 0
+        self.rebuilding = False
+        self.changes = None
+
+    @property
+    def is_built(self):
+        return self.entries is not None
+
+    def load(self):
+        from .models import Movie
+        entries = []
+        movies = {}
+        popularity = {}
+        queryset = Movie.objects.select_related('stats').only(
+            'id', 'title', 'release_year', 'poster', 'poster_url',
+            'poster_thumbnail_url', 'stats__seen_count',
+            'stats__watchlist_count', 'stats__rating_count',
+        )
+        for movie in queryset.iterator():
+            movies[movie.id] = self.get_suggestion(movie)
+            entries += [(key, movie.id) for key in get_keys(movie.title)]
+            popularity[movie.id] = 0
+            if hasattr(movie, 'stats'):
+                popularity[movie.id] = sum(
+                    getattr(movie.stats, field) for field in POPULARITY_FIELDS
+                )
+        entries.sort()
+        return entries, movies, popularity
+
+    def build(self):
+        """
+        Loads the index and replaces the current one, with the changes made
+        while it loaded replayed on it.
+        """
+        try:
+            with self.lock:
+                self.changes = []
+            entries, movies, popularity = self.load()
+            top = self.get_top(entries, popularity)
+            with self.lock:
+                self.entries = entries
+                self.movies = movies
+                self.popularity = popularity
+                self.top = top
+                self.stale = set()
+                changes, self.changes = self.changes, None
+                for method, args in changes:
+                    method(*args)
+                self.built_at = time.monotonic()
+        finally:
+            with self.lock:
+                self.changes = None
+                self.rebuilding = False
+
+    def rebuild_in_background(self):
+        with self.lock:
+            if self.rebuilding:
+                return
+            self.rebuilding = True
+        thread = threading.Thread(target=self.build, daemon=True)
+        thread.start()
+
+    def get_top(self, entries, popularity):
+        """
+        Returns {prefix: its TOP_COUNT most popular movie ids} of the
+        prefixes with more than MAX_SCAN keys.
+        """
+        top = {}
+        ranges = [('', 0, len(entries))]
+        while ranges:
+            prefix, start, end = ranges.pop()
+            position = start
+            while position < end:
+                key = entries[position][0]
+                if len(key) <= len(prefix):
+                    position += 1
+                    continue
+                child = key[:len(prefix) + 1]
+                child_end = bisect_left(
+                    entries, (child + LAST_CHARACTER,), position, end
+                )
+                if child_end - position > MAX_SCAN:
+                    top[child] = self.rank(
+                        entries[position:child_end], popularity, TOP_COUNT
+                    )
+                    ranges.append((child, position, child_end))
+                position = child_end
+        return top
+
+    def rank(self, entries, popularity, limit):
+        movie_ids = {movie_id for _, movie_id in entries}
+        return heapq.nlargest(
+            limit, movie_ids,
+            key=lambda movie_id: (popularity[movie_id], movie_id)
+        )
+
+    def get_suggestion(self, movie):
+        return {
+            'id': movie.id,
+            'title': movie.title,
+            'release_year': movie.release_year,
+            'poster': movie.poster_thumbnail,
+        }
+
+    def get_top_prefixes(self, title):
+        return {
+            prefix for key in get_keys(title) for prefix in get_prefixes(key)
+            if prefix in self.top
+        }
+
+    def add(self, movie):
+        """
+        Adds or replaces a movie, keeping its popularity.
+        """
+        if not self.is_built and self.changes is None:
+            return
+        with self.lock:
+            self.add_movie(movie.id, self.get_suggestion(movie))
+
+    def add_movie(self, movie_id, suggestion):
+        if self.changes is not None:
+            self.changes.append((self.add_movie, (movie_id, suggestion)))
+        if not self.is_built:
+            return
+        self.remove_entries(movie_id)
+        self.movies[movie_id] = suggestion
+        self.popularity.setdefault(movie_id, 0)
+        for key in get_keys(suggestion['title']):
+            insort(self.entries, (key, movie_id))
+        self.promote(movie_id)
+
+    def remove(self, movie_id):
+        if not self.is_built and self.changes is None:
+            return
+        with self.lock:
+            self.remove_movie(movie_id)
+
+    def remove_movie(self, movie_id):
+        if self.changes is not None:
+            self.changes.append((self.remove_movie, (movie_id,)))
+        if not self.is_built:
+            return
+        self.remove_entries(movie_id)
+        self.popularity.pop(movie_id, None)
+
+    def remove_entries(self, movie_id):
+        movie = self.movies.pop(movie_id, None)
+        if movie is None:
+            return
+        for key in get_keys(movie['title']):
+            position = bisect_left(self.entries, (key, movie_id))
+            if self.entries[position:position + 1] == [(key, movie_id)]:
+                del self.entries[position]
+        for prefix in self.get_top_prefixes(movie['title']):
+            if movie_id in self.top[prefix]:
+                self.stale.add(prefix)
+
+    def add_popularity(self, movie_ids, delta):
+        """
+        Adds delta to the popularity of the movies, e.g. when they are seen.
+        Not replayed by a rebuild that is loading, as the stats it reads may
+        already include it.
+        """
+        if not self.is_built:
+            return
+        with self.lock:
+            for movie_id in movie_ids:
+                if movie_id not in self.popularity:
+                    continue
+                self.popularity[movie_id] += delta
+                if delta > 0:
+                    self.promote(movie_id)
+                else:
+                    for prefix in self.get_top_prefixes(
+                        self.movies[movie_id]['title']
+                    ):
+                        if movie_id in self.top[prefix]:
+                            self.stale.add(prefix)
+
+    def promote(self, movie_id):
+        """
+        Adds the movie to the top movies of its prefixes it now belongs to.
+        """
+        rank = (self.popularity[movie_id], movie_id)
+        for prefix in self.get_top_prefixes(self.movies[movie_id]['title']):
+            top = [other for other in self.top[prefix] if other != movie_id]
+            last = top[-1] if top else None
+            if len(top) < TOP_COUNT or rank > (
+                self.popularity[last], last
+            ):
+                top.append(movie_id)
+                top.sort(
+                    key=lambda other: (self.popularity[other], other),
+                    reverse=True
+                )
+            self.top[prefix] = top[:TOP_COUNT]
+
+    def search(self, prefix, limit=10):
+        """
+        The most popular movies with a title word sequence starting with the
+        prefix.
+        """
+        if not self.is_built:
+            self.rebuild_in_background()
+            return self.search_database(prefix, limit)
+        if time.monotonic() - self.built_at > self.max_age:
+            self.rebuild_in_background()
+
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        with self.lock:
+            if prefix in self.top and limit <= TOP_COUNT:
+                if prefix in self.stale:
+                    self.top[prefix] = self.rank(
+                        self.get_matches(prefix), self.popularity, TOP_COUNT
+                    )
+                    self.stale.discard(prefix)
+                best = self.top[prefix][:limit]
+            else:
+                best = self.rank(
+                    self.get_matches(prefix), self.popularity, limit
+                )
+            return [self.movies[movie_id] for movie_id in best]
+
+    def get_matches(self, prefix):
+        start = bisect_left(self.entries, (prefix,))
+        end = bisect_left(self.entries, (prefix + LAST_CHARACTER,))
+        return self.entries[start:end]
+
+    def search_database(self, prefix, limit):
+        """
+        The search of the index, with a query of the movie titles, until the
+        index is built.
+        """
+        from .models import Movie
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        popularity = sum(F(f'stats__{field}') for field in POPULARITY_FIELDS)
+        movies = Movie.objects.filter(
+            Q(title__istartswith=prefix) | Q(title__icontains=f' {prefix}')
+        ).annotate(popularity=popularity).order_by('-popularity', '-id')
+        return [
+            self.get_suggestion(movie)
+            for movie in movies.only(
+                'id', 'title', 'release_year', 'poster', 'poster_url',
+                'poster_thumbnail_url'
+            )[:limit]
+        ]
+
+
+title_index = TitleIndex()
@@ -0,0 +1,21 @@
+"""
+Top rated leaderboards ranked by Bayesian average rating.
+The ratings of a movie are pulled towards the mean of all the ratings as
+if it had MIN_VOTES more ratings of that value, so a movie with a handful
+of ratings can't outrank one rated well by many users.
+Every rated movie has a LeaderboardEntry with its score and its genre and
+release decade, indexed for each leaderboard, updated when its ratings
+change. The update_leaderboards command recomputes the mean rating and
+rebuilds the entries.
+"""
+from django.conf import settings
+
+# Ratings of the mean value a movie is assumed to have
+MIN_VOTES = getattr(settings, 'LEADERBOARD_MIN_VOTES', 10)
+
+# Mean rating before it is first computed (middle of the 1 to 5 scale)
+DEFAULT_MEAN = 3.0
+
+
+def bayesian_average(rating_sum, rating_count, mean):
+    return (MIN_VOTES * mean + rating_sum) / (MIN_VOTES + rating_count)
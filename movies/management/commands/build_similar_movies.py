@@ -0,0 +1,192 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from itertools import repeat
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from lists.models import List
+from movies.models import SimilarMovie, SimilarityRun
+from movies.similarity import (
+    IMPLICIT_VALUE, build_matrix, get_related_columns, set_worker_matrix,
+    top_neighbours, top_neighbours_in_worker,
+)
+from ratings.models import Rating
+from seen_movie.models import Seen
+
+# Seconds after which an --incremental run computes every movie instead,
+# picking up what incremental runs miss
+FULL_RUN_AGE = getattr(settings, 'SIMILAR_MOVIES_FULL_RUN_AGE', 24 * 3600)
+
+
+def read_interactions():
+    """
+    Returns the (user ids, movie ids, values, is rating) arrays of the
+    ratings, seen movies and list links.
+    """
+    sources = [
+        (Rating.objects.values_list('owner_id', 'movie_id', 'value'), True),
+        (Seen.objects.values_list('owner_id', 'movie_id'), False),
+        (
+            List.movies.through.objects.values_list(
+                'list__owner_id', 'movie_id'
+            ),
+            False
+        ),
+    ]
+    users, movies, values, is_rating = [], [], [], []
+    for queryset, rating in sources:
+        rows = np.array(list(queryset.iterator()), dtype=np.int64)
+        if not len(rows):
+            continue
+        users.append(rows[:, 0])
+        movies.append(rows[:, 1])
+        values.append(
+            rows[:, 2].astype(np.float64) if rating
+            else np.full(len(rows), IMPLICIT_VALUE)
+        )
+        is_rating.append(np.full(len(rows), rating))
+    if not users:
+        return None
+    return tuple(
+        np.concatenate(arrays) for arrays in (users, movies, values, is_rating)
+    )
+
+
+def get_touched_movies(since):
+    """
+    Ids of the movies rated, seen or added to an updated list since the
+    given time.
+    """
+    return set(
+        Rating.objects.filter(updated_at__gte=since).values_list(
+            'movie_id', flat=True
+        )
+    ) | set(
+        Seen.objects.filter(created_at__gte=since).values_list(
+            'movie_id', flat=True
+        )
+    ) | set(
+        List.movies.through.objects.filter(
+            list__updated_at__gte=since
+        ).values_list('movie_id', flat=True)
+    )
+
+
+class Command(BaseCommand):
+    """
+    Computes the most similar movies of every movie (item-item
+    collaborative filtering) and stores them in SimilarMovie.
+    The similarities are computed in chunks of movies, in parallel by a
+    pool of worker processes, and each chunk replaces the neighbours of
+    its movies in one transaction.
+    With --incremental only the movies with new ratings, seen marks or
+    list changes since the last run are refreshed, together with the
+    movies sharing a user with them, whose similarity with them changed
+    (so their neighbour lists don't keep the old scores).
+    Deleted interactions, and with the adjusted metric the user means that
+    move the columns of all the movies of a user, are only picked up by a
+    full run: an --incremental run is a full run once the last full run
+    is older than FULL_RUN_AGE, so scheduling --incremental runs is
+    enough.
+    """
+    help = 'Computes and stores the similar movies of every movie.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--metric', choices=['cosine', 'adjusted'], default='cosine',
+            help='Cosine or adjusted cosine (user mean subtracted) '
+                 'similarity.'
+        )
+        parser.add_argument(
+            '--neighbours', type=int, default=20,
+            help='Similar movies stored per movie.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help='Movies whose similarities are computed at once.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Worker processes (0 computes in this process).'
+        )
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help='Only refresh the movies touched since the last run.'
+        )
+
+    def handle(self, *args, **options):
+        started_at = timezone.now()
+        last_run = SimilarityRun.objects.first()
+        last_full_run = SimilarityRun.objects.filter(
+            incremental=False
+        ).first()
+        incremental = (
+            options['incremental'] and last_run is not None and
+            last_full_run is not None and
+            started_at - last_full_run.started_at < timedelta(
+                seconds=FULL_RUN_AGE
+            )
+        )
+
+        interactions = read_interactions()
+        if interactions is None:
+            self.stdout.write('There are no interactions.')
+            return
+        matrix, movie_ids = build_matrix(
+            interactions, adjusted=options['metric'] == 'adjusted'
+        )
+        columns = np.arange(len(movie_ids))
+        if incremental:
+            touched = get_touched_movies(last_run.started_at)
+            columns = get_related_columns(
+                matrix, columns[np.isin(movie_ids, list(touched))]
+            )
+
+        chunk_size = max(1, options['chunk_size'])
+        chunks = [
+            columns[start:start + chunk_size]
+            for start in range(0, len(columns), chunk_size)
+        ]
+        k = options['neighbours']
+        if options['workers'] > 0 and len(chunks) > 1:
+            with ProcessPoolExecutor(
+                max_workers=options['workers'],
+                initializer=set_worker_matrix, initargs=(matrix,)
+            ) as executor:
+                results = executor.map(
+                    top_neighbours_in_worker, chunks, repeat(k)
+                )
+                for chunk, neighbours in zip(chunks, results):
+                    self.store_neighbours(movie_ids, chunk, neighbours)
+        else:
+            for chunk in chunks:
+                self.store_neighbours(
+                    movie_ids, chunk, top_neighbours(matrix, chunk, k)
+                )
+
+        if not incremental:
+            # Movies without interactions anymore
+            SimilarMovie.objects.filter(created_at__lt=started_at).delete()
+        SimilarityRun.objects.create(
+            started_at=started_at, incremental=incremental,
+            movie_count=len(columns)
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Computed the similar movies of {len(columns)} movies.'
+        ))
+
+    def store_neighbours(self, movie_ids, columns, neighbours):
+        chunk_ids = [int(movie_ids[column]) for column in columns]
+        with transaction.atomic():
+            SimilarMovie.objects.filter(movie_id__in=chunk_ids).delete()
+            SimilarMovie.objects.bulk_create([
+                SimilarMovie(
+                    movie_id=movie_id, similar_id=int(movie_ids[similar]),
+                    score=float(score)
+                )
+                for movie_id, movie_neighbours in zip(chunk_ids, neighbours)
+                for similar, score in movie_neighbours
+            ], batch_size=1000)
@@ -0,0 +1,331 @@
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.storage import get_storage_class
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from flixmix_rest_api.cache import bump_version
+from movies import search
+from movies.models import POSTER_THUMBNAIL_SIZE, Movie, MovieStats
+from movies.posters import get_poster_error
+from profiles.models import update_profile_stats
+from utils.images import read_image_size, save_thumbnail
+
+# Columns (or keys) of a movie row, poster is an optional image path
+# relative to the posters directory
+FIELDS = [
+    'title', 'synopsis', 'directors', 'main_cast', 'release_year',
+    'movie_genre',
+]
+
+
+def read_rows(path, file_format):
+    """
+    Streams (row number, row) from a CSV file with a header or a JSONL file
+    with an object per line. Unparsable JSONL lines are yielded as None.
+    """
+    with open(path, newline='', encoding='utf-8') as file:
+        if file_format == 'csv':
+            yield from enumerate(csv.DictReader(file), start=1)
+            return
+        number = 0
+        for line in file:
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                yield number, json.loads(line)
+            except ValueError:
+                yield number, None
+
+
+def process_poster(storage_class, source):
+    """
+    Checks the poster rules reading the image header only, saves the poster
+    and its thumbnail to the storage. Runs in the worker processes.
+    Returns the poster name and the URLs of both with the names of the
+    saved files, or the error.
+    """
+    storage = get_storage_class(storage_class)()
+    files = []
+    try:
+        with open(source, 'rb') as file:
+            size = os.path.getsize(source)
+            image_size = read_image_size(file)
+            if image_size is None:
+                return None, [], 'Upload a valid image.'
+            error = get_poster_error(size, *image_size)
+            if error:
+                return None, [], error
+            files.append(storage.save(
+                f'images/{os.path.basename(source)}', File(file)
+            ))
+        files.append(save_thumbnail(storage, files[0], POSTER_THUMBNAIL_SIZE))
+        return {
+            'poster': files[0],
+            'poster_url': storage.url(files[0]),
+            'poster_thumbnail_url': storage.url(files[1]),
+        }, files, None
+    except OSError as error:
+        delete_files(storage, files)
+        return None, [], f'Invalid poster: {error}'
+
+
+def delete_files(storage, names):
+    for name in names:
+        storage.delete(name)
+
+
+class Command(BaseCommand):
+    """
+    Imports a movie catalog from a CSV or JSONL file of any size.
+    Rows are streamed and validated in batches, posters are checked and
+    uploaded by a pool of worker processes and every batch is written with
+    bulk_create in its own transaction, together with the poster URLs, the
+    movie stats rows, the owner movie count and the search documents (that
+    Movie.save and its signals add otherwise). The posters of a batch that
+    isn't written are deleted.
+    Imported movies are not added to the followers feeds, and the title
+    index of running servers picks them up on its next rebuild.
+    Every movie stores the import name and its row number as its unique
+    import key, so rows already imported are skipped when an import is run
+    again. The last imported row is also stored in a checkpoint file after
+    each batch, so an interrupted import continues from there without
+    reading the rows before it.
+    """
+    help = 'Imports movies from a CSV or JSONL file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSONL file to import.')
+        parser.add_argument(
+            '--owner', required=True,
+            help='Username of the owner of the imported movies.'
+        )
+        parser.add_argument(
+            '--name',
+            help='Name of the import, stored with the row numbers in the '
+                 'import keys of the movies (by default the file name).'
+        )
+        parser.add_argument(
+            '--format', choices=['csv', 'jsonl'],
+            help='Format of the file (by default from its extension).'
+        )
+        parser.add_argument(
+            '--posters-dir',
+            help='Directory of the poster paths (by default the directory '
+                 'of the file).'
+        )
+        parser.add_argument(
+            '--storage', default=settings.DEFAULT_FILE_STORAGE,
+            help='Storage class the posters are saved to.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Rows validated and written per transaction.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Poster worker processes (0 processes them inline).'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Checkpoint file (by default the path plus .checkpoint).'
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Ignore the checkpoint and import from the first row.'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.isfile(path):
+            raise CommandError(f'{path} does not exist.')
+        file_format = options['format'] or (
+            'csv' if path.lower().endswith('.csv') else 'jsonl'
+        )
+        try:
+            self.owner = User.objects.get(username=options['owner'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['owner']} does not exist.")
+        self.posters_dir = options['posters_dir'] or os.path.dirname(
+            os.path.abspath(path)
+        )
+        self.checkpoint = options['checkpoint'] or f'{path}.checkpoint'
+        self.name = options['name'] or os.path.basename(path)
+        self.storage = get_storage_class(options['storage'])()
+        poster = Movie._meta.get_field('poster')
+        default_url = poster.storage.url(poster.default)
+        self.default_urls = {
+            'poster_url': default_url, 'poster_thumbnail_url': default_url,
+        }
+        batch_size = max(1, options['batch_size'])
+
+        start = 0 if options['restart'] else self.read_checkpoint()
+        if start:
+            self.stdout.write(f'Resuming after row {start}.')
+        rows = (
+            (number, row) for number, row in read_rows(path, file_format)
+            if number > start
+        )
+
+        executor = None
+        process = partial(process_poster, options['storage'])
+        poster_map = map
+        if options['workers'] > 0:
+            executor = ProcessPoolExecutor(max_workers=options['workers'])
+            poster_map = executor.map
+
+        self.imported = self.failed = self.skipped = read = 0
+        started = time.monotonic()
+        try:
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                read += len(batch)
+                movies, files = self.validate_batch(
+                    batch, poster_map, process
+                )
+                try:
+                    with transaction.atomic():
+                        self.create_movies(movies)
+                except BaseException:
+                    delete_files(self.storage, files)
+                    raise
+                self.write_checkpoint(batch[-1][0])
+                bump_version('movie')
+                self.imported += len(movies)
+                rate = read / max(time.monotonic() - started, 1e-6)
+                self.stdout.write(
+                    f'Row {batch[-1][0]}: {self.imported} imported, '
+                    f'{self.failed} failed ({rate:.1f} rows/s)'
+                )
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        if os.path.exists(self.checkpoint):
+            os.remove(self.checkpoint)
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {self.imported} movies, {self.failed} rows failed, '
+            f'{self.skipped} were already imported, in {elapsed:.1f}s '
+            f'({read / elapsed:.1f} rows/s).'
+        ))
+
+    def validate_batch(self, batch, poster_map, process):
+        """
+        Returns the valid movies of the batch, with their posters and
+        thumbnails saved, and the names of the saved files.
+        Rows with errors are reported and skipped, as well as the rows
+        already imported.
+        """
+        keys = {number: f'{self.name}:{number}' for number, _ in batch}
+        imported = set(Movie.objects.filter(
+            import_key__in=keys.values()
+        ).values_list('import_key', flat=True))
+        self.skipped += len(imported)
+        movies = []
+        sources = []
+        for number, row in batch:
+            if keys[number] in imported:
+                continue
+            try:
+                movie = self.build_movie(row, keys[number])
+            except ValidationError as error:
+                self.report_error(number, error)
+                continue
+            poster = (row.get('poster') or '').strip()
+            source = os.path.join(self.posters_dir, poster) if poster else ''
+            movies.append((number, movie))
+            sources.append(source)
+
+        with_poster = [index for index, source in enumerate(sources) if source]
+        results = dict(zip(with_poster, poster_map(
+            process, [sources[index] for index in with_poster]
+        )))
+        valid = []
+        files = []
+        for index, (number, movie) in enumerate(movies):
+            values, saved, error = results.get(
+                index, (self.default_urls, [], None)
+            )
+            files += saved
+            if error:
+                self.report_error(number, ValidationError({'poster': error}))
+                continue
+            for field, value in values.items():
+                setattr(movie, field, value)
+            valid.append(movie)
+        return valid, files
+
+    def build_movie(self, row, import_key):
+        if not isinstance(row, dict):
+            raise ValidationError('Expected an object.')
+        movie = Movie(
+            owner=self.owner, import_key=import_key,
+            **{field: row.get(field) for field in FIELDS}
+        )
+        # The owner is known to exist and the poster is checked by the
+        # workers
+        movie.full_clean(
+            exclude=['owner', 'poster', 'release_decade'],
+            validate_unique=False
+        )
+        # Set by Movie.save, which bulk_create skips
+        movie.release_decade = movie.release_year - movie.release_year % 10
+        return movie
+
+    def create_movies(self, movies):
+        if not movies:
+            return
+        Movie.objects.bulk_create(movies)
+        if not connection.features.can_return_rows_from_bulk_insert:
+            # SQLite doesn't return the ids of the new rows
+            ids = dict(Movie.objects.filter(
+                import_key__in=[movie.import_key for movie in movies]
+            ).values_list('import_key', 'id'))
+            for movie in movies:
+                movie.id = ids[movie.import_key]
+        MovieStats.objects.bulk_create(
+            [MovieStats(movie_id=movie.id) for movie in movies]
+        )
+        update_profile_stats([self.owner.id], movie_count=len(movies))
+        for movie in movies:
+            search.index_movie(movie)
+
+    def report_error(self, number, error):
+        self.failed += 1
+        if hasattr(error, 'error_dict'):
+            message = '; '.join(
+                f"{field}: {' '.join(messages)}"
+                for field, messages in error.message_dict.items()
+            )
+        else:
+            message = ' '.join(error.messages)
+        self.stderr.write(f'Row {number}: {message}')
+
+    def read_checkpoint(self):
+        try:
+            with open(self.checkpoint) as file:
+                return json.load(file)['row']
+        except FileNotFoundError:
+            return 0
+        except (KeyError, TypeError, ValueError):
+            raise CommandError(f'Invalid checkpoint file {self.checkpoint}.')
+
+    def write_checkpoint(self, number):
+        # Replaced atomically so an interruption never leaves it half
+        # written
+        temporary = f'{self.checkpoint}.tmp'
+        with open(temporary, 'w') as file:
+            json.dump({'row': number}, file)
+        os.replace(temporary, self.checkpoint)
@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from movies.models import Movie, MovieStats
+from seen_movie.models import Seen
+from watchlist.models import Watchlist
+from lists.models import List
+from ratings.models import Rating
+from reports.models import Report
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the movie stats table from scratch.
+    Every counter is computed with one grouped query per related table
+    (ratings are grouped by value to rebuild the histogram and the sum) and
+    the table is replaced in a single transaction.
+    The trending scores aren't counters of the related tables and are kept.
+    """
+    help = 'Rebuilds the MovieStats table from the related tables.'
+
+    def handle(self, *args, **options):
+        counted = {
+            'seen_count': Seen.objects.all(),
+            'watchlist_count': Watchlist.objects.all(),
+            'list_count': List.movies.through.objects.all(),
+            'report_count': Report.objects.all(),
+        }
+        with transaction.atomic():
+            trending_scores = dict(
+                MovieStats.objects.values_list('movie_id', 'trending_score')
+            )
+            stats = {
+                movie_id: MovieStats(
+                    movie_id=movie_id,
+                    trending_score=trending_scores.get(movie_id, 0)
+                )
+                for movie_id in Movie.objects.values_list('id', flat=True)
+            }
+            for field, queryset in counted.items():
+                counts = queryset.order_by().values('movie').annotate(
+                    total=Count('movie')
+                ).values_list('movie', 'total')
+                for movie_id, total in counts:
+                    setattr(stats[movie_id], field, total)
+            ratings = Rating.objects.order_by().values(
+                'movie', 'value'
+            ).annotate(total=Count('movie')).values_list(
+                'movie', 'value', 'total'
+            )
+            for movie_id, value, total in ratings:
+                movie_stats = stats[movie_id]
+                setattr(movie_stats, f'rating_{value}_count', total)
+                movie_stats.rating_count += total
+                movie_stats.rating_sum += value * total
+            MovieStats.objects.all().delete()
+            MovieStats.objects.bulk_create(stats.values(), batch_size=1000)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt the stats of {len(stats)} movies.'
+        ))
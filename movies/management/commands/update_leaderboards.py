@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Sum
+from movies.leaderboards import DEFAULT_MEAN, bayesian_average
+from movies.models import LeaderboardEntry, LeaderboardPrior, MovieStats
+
+
+class Command(BaseCommand):
+    """
+    Recomputes the mean of all the ratings the leaderboards are pulled
+    towards and rebuilds the leaderboard entries with it in a single
+    transaction. The rating writes keep the entries up to date in between,
+    with the mean of the last run.
+    """
+    help = 'Rebuilds the top rated leaderboards.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            totals = MovieStats.objects.aggregate(
+                rating_sum=Sum('rating_sum'), rating_count=Sum('rating_count')
+            )
+            mean = DEFAULT_MEAN
+            if totals['rating_count']:
+                mean = totals['rating_sum'] / totals['rating_count']
+            LeaderboardPrior.objects.all().delete()
+            LeaderboardPrior.objects.create(mean=mean)
+
+            entries = [
+                LeaderboardEntry(
+                    movie_id=movie_id, movie_genre=movie_genre,
+                    release_decade=release_decade,
+                    score=bayesian_average(rating_sum, rating_count, mean)
+                )
+                for (
+                    movie_id, rating_sum, rating_count, movie_genre,
+                    release_decade
+                ) in MovieStats.objects.filter(
+                    rating_count__gt=0
+                ).values_list(
+                    'movie_id', 'rating_sum', 'rating_count',
+                    'movie__movie_genre', 'movie__release_decade'
+                ).iterator()
+            ]
+            LeaderboardEntry.objects.all().delete()
+            LeaderboardEntry.objects.bulk_create(entries, batch_size=1000)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Ranked {len(entries)} movies with a mean rating of '
+            f'{mean:.2f}.'
+        ))
@@ -0,0 +1,76 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+from movies.models import MovieStats, TrendingLandmark, TrendingMovie
+from movies.trending import (
+    HALF_LIFE, REBASE_AFTER, TOP_COUNT, decay_factor,
+)
+from utils.choices import GENRES_CHOICES
+
+
+class Command(BaseCommand):
+    """
+    Stores the trending ranking overall and of every genre in
+    TrendingMovie from the trending scores the writes keep up to date,
+    with one indexed query per ranking.
+    Before that, once the landmark of the scores is REBASE_AFTER half lives
+    old, it is moved to now and the scores are rescaled in one UPDATE.
+    Meant to run every few minutes: the endpoint is as fresh as its last
+    run.
+    """
+    help = 'Stores the trending movies rankings.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top', type=int, default=TOP_COUNT,
+            help='Movies stored per ranking.'
+        )
+
+    def handle(self, *args, **options):
+        now = time.time()
+        landmark = self.rebase(now)
+        factor = decay_factor(landmark, now)
+        top = max(1, options['top'])
+        genres = [''] + [genre for genre, _ in GENRES_CHOICES]
+        for genre in genres:
+            stats = MovieStats.objects.filter(trending_score__gt=0)
+            if genre:
+                stats = stats.filter(movie__movie_genre=genre)
+            ranking = stats.order_by('-trending_score').values_list(
+                'movie_id', 'trending_score'
+            )[:top]
+            with transaction.atomic():
+                TrendingMovie.objects.filter(genre=genre).delete()
+                TrendingMovie.objects.bulk_create([
+                    TrendingMovie(
+                        genre=genre, rank=rank, movie_id=movie_id,
+                        score=score * factor
+                    )
+                    for rank, (movie_id, score) in enumerate(ranking, 1)
+                ])
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored {len(genres)} trending rankings.'
+        ))
+
+    def rebase(self, now):
+        """
+        Returns the landmark of the scores, moved to now first if it is too
+        old. Locking the landmark waits for the writes that read it (see
+        add_trending_activity), so every increment is rescaled or computed
+        from the new landmark.
+        """
+        with transaction.atomic():
+            landmark = TrendingLandmark.objects.select_for_update().first()
+            if landmark is None:
+                landmark = TrendingLandmark.objects.create(time=now)
+            elif now - landmark.time > REBASE_AFTER * HALF_LIFE:
+                MovieStats.objects.filter(trending_score__gt=0).update(
+                    trending_score=F('trending_score') * decay_factor(
+                        landmark.time, now
+                    )
+                )
+                landmark.time = now
+                landmark.save()
+                self.stdout.write('Moved the trending landmark.')
+            return landmark.time
@@ -0,0 +1,58 @@
+# Generated by Django 3.2.18 on 2026-10-18 07:14
+
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def backfill_movie_stats(apps, schema_editor):
+    Movie = apps.get_model('movies', 'Movie')
+    MovieStats = apps.get_model('movies', 'MovieStats')
+    List = apps.get_model('lists', 'List')
+    counted = {
+        'seen_count': apps.get_model('seen_movie', 'Seen'),
+        'watchlist_count': apps.get_model('watchlist', 'Watchlist'),
+        'list_count': List.movies.through,
+        'rating_count': apps.get_model('ratings', 'Rating'),
+        'report_count': apps.get_model('reports', 'Report'),
+    }
+    stats = {
+        movie_id: MovieStats(movie_id=movie_id)
+        for movie_id in Movie.objects.values_list('id', flat=True)
+    }
+    for field, model in counted.items():
+        counts = model.objects.values('movie').annotate(
+            total=Count('movie')
+        ).values_list('movie', 'total')
+        for movie_id, total in counts:
+            setattr(stats[movie_id], field, total)
+    MovieStats.objects.bulk_create(stats.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0001_initial'),
+        ('seen_movie', '0001_initial'),
+        ('watchlist', '0001_initial'),
+        ('lists', '0001_initial'),
+        ('ratings', '0002_rating_title'),
+        ('reports', '0004_alter_report_unique_together'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovieStats',
+            fields=[
+                ('movie', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='movies.movie')),
+                ('seen_count', models.IntegerField(db_index=True, default=0)),
+                ('watchlist_count', models.IntegerField(db_index=True, default=0)),
+                ('list_count', models.IntegerField(db_index=True, default=0)),
+                ('rating_count', models.IntegerField(db_index=True, default=0)),
+                ('report_count', models.IntegerField(db_index=True, default=0)),
+            ],
+        ),
+        migrations.RunPython(
+            backfill_movie_stats, migrations.RunPython.noop
+        ),
+    ]
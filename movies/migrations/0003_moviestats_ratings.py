@@ -0,0 +1,66 @@
+# Generated by Django 3.2.18 on 2026-10-18 07:16
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_rating_stats(apps, schema_editor):
+    MovieStats = apps.get_model('movies', 'MovieStats')
+    Rating = apps.get_model('ratings', 'Rating')
+    stats = MovieStats.objects.in_bulk()
+    ratings = Rating.objects.values('movie', 'value').annotate(
+        total=Count('movie')
+    ).values_list('movie', 'value', 'total')
+    for movie_id, value, total in ratings:
+        movie_stats = stats[movie_id]
+        setattr(movie_stats, f'rating_{value}_count', total)
+        movie_stats.rating_sum += value * total
+    MovieStats.objects.bulk_update(
+        stats.values(),
+        ['rating_sum'] + [f'rating_{value}_count' for value in range(1, 6)],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0002_moviestats'),
+        ('ratings', '0002_rating_title'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='moviestats',
+            name='rating_1_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='moviestats',
+            name='rating_2_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='moviestats',
+            name='rating_3_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='moviestats',
+            name='rating_4_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='moviestats',
+            name='rating_5_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='moviestats',
+            name='rating_sum',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(
+            backfill_rating_stats, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.18 on 2026-10-18 07:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0003_moviestats_ratings'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['-created_at', '-id'], name='movies_movi_created_0d7cdc_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 3.2.18 on 2026-10-18 07:40
+
+from django.db import migrations
+
+CREATE_SQL = {
+    'postgresql': [
+        'CREATE TABLE movies_movie_search ('
+        'movie_id bigint PRIMARY KEY REFERENCES movies_movie (id) '
+        'ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, '
+        'document tsvector NOT NULL)',
+        'CREATE INDEX movies_movie_search_document_idx '
+        'ON movies_movie_search USING gin (document)',
+        'INSERT INTO movies_movie_search (movie_id, document) '
+        "SELECT id, setweight(to_tsvector('simple', title), 'A') || "
+        "setweight(to_tsvector('simple', directors), 'B') || "
+        "setweight(to_tsvector('simple', main_cast), 'C') "
+        'FROM movies_movie',
+    ],
+    'sqlite': [
+        'CREATE VIRTUAL TABLE movies_movie_fts '
+        'USING fts5(title, directors, main_cast, '
+        "tokenize='unicode61 remove_diacritics 2')",
+        'INSERT INTO movies_movie_fts (rowid, title, directors, main_cast) '
+        'SELECT id, title, directors, main_cast FROM movies_movie',
+    ],
+}
+
+DROP_SQL = {
+    'postgresql': ['DROP TABLE movies_movie_search'],
+    'sqlite': ['DROP TABLE movies_movie_fts'],
+}
+
+
+def run_vendor_sql(statements):
+    def run(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0004_movie_created_at_id_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_vendor_sql(CREATE_SQL), run_vendor_sql(DROP_SQL)
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 3.2.18 on 2026-10-18 07:33
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_release_decade(apps, schema_editor):
+    Movie = apps.get_model('movies', 'Movie')
+    Movie.objects.update(
+        release_decade=F('release_year') - F('release_year') % 10
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0005_movie_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movie',
+            name='release_decade',
+            field=models.IntegerField(db_index=True, default=0, editable=False),
+            preserve_default=False,
+        ),
+        migrations.RunPython(
+            backfill_release_decade, migrations.RunPython.noop
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['movie_genre', 'release_decade'], name='movies_movi_movie_g_48dd46_idx'),
+        ),
+    ]
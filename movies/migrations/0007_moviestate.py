@@ -0,0 +1,77 @@
+# Generated by Django 3.2.18 on 2026-10-18 07:42
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def copy_movie_states(apps, schema_editor):
+    """
+    Copies the seen and watchlist rows to the movie states. A movie in both
+    (which the old tables allowed under concurrent requests) is kept as
+    seen. The seen and watchlist counters are recomputed from the result.
+    """
+    Seen = apps.get_model('seen_movie', 'Seen')
+    Watchlist = apps.get_model('watchlist', 'Watchlist')
+    MovieState = apps.get_model('movies', 'MovieState')
+    MovieStats = apps.get_model('movies', 'MovieStats')
+
+    states = {}
+    for state, model in (('watchlist', Watchlist), ('seen', Seen)):
+        rows = model.objects.values_list('owner_id', 'movie_id', 'created_at')
+        for owner_id, movie_id, created_at in rows.iterator():
+            states[(owner_id, movie_id)] = MovieState(
+                owner_id=owner_id, movie_id=movie_id, state=state,
+                created_at=created_at
+            )
+    MovieState.objects.bulk_create(states.values(), batch_size=1000)
+
+    MovieStats.objects.update(seen_count=0, watchlist_count=0)
+    counts = MovieState.objects.values('movie', 'state').annotate(
+        total=Count('id')
+    ).values_list('movie', 'state', 'total')
+    for movie_id, state, total in counts:
+        MovieStats.objects.filter(movie_id=movie_id).update(
+            **{f'{state}_count': total}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('movies', '0006_movie_release_decade'),
+        ('seen_movie', '0002_seen_seen_movie__created_74211a_idx'),
+        ('watchlist', '0002_watchlist_watchlist_w_created_ff231f_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovieState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('state', models.CharField(choices=[('watchlist', 'Watchlist'), ('seen', 'Seen')], max_length=10)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('movie', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='states', to='movies.movie')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movie_states', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='moviestate',
+            index=models.Index(fields=['-created_at', '-id'], name='movies_movi_created_edfb57_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='moviestate',
+            index=models.Index(fields=['state', '-created_at', '-id'], name='movies_movi_state_4a4469_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='moviestate',
+            unique_together={('owner', 'movie')},
+        ),
+        migrations.RunPython(copy_movie_states, migrations.RunPython.noop),
+    ]
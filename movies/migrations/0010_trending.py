@@ -0,0 +1,47 @@
+# Generated by Django 3.2.18 on 2026-10-18 08:02
+
+import time
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_landmark(apps, schema_editor):
+    TrendingLandmark = apps.get_model('movies', 'TrendingLandmark')
+    TrendingLandmark.objects.create(time=time.time())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0009_similarmovie'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingLandmark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('time', models.FloatField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='moviestats',
+            name='trending_score',
+            field=models.FloatField(db_index=True, default=0),
+        ),
+        migrations.CreateModel(
+            name='TrendingMovie',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('genre', models.CharField(blank=True, choices=[('action', 'Action'), ('adventure', 'Adventure'), ('comedy', 'Comedy'), ('drama', 'Drama'), ('fantasy', 'Fantasy'), ('horror', 'Horror'), ('mystery', 'Mystery'), ('romance', 'Romance'), ('science_fiction', 'Science Fiction'), ('thriller', 'Thriller'), ('crime', 'Crime'), ('documentary', 'Documentary'), ('historical', 'Historical'), ('musical', 'Musical')], max_length=20)),
+                ('rank', models.IntegerField()),
+                ('score', models.FloatField()),
+                ('movie', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='movies.movie')),
+            ],
+            options={
+                'ordering': ['genre', 'rank'],
+                'unique_together': {('genre', 'rank')},
+            },
+        ),
+        migrations.RunPython(create_landmark, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 3.2.18 on 2026-10-18 08:06
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Copies of movies.leaderboards at the time of this migration
+MIN_VOTES = getattr(settings, 'LEADERBOARD_MIN_VOTES', 10)
+DEFAULT_MEAN = 3.0
+
+
+def bayesian_average(rating_sum, rating_count, mean):
+    return (MIN_VOTES * mean + rating_sum) / (MIN_VOTES + rating_count)
+
+
+def build_leaderboards(apps, schema_editor):
+    MovieStats = apps.get_model('movies', 'MovieStats')
+    LeaderboardEntry = apps.get_model('movies', 'LeaderboardEntry')
+    LeaderboardPrior = apps.get_model('movies', 'LeaderboardPrior')
+    rated = MovieStats.objects.filter(rating_count__gt=0)
+    totals = rated.aggregate(
+        rating_sum=models.Sum('rating_sum'),
+        rating_count=models.Sum('rating_count')
+    )
+    mean = DEFAULT_MEAN
+    if totals['rating_count']:
+        mean = totals['rating_sum'] / totals['rating_count']
+    LeaderboardPrior.objects.create(mean=mean)
+    LeaderboardEntry.objects.bulk_create([
+        LeaderboardEntry(
+            movie_id=stats.movie_id, movie_genre=stats.movie.movie_genre,
+            release_decade=stats.movie.release_decade,
+            score=bayesian_average(stats.rating_sum, stats.rating_count, mean)
+        )
+        for stats in rated.select_related('movie')
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0010_trending'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('movie', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='leaderboard_entry', serialize=False, to='movies.movie')),
+                ('movie_genre', models.CharField(choices=[('action', 'Action'), ('adventure', 'Adventure'), ('comedy', 'Comedy'), ('drama', 'Drama'), ('fantasy', 'Fantasy'), ('horror', 'Horror'), ('mystery', 'Mystery'), ('romance', 'Romance'), ('science_fiction', 'Science Fiction'), ('thriller', 'Thriller'), ('crime', 'Crime'), ('documentary', 'Documentary'), ('historical', 'Historical'), ('musical', 'Musical')], max_length=20)),
+                ('release_decade', models.IntegerField()),
+                ('score', models.FloatField()),
+            ],
+            options={
+                'ordering': ['-score'],
+            },
+        ),
+        migrations.CreateModel(
+            name='LeaderboardPrior',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mean', models.FloatField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardentry',
+            index=models.Index(fields=['-score'], name='movies_lead_score_cf5293_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardentry',
+            index=models.Index(fields=['movie_genre', '-score'], name='movies_lead_movie_g_abbbcd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardentry',
+            index=models.Index(fields=['release_decade', '-score'], name='movies_lead_release_9c3c3f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardentry',
+            index=models.Index(fields=['movie_genre', 'release_decade', '-score'], name='movies_lead_movie_g_43367b_idx'),
+        ),
+        migrations.RunPython(build_leaderboards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.18 on 2026-10-18 08:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0011_leaderboards'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='moviestate',
+            index=models.Index(fields=['owner', 'state', '-created_at'], name='movies_movi_owner_i_332c03_idx'),
+        ),
+    ]
@@ -0,0 +1,109 @@
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Count
+
+# Copies of movies.leaderboards at the time of this migration
+MIN_VOTES = getattr(settings, 'LEADERBOARD_MIN_VOTES', 10)
+DEFAULT_MEAN = 3.0
+
+
+def recount_movie_stats(apps, schema_editor):
+    """
+    Recomputes the counters of the movie stats, and the leaderboards built
+    from them. The backfills of 0002, 0003 and 0007 grouped their counts by
+    the default ordering of the counted models as well (created_at), which
+    kept the count of a single timestamp per movie.
+    The trending scores aren't counters and are kept.
+    """
+    Movie = apps.get_model('movies', 'Movie')
+    MovieStats = apps.get_model('movies', 'MovieStats')
+    MovieState = apps.get_model('movies', 'MovieState')
+    List = apps.get_model('lists', 'List')
+    Rating = apps.get_model('ratings', 'Rating')
+    Report = apps.get_model('reports', 'Report')
+    LeaderboardEntry = apps.get_model('movies', 'LeaderboardEntry')
+    LeaderboardPrior = apps.get_model('movies', 'LeaderboardPrior')
+
+    counters = [
+        'seen_count', 'watchlist_count', 'list_count', 'rating_count',
+        'report_count', 'rating_sum', 'rating_1_count', 'rating_2_count',
+        'rating_3_count', 'rating_4_count', 'rating_5_count',
+    ]
+    existing = {stats.movie_id: stats for stats in MovieStats.objects.all()}
+    stats = {}
+    for movie_id in Movie.objects.values_list('id', flat=True):
+        stats[movie_id] = existing.get(movie_id) or MovieStats(
+            movie_id=movie_id
+        )
+        for field in counters:
+            setattr(stats[movie_id], field, 0)
+
+    states = MovieState.objects.order_by().values('movie', 'state').annotate(
+        total=Count('id')
+    ).values_list('movie', 'state', 'total')
+    for movie_id, state, total in states:
+        setattr(stats[movie_id], f'{state}_count', total)
+    counted = {
+        'list_count': List.movies.through,
+        'report_count': Report,
+    }
+    for field, model in counted.items():
+        counts = model.objects.order_by().values('movie').annotate(
+            total=Count('movie')
+        ).values_list('movie', 'total')
+        for movie_id, total in counts:
+            setattr(stats[movie_id], field, total)
+    ratings = Rating.objects.order_by().values('movie', 'value').annotate(
+        total=Count('movie')
+    ).values_list('movie', 'value', 'total')
+    for movie_id, value, total in ratings:
+        movie_stats = stats[movie_id]
+        setattr(movie_stats, f'rating_{value}_count', total)
+        movie_stats.rating_count += total
+        movie_stats.rating_sum += value * total
+
+    MovieStats.objects.bulk_update(
+        [row for row in stats.values() if row.movie_id in existing], counters,
+        batch_size=1000
+    )
+    MovieStats.objects.bulk_create(
+        [row for row in stats.values() if row.movie_id not in existing],
+        batch_size=1000
+    )
+
+    rated = [row for row in stats.values() if row.rating_count]
+    rating_count = sum(row.rating_count for row in rated)
+    mean = DEFAULT_MEAN
+    if rating_count:
+        mean = sum(row.rating_sum for row in rated) / rating_count
+    LeaderboardPrior.objects.all().delete()
+    LeaderboardPrior.objects.create(mean=mean)
+    movies = Movie.objects.only('movie_genre', 'release_decade').in_bulk()
+    LeaderboardEntry.objects.all().delete()
+    LeaderboardEntry.objects.bulk_create([
+        LeaderboardEntry(
+            movie_id=row.movie_id,
+            movie_genre=movies[row.movie_id].movie_genre,
+            release_decade=movies[row.movie_id].release_decade,
+            score=(MIN_VOTES * mean + row.rating_sum) / (
+                MIN_VOTES + row.rating_count
+            )
+        )
+        for row in rated
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0012_moviestate_owner_state_index'),
+        ('lists', '0002_list_lists_list_created_3f9545_idx'),
+        ('ratings', '0003_rating_ratings_rat_created_68aebc_idx'),
+        ('reports', '0004_alter_report_unique_together'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            recount_movie_stats, migrations.RunPython.noop
+        ),
+    ]
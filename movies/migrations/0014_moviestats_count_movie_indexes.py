@@ -0,0 +1,58 @@
+# Generated by Django 3.2.18 on 2026-10-18 08:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0013_recount_movie_stats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='moviestats',
+            name='list_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='moviestats',
+            name='rating_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='moviestats',
+            name='report_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='moviestats',
+            name='seen_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='moviestats',
+            name='watchlist_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='moviestats',
+            index=models.Index(fields=['seen_count', 'movie'], name='movies_movi_seen_co_9783c9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='moviestats',
+            index=models.Index(fields=['watchlist_count', 'movie'], name='movies_movi_watchli_e6e25b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='moviestats',
+            index=models.Index(fields=['list_count', 'movie'], name='movies_movi_list_co_cd6a6c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='moviestats',
+            index=models.Index(fields=['rating_count', 'movie'], name='movies_movi_rating__4864d0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='moviestats',
+            index=models.Index(fields=['report_count', 'movie'], name='movies_movi_report__c7787a_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.18 on 2026-10-18 09:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0015_movie_import_key'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='movie',
+            name='movies_movi_movie_g_48dd46_idx',
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['movie_genre', 'release_decade'], name='movie_genre_decade_idx'),
+        ),
+    ]
@@ -1,15 +1,29 @@
-from django.db import models
+from django.db import connection, models, transaction, IntegrityError
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db.models import Avg
+from django.db.models import F, FloatField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from utils.choices import GENRES_CHOICES
+from profiles.models import update_profile_stats
+from utils.images import schedule_thumbnail, update_image_urls
+from utils.signals import in_bulk_write
+from . import leaderboards, search, trending
+from .autocomplete import POPULARITY_FIELDS, title_index
 from datetime import date
+import time
+
+# Size the poster thumbnails of the list payloads fit in
+POSTER_THUMBNAIL_SIZE = (240, 360)
 
 
 class Movie(models.Model):
     """
     Movie model, related to 'owner', i.e. a User instance.
     Default image set so that we can always reference image.url.
+    The poster URL is stored when the poster is uploaded, and the URL of
+    its thumbnail once it is generated.
     """
     owner = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -21,6 +35,10 @@ class Movie(models.Model):
     poster = models.ImageField(
         upload_to='images/', default='../blank_movie_rlo48q', blank=True
     )
+    poster_url = models.CharField(max_length=500, blank=True, editable=False)
+    poster_thumbnail_url = models.CharField(
+        max_length=500, blank=True, editable=False
+    )
     release_year = models.IntegerField(
         validators=[
             MinValueValidator(1888), MaxValueValidator(date.today().year)
@@ -30,18 +48,541 @@ class Movie(models.Model):
         max_length=20,
         choices=GENRES_CHOICES,
     )
+    # Stored so decade (and genre + decade) browsing can use an index
+    release_decade = models.IntegerField(editable=False, db_index=True)
+    # Source file and row of the movies added by import_movies, so a
+    # batch is never imported twice
+    import_key = models.CharField(
+        max_length=255, null=True, blank=True, unique=True, editable=False
+    )
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(
+                fields=['movie_genre', 'release_decade'],
+                name='movie_genre_decade_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return self.title
+
+    @property
+    def poster_thumbnail(self):
+        return self.poster_thumbnail_url or self.poster_url or (
+            self.poster.url if self.poster else None
+        )
+
+    def save(self, *args, **kwargs):
+        """
+        Sets the release decade from the release year and stores the poster
+        URLs when a poster is uploaded.
+        """
+        self.release_decade = self.release_year - self.release_year % 10
+        update_fields = kwargs.get('update_fields')
+        changed = []
+        if update_fields is None or 'poster' in update_fields:
+            changed, self._create_thumbnail = update_image_urls(
+                self, 'poster', 'poster_url', 'poster_thumbnail_url'
+            )
+        if update_fields is not None:
+            if 'release_year' in update_fields:
+                changed.append('release_decade')
+            kwargs['update_fields'] = {*update_fields, *changed}
+        super().save(*args, **kwargs)
+
 
+class MovieStats(models.Model):
+    """
+    Denormalized counters of a movie, one row per movie.
+    Kept up to date by the seen, watchlist, lists, ratings and reports apps
+    so the movie views can read and sort by them without aggregating the
+    related tables. Can be rebuilt with the reconcile_movie_stats command.
+    Stores the sum of the rating values and how many ratings of each value
+    the movie has, so the average rating is simple arithmetic.
+    trending_score is the movie activity with forward decay (see
+    movies.trending), incremented by the same apps.
+    """
+    movie = models.OneToOneField(
+        Movie, on_delete=models.CASCADE, related_name='stats',
+        primary_key=True
+    )
+    seen_count = models.IntegerField(default=0)
+    watchlist_count = models.IntegerField(default=0)
+    list_count = models.IntegerField(default=0)
+    rating_count = models.IntegerField(default=0)
+    report_count = models.IntegerField(default=0)
+    rating_sum = models.IntegerField(default=0)
+    rating_1_count = models.IntegerField(default=0)
+    rating_2_count = models.IntegerField(default=0)
+    rating_3_count = models.IntegerField(default=0)
+    rating_4_count = models.IntegerField(default=0)
+    rating_5_count = models.IntegerField(default=0)
+    trending_score = models.FloatField(default=0, db_index=True)
+
+    class Meta:
+        # (count, movie), so the count orderings of the movie list and their
+        # cursor pages are read in index order
+        indexes = [
+            models.Index(fields=['seen_count', 'movie']),
+            models.Index(fields=['watchlist_count', 'movie']),
+            models.Index(fields=['list_count', 'movie']),
+            models.Index(fields=['rating_count', 'movie']),
+            models.Index(fields=['report_count', 'movie']),
+        ]
+
+    @property
     def avg_rating(self):
-        # Import here to avoid circular import
-        from ratings.models import Rating
-        ratings = Rating.objects.filter(movie=self)
-        if ratings.exists():
-            return "{:.2f}".format(
-                round(ratings.aggregate(Avg('value'))['value__avg'], 2))
+        if self.rating_count:
+            return self.rating_sum / self.rating_count
         return None
 
+    @property
+    def rating_histogram(self):
+        return {
+            value: getattr(self, f'rating_{value}_count')
+            for value in range(1, 6)
+        }
+
     def __str__(self):
-        return self.title
+        return f'{self.movie} stats'
+
+
+class TrendingLandmark(models.Model):
+    """
+    The time (seconds since the epoch) the trending scores are relative to,
+    a single row moved forward by the update_trending_movies command.
+    """
+    time = models.FloatField()
+
+    def __str__(self):
+        return f'Trending landmark {self.time}'
+
+
+class TrendingMovie(models.Model):
+    """
+    A movie of the trending ranking of a genre (blank for all genres),
+    stored by the update_trending_movies command with its decayed activity
+    at the time.
+    """
+    genre = models.CharField(
+        max_length=20, choices=GENRES_CHOICES, blank=True
+    )
+    rank = models.IntegerField()
+    movie = models.ForeignKey(
+        Movie, on_delete=models.CASCADE, related_name='+'
+    )
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ['genre', 'rank']
+        unique_together = ['genre', 'rank']
+
+    def __str__(self):
+        return f'{self.movie} is trending #{self.rank}'
+
+
+class LeaderboardPrior(models.Model):
+    """
+    The mean of all the ratings, which the Bayesian averages of the
+    leaderboards are pulled towards, a single row updated by the
+    update_leaderboards command.
+    """
+    mean = models.FloatField()
+
+    def __str__(self):
+        return f'Leaderboard prior {self.mean}'
+
+
+class LeaderboardEntry(models.Model):
+    """
+    A rated movie in the top rated leaderboards with its Bayesian average
+    rating. The genre and release decade of the movie are copied so every
+    leaderboard (all movies, genre, decade and both) reads its own index.
+    """
+    movie = models.OneToOneField(
+        Movie, on_delete=models.CASCADE, related_name='leaderboard_entry',
+        primary_key=True
+    )
+    movie_genre = models.CharField(max_length=20, choices=GENRES_CHOICES)
+    release_decade = models.IntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ['-score']
+        indexes = [
+            models.Index(fields=['-score']),
+            models.Index(fields=['movie_genre', '-score']),
+            models.Index(fields=['release_decade', '-score']),
+            models.Index(fields=['movie_genre', 'release_decade', '-score']),
+        ]
+
+    def __str__(self):
+        return f'{self.movie} scores {self.score}'
+
+
+class SimilarMovie(models.Model):
+    """
+    A neighbour of a movie, with the similarity of both computed by the
+    build_similar_movies command from the users that rated, saw or listed
+    them.
+    """
+    movie = models.ForeignKey(
+        Movie, on_delete=models.CASCADE, related_name='similar_movies'
+    )
+    similar = models.ForeignKey(
+        Movie, on_delete=models.CASCADE, related_name='+'
+    )
+    score = models.FloatField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-score']
+        indexes = [models.Index(fields=['movie', '-score'])]
+        unique_together = ['movie', 'similar']
+
+    def __str__(self):
+        return f'{self.similar} is similar to {self.movie}'
+
+
+class SimilarityRun(models.Model):
+    """
+    A run of the build_similar_movies command. Incremental runs refresh the
+    movies with interactions since the start of the last run.
+    """
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField(auto_now_add=True)
+    incremental = models.BooleanField(default=False)
+    movie_count = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['-started_at']
+
+    def __str__(self):
+        return f'Similarity run of {self.started_at}'
+
+
+def update_movie_stats(movie_ids, **deltas):
+    """
+    Adds the given deltas to the counters of the movies in a single UPDATE,
+    e.g. update_movie_stats([movie.id], seen_count=1).
+    The popularity of the movies in the title index follows once committed.
+    """
+    popularity = sum(deltas.get(field, 0) for field in POPULARITY_FIELDS)
+    if popularity:
+        movie_ids = list(movie_ids)
+    MovieStats.objects.filter(movie_id__in=movie_ids).update(**{
+        field: F(field) + delta for field, delta in deltas.items()
+    })
+    if popularity:
+        transaction.on_commit(
+            lambda: title_index.add_popularity(movie_ids, popularity)
+        )
+
+
+def add_trending_activity(movie_ids, event, count=1):
+    """
+    Adds count events of the given kind at the current time to the
+    trending scores of the movies in a single UPDATE. The landmark is read
+    under a lock held until the transaction ends rather than cached by the
+    process, so the update_trending_movies command can't move it (and
+    rescale the scores) before the increment computed from it commits.
+    """
+    with transaction.atomic():
+        now = time.time()
+        landmark = lock_trending_landmark()
+        if landmark is None:
+            landmark = now
+        increment = trending.WEIGHTS[event] * count / trending.decay_factor(
+            landmark, now
+        )
+        MovieStats.objects.filter(movie_id__in=movie_ids).update(
+            trending_score=F('trending_score') + increment
+        )
+
+
+def lock_trending_landmark():
+    """
+    Returns the time of the trending landmark (None before the first
+    update_trending_movies run), with a shared lock on Postgres so the
+    writers don't wait for each other, only the landmark move does.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT time FROM {TrendingLandmark._meta.db_table} '
+                'LIMIT 1 FOR SHARE'
+            )
+            row = cursor.fetchone()
+        return row[0] if row else None
+    # Ignored by SQLite, whose writes are serialized by the database lock
+    return TrendingLandmark.objects.select_for_update().values_list(
+        'time', flat=True
+    ).first()
+
+
+def update_leaderboards(movie_ids, add_missing=True):
+    """
+    Brings the leaderboard entries of the movies up to date with their
+    rating stats: movies without ratings leave the leaderboards, rated
+    movies without an entry get one (unless add_missing is False, as
+    removing ratings can't add a movie) and the scores are computed by the
+    UPDATE from the current stats.
+    """
+    movie_ids = list(movie_ids)
+    rated = MovieStats.objects.filter(
+        movie_id__in=movie_ids, rating_count__gt=0
+    ).values('movie_id')
+    LeaderboardEntry.objects.filter(movie_id__in=movie_ids).exclude(
+        movie_id__in=rated
+    ).delete()
+    if add_missing:
+        LeaderboardEntry.objects.bulk_create([
+            LeaderboardEntry(
+                movie_id=movie_id, movie_genre=movie_genre,
+                release_decade=release_decade, score=0
+            )
+            for movie_id, movie_genre, release_decade in Movie.objects.filter(
+                id__in=rated, leaderboard_entry__isnull=True
+            ).values_list('id', 'movie_genre', 'release_decade')
+        ], ignore_conflicts=True)
+    stats = MovieStats.objects.filter(movie_id=OuterRef('movie_id'))
+    mean = Coalesce(
+        Subquery(
+            LeaderboardPrior.objects.values('mean')[:1],
+            output_field=FloatField()
+        ),
+        Value(leaderboards.DEFAULT_MEAN)
+    )
+    min_votes = Value(float(leaderboards.MIN_VOTES))
+    LeaderboardEntry.objects.filter(movie_id__in=movie_ids).update(score=(
+        min_votes * mean + Subquery(
+            stats.values('rating_sum'), output_field=FloatField()
+        )
+    ) / (
+        min_votes + Subquery(
+            stats.values('rating_count'), output_field=FloatField()
+        )
+    ))
+
+
+def rating_stats_deltas(value, sign=1):
+    """
+    Deltas that add (sign=1) or remove (sign=-1) a rating of the given value
+    from the movie stats.
+    """
+    return {
+        'rating_count': sign,
+        'rating_sum': sign * value,
+        f'rating_{value}_count': sign,
+    }
+
+
+def create_movie_stats(sender, instance, created, **kwargs):
+    if created:
+        MovieStats.objects.create(movie=instance)
+        update_profile_stats([instance.owner_id], movie_count=1)
+
+
+def remove_movie_count(sender, instance, **kwargs):
+    update_profile_stats([instance.owner_id], movie_count=-1)
+
+
+post_save.connect(create_movie_stats, sender=Movie)
+post_delete.connect(remove_movie_count, sender=Movie)
+
+
+def index_movie_search(sender, instance, created, using, update_fields,
+                       **kwargs):
+    if created or update_fields is None or set(update_fields) & {
+        'title', 'directors', 'main_cast'
+    }:
+        search.index_movie(instance, using=using)
+
+
+def remove_movie_search(sender, instance, using, **kwargs):
+    search.remove_movie(instance.pk, using=using)
+
+
+post_save.connect(index_movie_search, sender=Movie)
+post_delete.connect(remove_movie_search, sender=Movie)
+
+
+def update_title_index(sender, instance, **kwargs):
+    transaction.on_commit(lambda: title_index.add(instance))
+
+
+def remove_from_title_index(sender, instance, **kwargs):
+    movie_id = instance.pk
+    transaction.on_commit(lambda: title_index.remove(movie_id))
+
+
+post_save.connect(update_title_index, sender=Movie)
+
+
+def create_poster_thumbnail(sender, instance, **kwargs):
+    if instance.__dict__.pop('_create_thumbnail', False):
+        schedule_thumbnail(
+            instance, 'poster', 'poster_thumbnail_url', POSTER_THUMBNAIL_SIZE
+        )
+
+
+post_save.connect(create_poster_thumbnail, sender=Movie)
+
+
+def update_leaderboard_movie(sender, instance, created, update_fields,
+                             **kwargs):
+    if not created and (update_fields is None or set(update_fields) & {
+        'movie_genre', 'release_year'
+    }):
+        LeaderboardEntry.objects.filter(movie=instance).update(
+            movie_genre=instance.movie_genre,
+            release_decade=instance.release_decade
+        )
+
+
+post_save.connect(update_leaderboard_movie, sender=Movie)
+post_delete.connect(remove_from_title_index, sender=Movie)
+
+
+class MovieStateManager(models.Manager):
+    """
+    Manager of the MovieState proxies, limited to the rows in their state.
+    """
+    def __init__(self, state):
+        super().__init__()
+        self.state = state
+
+    def get_queryset(self):
+        return super().get_queryset().filter(state=self.state)
+
+
+class MovieState(models.Model):
+    """
+    MovieState model, the state of a movie for a user, related to 'owner',
+    i.e. a User instance and Movie model.
+    A movie is either in the user's watchlist or seen by them (without a
+    row it is neither), so both can't happen at once. created_at is when
+    the movie entered the current state.
+    Seen and Watchlist are proxies of it, limited to their state.
+    """
+    WATCHLIST = 'watchlist'
+    SEEN = 'seen'
+    STATE_CHOICES = [
+        (WATCHLIST, 'Watchlist'),
+        (SEEN, 'Seen'),
+    ]
+    owner = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='movie_states'
+    )
+    movie = models.ForeignKey(
+        Movie, on_delete=models.CASCADE, related_name='states'
+    )
+    state = models.CharField(max_length=10, choices=STATE_CHOICES)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    # State of the instances of the proxies
+    proxy_state = None
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['state', '-created_at', '-id']),
+            # Movies of a user in a state, newest first, and their stats
+            models.Index(fields=['owner', 'state', '-created_at']),
+        ]
+        unique_together = ['owner', 'movie']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.proxy_state and not self.state:
+            self.state = self.proxy_state
+
+    def __str__(self):
+        return f'{self.movie} is in {self.owner} {self.state}'
+
+
+def set_movie_state(user, movie, state):
+    """
+    Moves the movie to the given state for the user (None removes it) in a
+    transaction, locking the user's row for the movie.
+    Setting the current state again changes nothing.
+    Returns the MovieState (None when removed) and whether it changed.
+    """
+    with transaction.atomic():
+        current = MovieState.objects.select_for_update().filter(
+            owner=user, movie=movie
+        ).first()
+        if current is None and state is not None:
+            try:
+                with transaction.atomic():
+                    return MovieState.objects.create(
+                        owner=user, movie=movie, state=state
+                    ), True
+            except IntegrityError:
+                # Created by a concurrent request
+                current = MovieState.objects.select_for_update().get(
+                    owner=user, movie=movie
+                )
+        if current is None:
+            return None, False
+        if state is None:
+            current.delete()
+            return None, True
+        if current.state == state:
+            return current, False
+        current.state = state
+        current.created_at = timezone.now()
+        current.save()
+        return current, True
+
+
+def store_previous_state(sender, instance, **kwargs):
+    """
+    Remembers the movie and state the row had before the update so the
+    movie stats can be moved accordingly.
+    """
+    instance._previous_state = None
+    if instance.pk is not None:
+        instance._previous_state = MovieState.objects.filter(
+            pk=instance.pk
+        ).values_list('movie_id', 'state').first()
+
+
+def add_state_to_stats(sender, instance, **kwargs):
+    previous = instance.__dict__.pop('_previous_state', None)
+    if previous == (instance.movie_id, instance.state):
+        return
+    deltas = {f'{instance.state}_count': 1}
+    if previous is not None:
+        previous_movie_id, previous_state = previous
+        if previous_movie_id == instance.movie_id:
+            deltas[f'{previous_state}_count'] = -1
+        else:
+            update_movie_stats(
+                [previous_movie_id], **{f'{previous_state}_count': -1}
+            )
+    update_movie_stats([instance.movie_id], **deltas)
+    add_trending_activity([instance.movie_id], instance.state)
+    if previous is None or previous[1] != instance.state:
+        profile_deltas = {f'{instance.state}_count': 1}
+        if previous is not None:
+            profile_deltas[f'{previous[1]}_count'] = -1
+        update_profile_stats([instance.owner_id], **profile_deltas)
+
+
+def remove_state_from_stats(sender, instance, **kwargs):
+    if in_bulk_write(sender):
+        return
+    update_movie_stats([instance.movie_id], **{f'{instance.state}_count': -1})
+    update_profile_stats(
+        [instance.owner_id], **{f'{instance.state}_count': -1}
+    )
+
+
+pre_save.connect(store_previous_state, sender=MovieState)
+post_save.connect(add_state_to_stats, sender=MovieState)
+post_delete.connect(remove_state_from_stats, sender=MovieState)
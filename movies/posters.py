@@ -0,0 +1,20 @@
+"""
+Rules of the movie posters, shared by the movie serializer and the
+import_movies command.
+"""
+from utils.images import get_image_error
+
+
+def get_poster_error(size, width, height):
+    """
+    Returns why a poster of the given size and dimensions is not valid, or
+    None if it is.
+    """
+    error = get_image_error(size, width, height)
+    if error:
+        return error
+    # make sure the image has a 2:3 ratio
+    # (width aproximately 70% of height)
+    if width < height * .60 or width > height * .80:
+        return 'Poster images have an aproximate ratio of 2:3!'
+    return None
@@ -0,0 +1,142 @@
+"""
+Full-text search of movies over the title, directors and main cast.
+Postgres keeps a tsvector per movie in movies_movie_search (GIN index) and
+SQLite an FTS5 table, movies_movie_fts. Both are created by the movies
+0005 migration and kept up to date by the Movie signals. Other databases
+fall back to case insensitive substring matches.
+"""
+import re
+from django.db import connections
+from django.db.models import Case, FloatField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+# Max amount of words of a search, the rest are ignored
+MAX_TERMS = 10
+
+# Rank of a term matched by each field, for the substring fallback
+FIELD_WEIGHTS = {'title': 10.0, 'directors': 4.0, 'main_cast': 2.0}
+
+POSTGRES_DOCUMENT = (
+    "setweight(to_tsvector('simple', %s), 'A') || "
+    "setweight(to_tsvector('simple', %s), 'B') || "
+    "setweight(to_tsvector('simple', %s), 'C')"
+)
+
+
+def get_terms(text):
+    return re.findall(r'\w+', text.lower())[:MAX_TERMS]
+
+
+def index_movie(movie, using='default'):
+    """
+    Adds or replaces the search document of a movie.
+    """
+    vendor = connections[using].vendor
+    values = [movie.title, movie.directors, movie.main_cast]
+    with connections[using].cursor() as cursor:
+        if vendor == 'postgresql':
+            cursor.execute(
+                'INSERT INTO movies_movie_search (movie_id, document) '
+                f'VALUES (%s, {POSTGRES_DOCUMENT}) '
+                'ON CONFLICT (movie_id) DO UPDATE '
+                'SET document = EXCLUDED.document',
+                [movie.id] + values
+            )
+        elif vendor == 'sqlite':
+            cursor.execute(
+                'DELETE FROM movies_movie_fts WHERE rowid = %s', [movie.id]
+            )
+            cursor.execute(
+                'INSERT INTO movies_movie_fts '
+                '(rowid, title, directors, main_cast) '
+                'VALUES (%s, %s, %s, %s)',
+                [movie.id] + values
+            )
+
+
+def remove_movie(movie_id, using='default'):
+    """
+    Removes the search document of a deleted movie (Postgres removes it
+    with the foreign key cascade).
+    """
+    if connections[using].vendor == 'sqlite':
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                'DELETE FROM movies_movie_fts WHERE rowid = %s', [movie_id]
+            )
+
+
+def search_movies(queryset, text):
+    """
+    Filters the movie queryset to the movies matching every word of the text
+    (as a prefix), annotated with search_rank and ordered by it, best first.
+    Title matches weigh more than director matches, and those more than
+    main cast matches. A text without words leaves the queryset unfiltered.
+    """
+    terms = get_terms(text)
+    if not terms:
+        return queryset
+
+    connection = connections[queryset.db]
+    vendor = connection.vendor
+    meta = queryset.model._meta
+    movie_id = (
+        f'{connection.ops.quote_name(meta.db_table)}.'
+        f'{connection.ops.quote_name(meta.pk.column)}'
+    )
+    if vendor == 'postgresql':
+        query = ' & '.join(f'{term}:*' for term in terms)
+        matches = RawSQL(
+            'SELECT movie_id FROM movies_movie_search '
+            "WHERE document @@ to_tsquery('simple', %s)",
+            (query,)
+        )
+        rank = RawSQL(
+            "SELECT ts_rank(document, to_tsquery('simple', %s)) "
+            'FROM movies_movie_search '
+            f'WHERE movie_id = {movie_id}',
+            (query,), output_field=FloatField()
+        )
+    elif vendor == 'sqlite':
+        query = ' '.join(f'"{term}"*' for term in terms)
+        matches = RawSQL(
+            'SELECT rowid FROM movies_movie_fts '
+            'WHERE movies_movie_fts MATCH %s',
+            (query,)
+        )
+        # bm25 is lower for better matches
+        rank = RawSQL(
+            'SELECT -bm25(movies_movie_fts, 10.0, 4.0, 2.0) '
+            'FROM movies_movie_fts '
+            f'WHERE movies_movie_fts MATCH %s AND rowid = {movie_id}',
+            (query,), output_field=FloatField()
+        )
+    else:
+        return search_substrings(queryset, terms)
+
+    return queryset.filter(id__in=matches).annotate(
+        search_rank=rank
+    ).order_by('-search_rank', '-created_at')
+
+
+def search_substrings(queryset, terms):
+    """
+    search_movies without a full-text index: every term is matched
+    anywhere in the fields and ranked by the best field it matches.
+    """
+    rank = Value(0.0, output_field=FloatField())
+    for term in terms:
+        matches = Q()
+        for field in FIELD_WEIGHTS:
+            matches |= Q(**{f'{field}__icontains': term})
+        queryset = queryset.filter(matches)
+        rank = rank + Case(
+            *(
+                When(**{f'{field}__icontains': term}, then=Value(weight))
+                for field, weight in FIELD_WEIGHTS.items()
+            ),
+            default=Value(0.0), output_field=FloatField()
+        )
+    return queryset.annotate(search_rank=rank).order_by(
+        '-search_rank', '-created_at'
+    )
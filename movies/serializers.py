@@ -1,29 +1,47 @@
 from rest_framework import serializers
-from .models import Movie
-from seen_movie.models import Seen
-from watchlist.models import Watchlist
+from .models import (
+    LeaderboardEntry, Movie, MovieState, SimilarMovie, TrendingMovie,
+)
+from .posters import get_poster_error
+from utils.images import StoredImageField
 from ratings.models import Rating
 from reports.models import Report
+from flixmix_rest_api.viewer_state import ViewerStateSerializerMixin
 
 
-class MovieSerializer(serializers.ModelSerializer):
+class MovieSerializer(
+    ViewerStateSerializerMixin, serializers.ModelSerializer
+):
     """
     Serializer for the movie.
     Provides owners information (id, image and username).
-    Provides owners information (id, image and username).
-    Gets the average rating provided by the model.
+    Gets the average rating provided by the views and the rating histogram
+    from the movie stats.
     Gets the release decade, seen count, watchlist count, list count,
     rating count and report count provided by the views.
-    Gets the seen id, watchlist id, rating id, report id if they exist.
-    Validates the image to make sure the size and proportions are correct.
+    Gets the seen id, watchlist id (both from the user's movie state),
+    rating id, report id if they exist, resolved for the whole page by the
+    views.
+    Validates the image to make sure the size and proportions are correct,
+    reading its header only.
+    The poster is the stored URL of the full size image on the detail and
+    of the thumbnail on the lists.
     """
     owner = serializers.ReadOnlyField(source='owner.username')
     is_owner = serializers.SerializerMethodField()
     profile_id = serializers.ReadOnlyField(source='owner.profile.id')
-    profile_image = serializers.ReadOnlyField(source='owner.profile.image.url')
+    profile_image = serializers.ReadOnlyField(
+        source='owner.profile.image_thumbnail'
+    )
     avg_rating = serializers.SerializerMethodField()
+    rating_histogram = serializers.ReadOnlyField(
+        source='stats.rating_histogram'
+    )
     release_decade = serializers.ReadOnlyField()
-    poster = serializers.ImageField(required=False)
+    poster = StoredImageField(
+        url_field='poster_url', thumbnail_field='poster_thumbnail_url',
+        required=False
+    )
     seen_id = serializers.SerializerMethodField()
     seen_count = serializers.ReadOnlyField()
     watchlist_id = serializers.SerializerMethodField()
@@ -34,72 +52,46 @@ class MovieSerializer(serializers.ModelSerializer):
     report_id = serializers.SerializerMethodField()
     report_count = serializers.ReadOnlyField()
 
+    viewer_state_relations = {
+        'state': (MovieState, 'movie', ['id', 'state']),
+        'rating': (Rating, 'movie'),
+        'report': (Report, 'movie'),
+    }
+
     def get_is_owner(self, obj):
         request = self.context['request']
         return request.user == obj.owner
 
     def get_avg_rating(self, obj):
-        return obj.avg_rating()
+        # Movies that were never rated are annotated with 0 so they sort
+        # last, but are still shown without an average
+        if getattr(obj, 'rating_count', None):
+            return "{:.2f}".format(round(obj.avg_rating, 2))
+        return None
+
+    def get_state_id(self, obj, state):
+        state_id, current = self.get_viewer_state_id('state', obj) or (
+            None, None
+        )
+        return state_id if current == state else None
 
     def get_seen_id(self, obj):
-        user = self.context['request'].user
-        if user.is_authenticated:
-            seen = Seen.objects.filter(
-                owner=user, movie=obj
-            ).first()
-            return seen.id if seen else None
-        return None
+        return self.get_state_id(obj, MovieState.SEEN)
 
     def get_watchlist_id(self, obj):
-        user = self.context['request'].user
-        if user.is_authenticated:
-            watchlist = Watchlist.objects.filter(
-                owner=user, movie=obj
-            ).first()
-            return watchlist.id if watchlist else None
-        return None
+        return self.get_state_id(obj, MovieState.WATCHLIST)
 
     def get_rating_id(self, obj):
-        user = self.context['request'].user
-        if user.is_authenticated:
-            rating = Rating.objects.filter(
-                owner=user, movie=obj
-            ).first()
-            return rating.id if rating else None
-        return None
+        return self.get_viewer_state_id('rating', obj)
 
     def get_report_id(self, obj):
-        user = self.context['request'].user
-        if user.is_authenticated:
-            report = Report.objects.filter(
-                owner=user, movie=obj
-            ).first()
-            return report.id if report else None
-        return None
+        return self.get_viewer_state_id('report', obj)
 
     def validate_poster(self, value):
         if value:
-            if value.size > 2 * 1024 * 1024:
-                raise serializers.ValidationError(
-                    'Image size larger than 2MB!'
-                )
-            if value.image.height > 4096:
-                raise serializers.ValidationError(
-                    'Image height larger than 4096px!'
-                )
-            if value.image.width > 4096:
-                raise serializers.ValidationError(
-                    'Image width larger than 4096px!'
-                )
-            # make sure the image has a 2:3 ratio
-            # (width aproximately 70% of height)
-            if (
-                value.image.width < (value.image.height * .60) or
-                value.image.width > (value.image.height * .80)
-            ):
-                raise serializers.ValidationError(
-                    'Poster images have an aproximate ratio of 2:3!'
-                )
+            error = get_poster_error(value.size, *value.image_size)
+            if error:
+                raise serializers.ValidationError(error)
             return value
 
     class Meta:
@@ -109,6 +101,86 @@ class MovieSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at', 'synopsis', 'directors', 'main_cast',
             'poster', 'release_year', 'release_decade', 'movie_genre',
             'seen_id', 'seen_count', 'watchlist_id', 'watchlist_count',
-            'list_count', 'avg_rating', 'rating_count', 'rating_id',
-            'report_id', 'report_count'
+            'list_count', 'avg_rating', 'rating_histogram', 'rating_count',
+            'rating_id', 'report_id', 'report_count'
+        ]
+
+
+class MovieStateSerializer(serializers.Serializer):
+    """
+    Serializer for the state of a movie for the logged in user.
+    The state is seen, watchlist or none (neither of them).
+    Provides the id of the user's seen or watchlist instance and whether the
+    last request changed the state.
+    """
+    NONE = 'none'
+
+    movie = serializers.ReadOnlyField(source='movie.id')
+    state = serializers.ChoiceField(
+        choices=[choice for choice, _ in MovieState.STATE_CHOICES] + [NONE]
+    )
+    id = serializers.ReadOnlyField()
+    changed = serializers.ReadOnlyField()
+
+
+class SimilarMovieSerializer(serializers.ModelSerializer):
+    """
+    Serializer for a similar movie.
+    Provides the movie id, title, poster (thumbnail), release year, genre
+    and the similarity score.
+    """
+    id = serializers.ReadOnlyField(source='similar.id')
+    title = serializers.ReadOnlyField(source='similar.title')
+    poster = serializers.ReadOnlyField(source='similar.poster_thumbnail')
+    release_year = serializers.ReadOnlyField(source='similar.release_year')
+    movie_genre = serializers.ReadOnlyField(source='similar.movie_genre')
+
+    class Meta:
+        model = SimilarMovie
+        fields = [
+            'id', 'title', 'poster', 'release_year', 'movie_genre', 'score'
+        ]
+
+
+class TrendingMovieSerializer(serializers.ModelSerializer):
+    """
+    Serializer for a trending movie.
+    Provides the movie id, title, poster (thumbnail), release year, genre,
+    its rank and its decayed activity score.
+    """
+    id = serializers.ReadOnlyField(source='movie.id')
+    title = serializers.ReadOnlyField(source='movie.title')
+    poster = serializers.ReadOnlyField(source='movie.poster_thumbnail')
+    release_year = serializers.ReadOnlyField(source='movie.release_year')
+    movie_genre = serializers.ReadOnlyField(source='movie.movie_genre')
+
+    class Meta:
+        model = TrendingMovie
+        fields = [
+            'id', 'title', 'poster', 'release_year', 'movie_genre', 'rank',
+            'score'
+        ]
+
+
+class LeaderboardEntrySerializer(serializers.ModelSerializer):
+    """
+    Serializer for a movie of the top rated leaderboards.
+    Provides the movie id, title, poster (thumbnail), release year, genre,
+    the ammount of times it was rated, its average rating and its Bayesian
+    average rating (score).
+    """
+    id = serializers.ReadOnlyField(source='movie.id')
+    title = serializers.ReadOnlyField(source='movie.title')
+    poster = serializers.ReadOnlyField(source='movie.poster_thumbnail')
+    release_year = serializers.ReadOnlyField(source='movie.release_year')
+    rating_count = serializers.ReadOnlyField(
+        source='movie.stats.rating_count'
+    )
+    avg_rating = serializers.ReadOnlyField(source='movie.stats.avg_rating')
+
+    class Meta:
+        model = LeaderboardEntry
+        fields = [
+            'id', 'title', 'poster', 'release_year', 'movie_genre',
+            'rating_count', 'avg_rating', 'score'
         ]
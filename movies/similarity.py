@@ -0,0 +1,94 @@
+"""
+Item-item collaborative filtering of the similar movies.
+The ratings, seen movies and list links form a sparse user x movie matrix,
+the similarity of two movies is the cosine (or adjusted cosine) of their
+columns and the top neighbours of each movie are stored in SimilarMovie,
+so the endpoint reads them with a single indexed query.
+"""
+import numpy as np
+from scipy import sparse
+
+# Value of a seen or listed movie the user didn't rate (ratings go 1 to 5)
+IMPLICIT_VALUE = 3.0
+
+# Matrix the worker processes compute the similarities from
+worker_matrix = None
+
+
+def build_matrix(interactions, adjusted=False):
+    """
+    Builds the normalized user x movie matrix (CSC) from (user ids, movie
+    ids, values, is rating) arrays. A rating overrides the implicit value
+    of the same user and movie.
+    With adjusted, the mean value of each user is subtracted from their
+    values (adjusted cosine).
+    Returns the matrix and the movie id of each column.
+    """
+    users, movies, values, is_rating = interactions
+    user_ids, user_index = np.unique(users, return_inverse=True)
+    movie_ids, movie_index = np.unique(movies, return_inverse=True)
+
+    # Keep one value per user and movie, preferring ratings
+    keys = user_index.astype(np.int64) * len(movie_ids) + movie_index
+    order = np.lexsort((~is_rating, keys))
+    keys = keys[order]
+    first = np.ones(len(keys), dtype=bool)
+    first[1:] = keys[1:] != keys[:-1]
+    order = order[first]
+
+    matrix = sparse.csr_matrix(
+        (values[order], (user_index[order], movie_index[order])),
+        shape=(len(user_ids), len(movie_ids)), dtype=np.float64
+    )
+    if adjusted:
+        counts = np.diff(matrix.indptr)
+        means = np.asarray(matrix.sum(axis=1)).ravel() / np.maximum(counts, 1)
+        matrix.data -= np.repeat(means, counts)
+
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0)).ravel())
+    scale = np.divide(
+        1.0, norms, out=np.zeros_like(norms), where=norms > 0
+    )
+    return (matrix @ sparse.diags(scale)).tocsc(), movie_ids
+
+
+def top_neighbours(matrix, columns, k):
+    """
+    Returns, for each of the given columns, the (column, similarity) of its
+    k most similar other columns with a positive similarity, best first.
+    Only the similarities of these columns are computed (a sparse
+    len(columns) x movies block), which bounds the memory of a chunk.
+    """
+    block = (matrix[:, columns].T @ matrix).tocsr()
+    neighbours = []
+    for row, column in enumerate(columns):
+        start, end = block.indptr[row], block.indptr[row + 1]
+        indices = block.indices[start:end]
+        scores = block.data[start:end]
+        keep = (indices != column) & (scores > 1e-9)
+        indices, scores = indices[keep], scores[keep]
+        if len(scores) > k:
+            best = np.argpartition(-scores, k)[:k]
+            indices, scores = indices[best], scores[best]
+        order = np.argsort(-scores, kind='stable')
+        neighbours.append(list(zip(indices[order], scores[order])))
+    return neighbours
+
+
+def get_related_columns(matrix, columns):
+    """
+    Returns the given columns and the columns sharing a row (user) with
+    them, i.e. the columns whose similarity with them can be positive.
+    """
+    rows = np.unique(matrix[:, columns].indices)
+    related = matrix[rows, :]
+    return np.union1d(columns, np.flatnonzero(np.diff(related.indptr)))
+
+
+def set_worker_matrix(matrix):
+    global worker_matrix
+    worker_matrix = matrix
+
+
+def top_neighbours_in_worker(columns, k):
+    return top_neighbours(worker_matrix, columns, k)
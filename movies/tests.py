@@ -1,11 +1,42 @@
+import csv
+import json
+import os
+import tempfile
+import time
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
 from django.contrib.auth.models import User
-from .models import Movie
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from .autocomplete import title_index
+from .search import search_substrings
+from django.db.models import F
+from .models import (
+    LeaderboardEntry, LeaderboardPrior, Movie, MovieState, MovieStats,
+    SimilarMovie, SimilarityRun, TrendingLandmark, add_trending_activity,
+)
+from .trending import HALF_LIFE, REBASE_AFTER
+from comments.models import ListComment, RatingComment
+from seen_movie.models import Seen
+from watchlist.models import Watchlist
+from lists.models import List
+from ratings.models import Rating
+from reports.models import Report
 from rest_framework import status
 from rest_framework.test import APITestCase
 
 
 class MovieListViewTests(APITestCase):
     def setUp(self):
+        # The responses cached by other tests would be served, as their
+        # versions are only bumped when a transaction commits
+        cache.clear()
         User.objects.create_user(username='adam', password='pass')
 
     def test_can_list_movies(self):
@@ -74,6 +105,28 @@ class MovieListViewTests(APITestCase):
         self.assertIn('release_decade', response.data)
         self.assertEqual(response.data['release_decade'], 1990)
 
+    def test_release_decade_is_stored_and_filtered(self):
+        adam = User.objects.get(username='adam')
+        movie = Movie.objects.create(
+            owner=adam, title='title', synopsis='synopsis',
+            directors='Test Director', main_cast='Cast members',
+            release_year=1997, movie_genre='horror'
+            )
+        movie.release_year = 2001
+        movie.save(update_fields=['release_year'])
+        movie.refresh_from_db()
+        self.assertEqual(movie.release_decade, 2000)
+        response = self.client.get('/movies/?release_decade=2000')
+        self.assertEqual(response.data['count'], 1)
+        response = self.client.get('/movies/?release_decade=1990')
+        self.assertEqual(response.data['count'], 0)
+
+    def test_genre_and_decade_lookups_use_an_index(self):
+        queryset = Movie.objects.filter(
+            movie_genre='horror', release_decade=1990
+        )
+        self.assertIn('movie_genre_decade_idx', queryset.explain())
+
 
 class MovieDetailViewTests(APITestCase):
     def setUp(self):
@@ -147,3 +200,947 @@ class MovieDetailViewTests(APITestCase):
             response = self.client.delete(f'/movies/{movie.id}/')
             self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
             Movie.objects.get(pk=movie.id)
+
+
+class MovieStatsTests(APITestCase):
+    def setUp(self):
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.brian = User.objects.create_user(
+            username='brian', password='pass'
+        )
+        self.movie = Movie.objects.create(
+            owner=self.adam, title='title', synopsis='synopsis',
+            directors='Test Director', main_cast='Cast members',
+            release_year=2000, movie_genre='crime'
+        )
+        self.other_movie = Movie.objects.create(
+            owner=self.adam, title='other title', synopsis='synopsis',
+            directors='Test Director', main_cast='Cast members',
+            release_year=2000, movie_genre='crime'
+        )
+
+    def get_stats(self, movie):
+        return MovieStats.objects.get(movie=movie)
+
+    def test_stats_are_created_with_the_movie(self):
+        stats = self.get_stats(self.movie)
+        self.assertEqual(stats.seen_count, 0)
+        self.assertEqual(stats.list_count, 0)
+
+    def test_seen_and_watchlist_update_counts(self):
+        seen = Seen.objects.create(owner=self.adam, movie=self.movie)
+        Watchlist.objects.create(owner=self.brian, movie=self.movie)
+        stats = self.get_stats(self.movie)
+        self.assertEqual(stats.seen_count, 1)
+        self.assertEqual(stats.watchlist_count, 1)
+        seen.delete()
+        self.assertEqual(self.get_stats(self.movie).seen_count, 0)
+
+    def test_list_links_update_counts(self):
+        movie_list = List.objects.create(owner=self.adam, title='list')
+        movie_list.movies.add(self.movie, self.other_movie)
+        self.assertEqual(self.get_stats(self.movie).list_count, 1)
+        movie_list.movies.remove(self.movie)
+        self.assertEqual(self.get_stats(self.movie).list_count, 0)
+        self.assertEqual(self.get_stats(self.other_movie).list_count, 1)
+        self.movie.lists.add(movie_list)
+        movie_list.delete()
+        self.assertEqual(self.get_stats(self.movie).list_count, 0)
+        self.assertEqual(self.get_stats(self.other_movie).list_count, 0)
+
+    def test_can_order_movies_by_seen_count(self):
+        Seen.objects.create(owner=self.adam, movie=self.other_movie)
+        response = self.client.get('/movies/?ordering=-seen_count')
+        self.assertEqual(response.data['results'][0]['title'], 'other title')
+        self.assertEqual(response.data['results'][0]['seen_count'], 1)
+
+    def test_reconcile_command_rebuilds_stats(self):
+        for owner in [self.adam, self.brian]:
+            Rating.objects.create(
+                owner=owner, movie=self.movie, value=4, title='title',
+                content='content'
+            )
+            Seen.objects.create(owner=owner, movie=self.movie)
+        Report.objects.create(
+            owner=self.adam, movie=self.movie, content='content'
+        )
+        MovieStats.objects.update(
+            rating_count=10, rating_4_count=10, report_count=10,
+            seen_count=10
+        )
+        call_command('reconcile_movie_stats', stdout=StringIO())
+        stats = self.get_stats(self.movie)
+        self.assertEqual(stats.rating_count, 2)
+        self.assertEqual(stats.rating_4_count, 2)
+        self.assertEqual(stats.seen_count, 2)
+        self.assertEqual(stats.report_count, 1)
+        self.assertEqual(self.get_stats(self.other_movie).rating_count, 0)
+
+    def test_can_filter_and_order_movies_by_avg_rating(self):
+        for owner, movie, value in [
+            (self.adam, self.movie, 2), (self.brian, self.movie, 3),
+            (self.adam, self.other_movie, 5),
+        ]:
+            Rating.objects.create(
+                owner=owner, movie=movie, value=value, title='title',
+                content='content'
+            )
+        response = self.client.get('/movies/?ordering=-avg_rating')
+        results = response.data['results']
+        self.assertEqual(results[0]['avg_rating'], '5.00')
+        self.assertEqual(results[1]['avg_rating'], '2.50')
+        response = self.client.get('/movies/?min_rating=4')
+        self.assertEqual(response.data['count'], 1)
+
+    def test_invalid_number_filters(self):
+        for params in ['min_rating=abc', 'release_decade=199x', 'owner_id=a']:
+            response = self.client.get(f'/movies/?{params}')
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST
+            )
+            self.assertIn(params.split('=')[0], response.data)
+
+
+class MovieViewerStateTests(APITestCase):
+    def setUp(self):
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.movies = [
+            Movie.objects.create(
+                owner=self.adam, title=f'title {number}',
+                synopsis='synopsis', directors='Test Director',
+                main_cast='Cast members', release_year=2000,
+                movie_genre='crime'
+            )
+            for number in range(6)
+        ]
+        self.seen = Seen.objects.create(owner=self.adam, movie=self.movies[0])
+        self.watchlist = Watchlist.objects.create(
+            owner=self.adam, movie=self.movies[1]
+        )
+
+    def get_movies_query_count(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/movies/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries)
+
+    def test_viewer_state_ids_are_provided(self):
+        self.client.force_authenticate(user=self.adam)
+        response = self.client.get('/movies/')
+        results = {
+            movie['id']: movie for movie in response.data['results']
+        }
+        self.assertEqual(results[self.movies[0].id]['seen_id'], self.seen.id)
+        self.assertEqual(
+            results[self.movies[1].id]['watchlist_id'], self.watchlist.id
+        )
+        self.assertIsNone(results[self.movies[1].id]['seen_id'])
+        self.assertIsNone(results[self.movies[2].id]['rating_id'])
+
+    def test_viewer_state_query_count_does_not_grow_with_page(self):
+        self.client.force_authenticate(user=self.adam)
+        query_count = self.get_movies_query_count()
+        for number in range(4):
+            Movie.objects.create(
+                owner=self.adam, title=f'other title {number}',
+                synopsis='synopsis', directors='Test Director',
+                main_cast='Cast members', release_year=2000,
+                movie_genre='crime'
+            )
+        self.assertEqual(self.get_movies_query_count(), query_count)
+
+
+class MovieStateTests(APITestCase):
+    def setUp(self):
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.movie = Movie.objects.create(
+            owner=self.adam, title='title', synopsis='synopsis',
+            directors='Test Director', main_cast='Cast members',
+            release_year=2000, movie_genre='crime'
+        )
+        self.url = f'/movies/{self.movie.id}/state/'
+        self.client.force_authenticate(user=self.adam)
+
+    def get_counts(self):
+        stats = MovieStats.objects.get(movie=self.movie)
+        return stats.seen_count, stats.watchlist_count
+
+    def test_movie_state_is_none_by_default(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['state'], 'none')
+        self.assertIsNone(response.data['id'])
+
+    def test_state_transitions_are_idempotent(self):
+        response = self.client.put(self.url, {'state': 'watchlist'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['changed'])
+        self.assertEqual(self.get_counts(), (0, 1))
+        response = self.client.put(self.url, {'state': 'watchlist'})
+        self.assertFalse(response.data['changed'])
+        self.assertEqual(self.get_counts(), (0, 1))
+        response = self.client.put(self.url, {'state': 'seen'})
+        self.assertTrue(response.data['changed'])
+        self.assertEqual(self.get_counts(), (1, 0))
+        self.assertEqual(MovieState.objects.count(), 1)
+        response = self.client.put(self.url, {'state': 'none'})
+        self.assertTrue(response.data['changed'])
+        self.assertEqual(self.get_counts(), (0, 0))
+        self.assertFalse(MovieState.objects.exists())
+
+    def test_cant_set_invalid_state(self):
+        response = self.client.put(self.url, {'state': 'liked'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_marking_watchlist_movie_as_seen_moves_it(self):
+        watchlist = Watchlist.objects.create(owner=self.adam, movie=self.movie)
+        response = self.client.post('/seen/', {'movie': self.movie.id})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['id'], watchlist.id)
+        self.assertFalse(Watchlist.objects.exists())
+        self.assertEqual(Seen.objects.get().movie, self.movie)
+        self.assertEqual(self.get_counts(), (1, 0))
+        response = self.client.post('/seen/', {'movie': self.movie.id})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_can_filter_and_order_movies_by_profile_state(self):
+        other_movie = Movie.objects.create(
+            owner=self.adam, title='other title', synopsis='synopsis',
+            directors='Test Director', main_cast='Cast members',
+            release_year=2000, movie_genre='crime'
+        )
+        Seen.objects.create(owner=self.adam, movie=self.movie)
+        Watchlist.objects.create(owner=self.adam, movie=other_movie)
+        profile_id = self.adam.profile.id
+        response = self.client.get(
+            f'/movies/?seen__owner__profile={profile_id}'
+            '&ordering=-seen__created_at'
+        )
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['title'], 'title')
+        response = self.client.get(
+            f'/movies/?watchlist__owner__profile={profile_id}'
+        )
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(
+            response.data['results'][0]['watchlist_id'],
+            Watchlist.objects.get().id
+        )
+
+
+class MovieSearchTests(APITestCase):
+    def setUp(self):
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.heat = Movie.objects.create(
+            owner=self.adam, title='Heat', synopsis='synopsis',
+            directors='Michael Mann', main_cast='Al Pacino, Robert De Niro',
+            release_year=1995, movie_genre='crime'
+        )
+        self.godfather = Movie.objects.create(
+            owner=self.adam, title='The Godfather', synopsis='synopsis',
+            directors='Francis Ford Coppola',
+            main_cast='Marlon Brando, Al Pacino', release_year=1972,
+            movie_genre='crime'
+        )
+        self.pacino = Movie.objects.create(
+            owner=self.adam, title='Pacino: A Documentary',
+            synopsis='synopsis', directors='Someone',
+            main_cast='Al Pacino', release_year=2001,
+            movie_genre='documentary'
+        )
+
+    def search(self, query):
+        response = self.client.get(f'/movies/?{query}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [movie['title'] for movie in response.data['results']]
+
+    def test_search_matches_title_directors_and_cast_prefixes(self):
+        self.assertEqual(self.search('q=copp'), ['The Godfather'])
+        self.assertEqual(self.search('q=hea'), ['Heat'])
+        self.assertEqual(len(self.search('q=pacino')), 3)
+
+    def test_search_ranks_title_matches_first(self):
+        self.assertEqual(self.search('q=pacino')[0], 'Pacino: A Documentary')
+
+    def test_search_without_words_lists_every_movie(self):
+        self.assertEqual(len(self.search('q=')), 3)
+        self.assertEqual(len(self.search('q=%20-')), 3)
+
+    def test_search_falls_back_to_substrings_without_a_full_text_index(self):
+        movies = search_substrings(Movie.objects.all(), ['pacino'])
+        self.assertEqual(
+            [movie.title for movie in movies][0], 'Pacino: A Documentary'
+        )
+        self.assertEqual(len(movies), 3)
+        movies = search_substrings(Movie.objects.all(), ['al', 'coppola'])
+        self.assertEqual(list(movies), [self.godfather])
+
+    def test_search_can_be_combined_with_filters(self):
+        self.assertEqual(
+            self.search('q=pacino&release_decade=1990'), ['Heat']
+        )
+
+    def test_search_index_follows_updates_and_deletes(self):
+        self.heat.title = 'Collateral'
+        self.heat.save()
+        self.assertEqual(self.search('q=heat'), [])
+        self.assertEqual(self.search('q=collateral'), ['Collateral'])
+        self.godfather.delete()
+        self.assertEqual(self.search('q=coppola'), [])
+
+
+class MovieAutocompleteTests(APITestCase):
+    def setUp(self):
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.godfather = Movie.objects.create(
+            owner=self.adam, title='The Godfather', synopsis='synopsis',
+            directors='Francis Ford Coppola', main_cast='Al Pacino',
+            release_year=1972, movie_genre='crime'
+        )
+        self.gone_girl = Movie.objects.create(
+            owner=self.adam, title='Gone Girl', synopsis='synopsis',
+            directors='David Fincher', main_cast='Ben Affleck',
+            release_year=2014, movie_genre='thriller'
+        )
+        Seen.objects.create(owner=self.adam, movie=self.gone_girl)
+        # Start every test from an index built from this data
+        title_index.build()
+
+    def tearDown(self):
+        title_index.entries = None
+
+    def suggest(self, query):
+        response = self.client.get(f'/movies/autocomplete/?{query}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [movie['title'] for movie in response.data]
+
+    def test_suggestions_match_title_word_prefixes(self):
+        self.assertEqual(self.suggest('q=godf'), ['The Godfather'])
+        self.assertEqual(self.suggest('q=the g'), ['The Godfather'])
+        self.assertEqual(self.suggest('q=girl'), ['Gone Girl'])
+        self.assertEqual(self.suggest('q=fincher'), [])
+        self.assertEqual(self.suggest('q='), [])
+
+    def test_suggestions_are_ranked_by_popularity_and_limited(self):
+        self.assertEqual(self.suggest('q=g'), ['Gone Girl', 'The Godfather'])
+        self.assertEqual(self.suggest('q=g&limit=1'), ['Gone Girl'])
+
+    def test_suggestions_do_not_query_the_database_once_built(self):
+        self.suggest('q=g')
+        with CaptureQueriesContext(connection) as context:
+            self.suggest('q=god')
+        self.assertEqual(len(context.captured_queries), 0)
+
+    def test_index_follows_creates_updates_and_deletes(self):
+        self.suggest('q=g')
+        with self.captureOnCommitCallbacks(execute=True):
+            Movie.objects.create(
+                owner=self.adam, title='Goodfellas', synopsis='synopsis',
+                directors='Martin Scorsese', main_cast='Ray Liotta',
+                release_year=1990, movie_genre='crime'
+            )
+        self.assertIn('Goodfellas', self.suggest('q=goo'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.godfather.title = 'The Irishman'
+            self.godfather.save()
+        self.assertEqual(self.suggest('q=godf'), [])
+        self.assertEqual(self.suggest('q=irish'), ['The Irishman'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.gone_girl.delete()
+        self.assertEqual(self.suggest('q=gone'), [])
+
+    def test_index_follows_the_popularity_of_the_movies(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Watchlist.objects.create(owner=self.adam, movie=self.godfather)
+            Seen.objects.create(
+                owner=User.objects.create_user(username='eve'),
+                movie=self.godfather
+            )
+        self.assertEqual(self.suggest('q=g'), ['The Godfather', 'Gone Girl'])
+
+    @mock.patch('movies.autocomplete.MAX_SCAN', 1)
+    def test_prefixes_with_many_matches_keep_their_top_movies(self):
+        title_index.build()
+        self.assertEqual(
+            title_index.top['g'], [self.gone_girl.id, self.godfather.id]
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            Watchlist.objects.create(owner=self.adam, movie=self.godfather)
+            Seen.objects.create(
+                owner=User.objects.create_user(username='eve'),
+                movie=self.godfather
+            )
+        self.assertEqual(self.suggest('q=g'), ['The Godfather', 'Gone Girl'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.godfather.delete()
+        self.assertEqual(self.suggest('q=g'), ['Gone Girl'])
+
+    def test_rebuild_replays_the_changes_made_while_loading(self):
+        load = title_index.load
+
+        def load_while_deleting():
+            entries = load()
+            title_index.remove(self.gone_girl.id)
+            return entries
+
+        with mock.patch.object(title_index, 'load', load_while_deleting):
+            title_index.build()
+        self.assertEqual(self.suggest('q=g'), ['The Godfather'])
+        self.assertIsNone(title_index.changes)
+
+    def test_first_build_replays_the_changes_made_while_loading(self):
+        title_index.entries = None
+        load = title_index.load
+
+        def load_while_deleting():
+            entries = load()
+            title_index.remove(self.gone_girl.id)
+            return entries
+
+        with mock.patch.object(title_index, 'load', load_while_deleting):
+            title_index.build()
+        self.assertEqual(self.suggest('q=g'), ['The Godfather'])
+
+    def test_failed_rebuild_can_be_retried(self):
+        title_index.rebuilding = True
+        with mock.patch.object(title_index, 'load', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                title_index.build()
+        self.assertFalse(title_index.rebuilding)
+        self.assertIsNone(title_index.changes)
+
+    def test_suggestions_query_the_database_until_built(self):
+        title_index.entries = None
+        with mock.patch.object(
+            title_index, 'rebuild_in_background'
+        ) as rebuild_in_background:
+            self.assertEqual(
+                self.suggest('q=g'), ['Gone Girl', 'The Godfather']
+            )
+            self.assertEqual(self.suggest('q=the g'), ['The Godfather'])
+        rebuild_in_background.assert_called()
+
+
+class ImportMoviesTests(APITestCase):
+    def setUp(self):
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.media = os.path.join(self.directory.name, 'media')
+        Image.new('RGB', (140, 200)).save(self.get_path('poster.png'))
+        Image.new('RGB', (200, 200)).save(self.get_path('square.png'))
+
+    def get_path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def get_row(self, title, **values):
+        return {
+            'title': title, 'synopsis': 'synopsis',
+            'directors': 'Test Director', 'main_cast': 'Cast members',
+            'release_year': 1994, 'movie_genre': 'crime', 'poster': '',
+            **values,
+        }
+
+    def write_csv(self, rows):
+        path = self.get_path('movies.csv')
+        with open(path, 'w', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        return path
+
+    def import_movies(self, path, *args):
+        stdout, stderr = StringIO(), StringIO()
+        with override_settings(MEDIA_ROOT=self.media):
+            call_command(
+                'import_movies', path, '--owner', 'adam',
+                '--storage', 'django.core.files.storage.FileSystemStorage',
+                *args, stdout=stdout, stderr=stderr
+            )
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_can_import_movies_from_csv(self):
+        path = self.write_csv([
+            self.get_row('Pulp Fiction', poster='poster.png'),
+            self.get_row('Wrong year', release_year=1500),
+            self.get_row('Wrong poster', poster='square.png'),
+            self.get_row('Leon'),
+        ])
+        stdout, stderr = self.import_movies(
+            path, '--batch-size', '3', '--workers', '0'
+        )
+        self.assertIn('Imported 2 movies, 2 rows failed', stdout)
+        self.assertIn('rows/s', stdout)
+        self.assertIn('Row 2: release_year', stderr)
+        self.assertIn('Row 3: poster', stderr)
+        movie = Movie.objects.get(title='Pulp Fiction')
+        self.assertEqual(movie.release_decade, 1990)
+        self.assertTrue(movie.poster.name.startswith('images/poster'))
+        self.assertTrue(
+            os.path.exists(os.path.join(self.media, movie.poster.name))
+        )
+        self.assertEqual(
+            MovieStats.objects.filter(movie__owner=self.adam).count(), 2
+        )
+        response = self.client.get('/movies/?q=leon')
+        self.assertEqual(response.data['results'][0]['title'], 'Leon')
+        self.assertFalse(os.path.exists(f'{path}.checkpoint'))
+
+    def test_can_import_movies_from_jsonl_with_workers(self):
+        path = self.get_path('movies.jsonl')
+        with open(path, 'w') as file:
+            for number in range(3):
+                row = self.get_row(f'title {number}', poster='poster.png')
+                file.write(json.dumps(row) + '\n')
+            file.write('not json\n')
+        stdout, stderr = self.import_movies(path, '--workers', '2')
+        self.assertEqual(Movie.objects.count(), 3)
+        self.assertIn('Row 4: Expected an object.', stderr)
+
+    def test_import_resumes_from_checkpoint(self):
+        path = self.write_csv([
+            self.get_row(f'title {number}') for number in range(5)
+        ])
+        with open(f'{path}.checkpoint', 'w') as file:
+            json.dump({'row': 3}, file)
+        stdout, stderr = self.import_movies(path, '--workers', '0')
+        self.assertIn('Resuming after row 3', stdout)
+        self.assertEqual(
+            sorted(Movie.objects.values_list('title', flat=True)),
+            ['title 3', 'title 4']
+        )
+
+    def test_rows_already_imported_are_skipped(self):
+        path = self.write_csv([
+            self.get_row(f'title {number}') for number in range(3)
+        ])
+        self.import_movies(path, '--workers', '0', '--batch-size', '2')
+        # As if the checkpoint wasn't written after the last batch
+        stdout, stderr = self.import_movies(path, '--workers', '0')
+        self.assertIn('0 rows failed, 3 were already imported', stdout)
+        self.assertEqual(Movie.objects.count(), 3)
+        self.assertEqual(
+            Movie.objects.get(title='title 1').import_key, 'movies.csv:2'
+        )
+
+    def test_posters_of_a_batch_not_written_are_deleted(self):
+        path = self.write_csv([self.get_row('Leon', poster='poster.png')])
+        create_movies = mock.patch(
+            'movies.management.commands.import_movies.Command.create_movies',
+            side_effect=DatabaseError
+        )
+        with create_movies, self.assertRaises(DatabaseError):
+            self.import_movies(path, '--workers', '0')
+        for directory in ['images', 'thumbnails']:
+            self.assertEqual(
+                os.listdir(os.path.join(self.media, directory)), []
+            )
+
+
+def get_image_upload(name, size, image_format='PNG'):
+    output = BytesIO()
+    Image.new('RGB', size).save(output, image_format)
+    return SimpleUploadedFile(name, output.getvalue())
+
+
+class MoviePosterTests(APITestCase):
+    def setUp(self):
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.client.force_authenticate(user=self.adam)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.media = directory.name
+        settings = override_settings(
+            DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage',
+            MEDIA_ROOT=self.media, IMAGE_DERIVATIVES_ASYNC=False
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def post_movie(self, poster):
+        return self.client.post('/movies/', {
+            'title': 'title', 'synopsis': 'synopsis',
+            'directors': 'Test Director', 'main_cast': 'Cast members',
+            'release_year': 2000, 'movie_genre': 'crime', 'poster': poster,
+        })
+
+    def test_poster_urls_are_stored_and_thumbnail_is_generated(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post_movie(
+                get_image_upload('poster.jpg', (700, 1000), 'JPEG')
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        movie = Movie.objects.get()
+        self.assertTrue(movie.poster_url.startswith('/media/images/poster'))
+        self.assertTrue(
+            movie.poster_thumbnail_url.startswith('/media/thumbnails/poster')
+        )
+        thumbnail = os.path.join(
+            self.media, movie.poster_thumbnail_url[len('/media/'):]
+        )
+        with Image.open(thumbnail) as image:
+            self.assertEqual(image.size, (240, 343))
+        response = self.client.get('/movies/')
+        self.assertTrue(response.data['results'][0]['poster'].endswith(
+            movie.poster_thumbnail_url
+        ))
+        response = self.client.get(f'/movies/{movie.id}/')
+        self.assertTrue(response.data['poster'].endswith(movie.poster_url))
+
+    def test_cant_upload_invalid_poster(self):
+        response = self.post_movie(SimpleUploadedFile('poster.png', b'text'))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('valid image', response.data['poster'][0])
+        response = self.post_movie(get_image_upload('poster.png', (200, 200)))
+        self.assertEqual(
+            response.data['poster'][0],
+            'Poster images have an aproximate ratio of 2:3!'
+        )
+
+    def test_command_generates_missing_thumbnails(self):
+        movie = Movie.objects.create(
+            owner=self.adam, title='title', synopsis='synopsis',
+            directors='Test Director', main_cast='Cast members',
+            release_year=2000, movie_genre='crime'
+        )
+        Image.new('RGB', (140, 200)).save(
+            os.path.join(self.media, 'old.png')
+        )
+        Movie.objects.filter(pk=movie.pk).update(
+            poster='old.png', poster_url='', poster_thumbnail_url=''
+        )
+        stdout = StringIO()
+        call_command('generate_image_derivatives', stdout=stdout)
+        self.assertIn('Movie: 1 thumbnails created', stdout.getvalue())
+        movie.refresh_from_db()
+        self.assertEqual(movie.poster_url, '/media/old.png')
+        self.assertEqual(
+            movie.poster_thumbnail_url, '/media/thumbnails/old.jpg'
+        )
+
+
+class SimilarMoviesTests(APITestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(username=f'user{number}', password='pass')
+            for number in range(4)
+        ]
+        self.movies = [
+            Movie.objects.create(
+                owner=self.users[0], title=f'title {number}',
+                synopsis='synopsis', directors='Test Director',
+                main_cast='Cast members', release_year=2000,
+                movie_genre='crime'
+            )
+            for number in range(4)
+        ]
+        # Movies 0 and 1 are rated by the same users, movie 2 is seen by
+        # one of them and movie 3 by nobody
+        for user in self.users[:3]:
+            for movie in self.movies[:2]:
+                Rating.objects.create(
+                    owner=user, movie=movie, value=5, title='title',
+                    content='content'
+                )
+        Seen.objects.create(owner=self.users[0], movie=self.movies[2])
+
+    def build(self, *args):
+        stdout = StringIO()
+        call_command(
+            'build_similar_movies', '--workers', '0', *args, stdout=stdout
+        )
+        return stdout.getvalue()
+
+    def test_similar_movies_are_ranked_by_similarity(self):
+        self.build()
+        response = self.client.get(f'/movies/{self.movies[0].id}/similar/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [movie['id'] for movie in response.data],
+            [self.movies[1].id, self.movies[2].id]
+        )
+        self.assertAlmostEqual(response.data[0]['score'], 1.0)
+        self.assertAlmostEqual(response.data[1]['score'], 0.577, places=3)
+        response = self.client.get(f'/movies/{self.movies[3].id}/similar/')
+        self.assertEqual(response.data, [])
+
+    def test_similar_movies_are_a_single_query(self):
+        self.build()
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(f'/movies/{self.movies[0].id}/similar/')
+        self.assertEqual(len(context.captured_queries), 1)
+
+    def test_build_can_run_in_chunks_with_workers(self):
+        call_command(
+            'build_similar_movies', '--workers', '2', '--chunk-size', '1',
+            stdout=StringIO()
+        )
+        self.assertEqual(
+            SimilarMovie.objects.filter(movie=self.movies[0]).first().similar,
+            self.movies[1]
+        )
+
+    def test_incremental_build_only_refreshes_touched_movies(self):
+        self.build()
+        Rating.objects.create(
+            owner=self.users[3], movie=self.movies[3], value=4,
+            title='title', content='content'
+        )
+        Seen.objects.create(owner=self.users[3], movie=self.movies[2])
+        output = self.build('--incremental')
+        self.assertIn('Computed the similar movies of 4 movies', output)
+        self.assertEqual(
+            SimilarMovie.objects.filter(movie=self.movies[3]).get().similar,
+            self.movies[2]
+        )
+        # Movie 2 is also a neighbour of movie 0, whose list is refreshed
+        self.assertAlmostEqual(
+            SimilarMovie.objects.get(
+                movie=self.movies[0], similar=self.movies[2]
+            ).score,
+            0.408, places=3
+        )
+
+    def test_incremental_build_only_refreshes_related_movies(self):
+        self.build()
+        Seen.objects.create(owner=self.users[3], movie=self.movies[3])
+        output = self.build('--incremental')
+        self.assertIn('Computed the similar movies of 1 movies', output)
+
+    def test_incremental_build_is_full_once_the_full_build_is_old(self):
+        self.build()
+        SimilarityRun.objects.update(
+            started_at=F('started_at') - timedelta(days=2)
+        )
+        output = self.build('--incremental')
+        self.assertIn('Computed the similar movies of 3 movies', output)
+        self.assertFalse(SimilarityRun.objects.first().incremental)
+
+
+class TrendingMoviesTests(APITestCase):
+    def setUp(self):
+        # Scores are relative to the landmark, set when the test database
+        # was migrated
+        TrendingLandmark.objects.update(time=time.time())
+        self.user = User.objects.create_user(username='adam', password='pass')
+        self.movies = [
+            Movie.objects.create(
+                owner=self.user, title=f'title {number}',
+                synopsis='synopsis', directors='Test Director',
+                main_cast='Cast members', release_year=2000,
+                movie_genre=genre
+            )
+            for number, genre in enumerate(['crime', 'drama', 'crime'])
+        ]
+
+    def get_score(self, movie):
+        return MovieStats.objects.get(movie=movie).trending_score
+
+    def move_landmark(self, half_lives):
+        TrendingLandmark.objects.update(
+            time=F('time') - half_lives * HALF_LIFE
+        )
+
+    def update(self):
+        call_command('update_trending_movies', stdout=StringIO())
+
+    def test_activity_adds_to_the_trending_score(self):
+        Seen.objects.create(owner=self.user, movie=self.movies[0])
+        Watchlist.objects.create(owner=self.user, movie=self.movies[1])
+        rating = Rating.objects.create(
+            owner=self.user, movie=self.movies[1], value=4, title='title',
+            content='content'
+        )
+        movie_list = List.objects.create(owner=self.user, title='list')
+        movie_list.movies.add(self.movies[1], self.movies[2])
+        ListComment.objects.create(
+            owner=self.user, list=movie_list, content='content'
+        )
+        RatingComment.objects.create(
+            owner=self.user, rating=rating, content='content'
+        )
+        self.assertAlmostEqual(self.get_score(self.movies[0]), 3, places=3)
+        self.assertAlmostEqual(self.get_score(self.movies[1]), 5, places=3)
+        self.assertAlmostEqual(
+            self.get_score(self.movies[2]), 1.5, places=3
+        )
+
+    def test_activity_locks_the_landmark_on_postgres(self):
+        landmark = TrendingLandmark.objects.get().time - HALF_LIFE
+        postgres = mock.MagicMock(vendor='postgresql')
+        cursor = postgres.cursor.return_value.__enter__.return_value
+        cursor.fetchone.return_value = (landmark,)
+        with mock.patch('movies.models.connection', postgres):
+            add_trending_activity([self.movies[0].id], 'seen')
+        self.assertIn('FOR SHARE', cursor.execute.call_args[0][0])
+        # Relative to the landmark read under the lock
+        self.assertAlmostEqual(self.get_score(self.movies[0]), 6, places=3)
+
+    def test_older_activity_weighs_less(self):
+        Seen.objects.create(owner=self.user, movie=self.movies[0])
+        Seen.objects.create(owner=self.user, movie=self.movies[1])
+        # The activity so far happened one half life ago
+        self.move_landmark(1)
+        Watchlist.objects.create(owner=self.user, movie=self.movies[2])
+        Seen.objects.create(
+            owner=User.objects.create_user(username='eve', password='pass'),
+            movie=self.movies[0]
+        )
+        self.update()
+        response = self.client.get('/movies/trending/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [movie['id'] for movie in response.data],
+            [self.movies[0].id, self.movies[1].id, self.movies[2].id]
+        )
+        self.assertEqual([movie['rank'] for movie in response.data], [1, 2, 3])
+        self.assertAlmostEqual(response.data[0]['score'], 4.5, places=3)
+        self.assertAlmostEqual(response.data[1]['score'], 1.5, places=3)
+        self.assertAlmostEqual(response.data[2]['score'], 1, places=3)
+
+    def test_trending_movies_by_genre(self):
+        Seen.objects.create(owner=self.user, movie=self.movies[1])
+        Watchlist.objects.create(owner=self.user, movie=self.movies[2])
+        self.update()
+        response = self.client.get('/movies/trending/?movie_genre=crime')
+        self.assertEqual(
+            [movie['id'] for movie in response.data], [self.movies[2].id]
+        )
+        response = self.client.get('/movies/trending/?movie_genre=horror')
+        self.assertEqual(response.data, [])
+
+    def test_old_landmark_is_moved_keeping_the_scores(self):
+        Seen.objects.create(owner=self.user, movie=self.movies[0])
+        self.move_landmark(REBASE_AFTER + 1)
+        Watchlist.objects.create(owner=self.user, movie=self.movies[1])
+        self.assertGreater(self.get_score(self.movies[1]), 2 ** REBASE_AFTER)
+        self.update()
+        self.assertAlmostEqual(self.get_score(self.movies[1]), 1, places=3)
+        response = self.client.get('/movies/trending/')
+        self.assertEqual(
+            [movie['id'] for movie in response.data],
+            [self.movies[1].id, self.movies[0].id]
+        )
+        self.assertAlmostEqual(
+            response.data[1]['score'] * 2 ** (REBASE_AFTER + 1), 3, places=3
+        )
+
+    def test_trending_movies_are_a_single_query(self):
+        Seen.objects.create(owner=self.user, movie=self.movies[0])
+        self.update()
+        with CaptureQueriesContext(connection) as context:
+            self.client.get('/movies/trending/')
+        self.assertEqual(len(context.captured_queries), 1)
+
+
+class TopRatedMoviesTests(APITestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(username=f'user{number}', password='pass')
+            for number in range(6)
+        ]
+        self.movies = [
+            Movie.objects.create(
+                owner=self.users[0], title=f'title {number}',
+                synopsis='synopsis', directors='Test Director',
+                main_cast='Cast members', release_year=year,
+                movie_genre=genre
+            )
+            for number, (genre, year) in enumerate([
+                ('crime', 1994), ('crime', 2004), ('drama', 1999),
+                ('drama', 2001),
+            ])
+        ]
+        LeaderboardPrior.objects.update(mean=3.0)
+
+    def rate(self, movie, values):
+        return [
+            Rating.objects.create(
+                owner=user, movie=movie, value=value, title='title',
+                content='content'
+            )
+            for user, value in zip(self.users, values)
+        ]
+
+    def get_ids(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [movie['id'] for movie in response.data]
+
+    def test_many_good_ratings_outrank_a_few_perfect_ones(self):
+        self.rate(self.movies[0], [5])
+        self.rate(self.movies[1], [4, 5, 4, 5, 4, 5])
+        self.rate(self.movies[2], [2, 2])
+        response = self.client.get('/movies/top/')
+        self.assertEqual(
+            [movie['id'] for movie in response.data],
+            [self.movies[1].id, self.movies[0].id, self.movies[2].id]
+        )
+        self.assertAlmostEqual(response.data[0]['score'], 57 / 16)
+        self.assertEqual(response.data[0]['rating_count'], 6)
+        self.assertEqual(response.data[0]['avg_rating'], 4.5)
+        self.assertAlmostEqual(response.data[1]['score'], 35 / 11)
+
+    def test_leaderboards_by_genre_and_decade(self):
+        for movie in self.movies:
+            self.rate(movie, [4])
+        self.assertEqual(
+            set(self.get_ids('/movies/top/?movie_genre=crime')),
+            {self.movies[0].id, self.movies[1].id}
+        )
+        self.assertEqual(
+            set(self.get_ids('/movies/top/?decade=1990')),
+            {self.movies[0].id, self.movies[2].id}
+        )
+        self.assertEqual(
+            self.get_ids('/movies/top/?movie_genre=drama&decade=2000'),
+            [self.movies[3].id]
+        )
+
+    def test_invalid_decade(self):
+        response = self.client.get('/movies/top/?decade=decade')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('decade', response.data)
+
+    def test_leaderboards_follow_the_ratings(self):
+        ratings = self.rate(self.movies[0], [5, 5])
+        self.rate(self.movies[1], [4, 4])
+        self.assertEqual(
+            self.get_ids('/movies/top/'),
+            [self.movies[0].id, self.movies[1].id]
+        )
+        for rating in ratings:
+            rating.value = 1
+            rating.save()
+        self.assertEqual(
+            self.get_ids('/movies/top/'),
+            [self.movies[1].id, self.movies[0].id]
+        )
+        for rating in ratings:
+            rating.delete()
+        self.assertEqual(self.get_ids('/movies/top/'), [self.movies[1].id])
+        self.movies[1].movie_genre = 'drama'
+        self.movies[1].save()
+        self.assertEqual(
+            self.get_ids('/movies/top/?movie_genre=drama'),
+            [self.movies[1].id]
+        )
+
+    def test_update_leaderboards_uses_the_mean_rating(self):
+        self.rate(self.movies[0], [5, 5, 2])
+        self.rate(self.movies[1], [4])
+        LeaderboardEntry.objects.all().delete()
+        call_command('update_leaderboards', stdout=StringIO())
+        self.assertEqual(LeaderboardPrior.objects.get().mean, 4)
+        self.assertAlmostEqual(
+            LeaderboardEntry.objects.get(movie=self.movies[0]).score,
+            52 / 13
+        )
+        self.assertAlmostEqual(
+            LeaderboardEntry.objects.get(movie=self.movies[1]).score, 4
+        )
+
+    def test_top_rated_movies_are_a_single_query(self):
+        self.rate(self.movies[0], [5])
+        with CaptureQueriesContext(connection) as context:
+            self.client.get('/movies/top/?movie_genre=crime&decade=1990')
+        self.assertEqual(len(context.captured_queries), 1)
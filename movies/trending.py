@@ -0,0 +1,40 @@
+"""
+Trending movies from their exponentially decayed activity, with forward
+decay (Cormode, Shkapenyuk, Srivastava and Xu).
+An event at time t adds weight * 2 ** ((t - landmark) / HALF_LIFE) to the
+trending score of its movie. The decayed activity of every movie is its
+score times the same 2 ** -((now - landmark) / HALF_LIFE), so the scores
+rank the movies by decayed activity and are only ever incremented, at
+write time, without reading the history again.
+The update_trending_movies command moves the landmark forward (rescaling
+the scores) before they grow too large and stores the top movies overall
+and of each genre in TrendingMovie, which the endpoint reads.
+"""
+from django.conf import settings
+
+# Seconds for the weight of an event to halve
+HALF_LIFE = getattr(settings, 'TRENDING_HALF_LIFE', 3 * 24 * 3600)
+
+# Weight of each kind of event
+WEIGHTS = {
+    'seen': 3.0,
+    'watchlist': 1.0,
+    'rating': 2.0,
+    'list': 1.0,
+    'comment': 0.5,
+}
+
+# Half lives after which the landmark is moved forward, so the scores stay
+# below 2 ** REBASE_AFTER times the activity of a movie
+REBASE_AFTER = 32
+
+# Movies stored in the ranking of each genre
+TOP_COUNT = getattr(settings, 'TRENDING_TOP_COUNT', 100)
+
+
+def decay_factor(landmark, now):
+    """
+    Factor that turns the scores relative to the landmark into the decayed
+    activity at now.
+    """
+    return 2.0 ** (-(now - landmark) / HALF_LIFE)
@@ -3,5 +3,10 @@ from movies import views
 
 urlpatterns = [
     path('movies/', views.MovieList.as_view()),
-    path('movies/<int:pk>/', views.MovieDetailView.as_view())
+    path('movies/autocomplete/', views.MovieAutocomplete.as_view()),
+    path('movies/trending/', views.TrendingMovieList.as_view()),
+    path('movies/top/', views.TopRatedMovieList.as_view()),
+    path('movies/<int:pk>/', views.MovieDetailView.as_view()),
+    path('movies/<int:pk>/state/', views.MovieStateDetail.as_view()),
+    path('movies/<int:pk>/similar/', views.SimilarMovieList.as_view()),
 ]
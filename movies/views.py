@@ -1,39 +1,96 @@
-from django.db.models import Count, F, ExpressionWrapper, IntegerField
+from django.db.models import F, FilteredRelation, FloatField, Q
+from django.db.models.functions import Cast, Coalesce, NullIf
 from rest_framework import status, permissions, filters
 from django_filters.rest_framework import DjangoFilterBackend
 from django.http import Http404
 from rest_framework import generics
-from .models import Movie
-from .serializers import MovieSerializer
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .models import (
+    LeaderboardEntry, Movie, MovieState, SimilarMovie, TrendingMovie,
+    set_movie_state
+)
+from .serializers import (
+    LeaderboardEntrySerializer, MovieSerializer, MovieStateSerializer,
+    SimilarMovieSerializer, TrendingMovieSerializer
+)
+from .search import search_movies
+from .autocomplete import title_index
+from flixmix_rest_api.cache import CachedResponseMixin
+from flixmix_rest_api.conditional import (
+    ConditionalGetMixin, get_object_stamps
+)
 from flixmix_rest_api.permissions import IsAdminOrReadOnly
+from flixmix_rest_api.viewer_state import ViewerStateMixin
 
 
-class MovieList(generics.ListCreateAPIView):
+def get_number_param(request, name, number_type):
+    """
+    The query param converted to number_type, None when it is missing.
+    Raises a validation error (400) when it isn't a number.
+    """
+    value = request.query_params.get(name, None)
+    if value is None:
+        return None
+    try:
+        return number_type(value)
+    except ValueError:
+        raise ValidationError({name: ['A valid number is required.']})
+
+
+class MovieList(
+    CachedResponseMixin, ViewerStateMixin, generics.ListCreateAPIView
+):
     """
     List of Movies. Without log in status only has reading permissions.
+    The counts are read from the movie stats table so they can be sorted
+    without aggregating the related tables.
     Provides the ammount of times the movie was marked as seen.
     Provides the ammount of times the movie was added to a watchlist.
     Provides the ammount of times the movie was rated.
     Provides the ammount of times the movie appears on a list.
     Provides the ammount of reports the movie has.
-    Gets the release decade from the release year.
+    Provides the average rating of the movie (0 if it was never rated).
     Has a search field for the movie title.
     Provides filtering for the owner, owners a user follows, movies a profile
     marked as seen, movies a profile added to a watchlist.
     Provides custom search fields for movie title, director, main cast,
-    release decade and owner id.
+    release decade, owner id and minimum average rating.
+    Provides ranked full-text search over title, directors and main cast
+    with ?q=, which can be combined with the other filters.
+    The logged in user seen, watchlist, rating and report ids are fetched
+    for the whole page at once.
+    Anonymous responses are cached until a related model changes.
     """
     serializer_class = MovieSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    queryset = Movie.objects.annotate(
-        seen_count=Count('seen', distinct=True),
-        watchlist_count=Count('watchlist', distinct=True),
-        list_count=Count('lists', distinct=True),
-        rating_count=Count('rating', distinct=True),
-        report_count=Count('report', distinct=True),
-        release_decade=ExpressionWrapper(
-            F('release_year') - F('release_year') % 10,
-            output_field=IntegerField()
+    cache_versions = (
+        'movie', 'movie_state', 'rating', 'report', 'list', 'profile',
+        'follower',
+    )
+    # Every movie has stats, the inner join lets the count orderings be
+    # read from the indexes of the stats table
+    queryset = Movie.objects.select_related(
+        'stats', 'owner__profile'
+    ).filter(stats__isnull=False).annotate(
+        # The users states of the movie, for the filters and orderings
+        seen=FilteredRelation(
+            'states', condition=Q(states__state=MovieState.SEEN)
+        ),
+        watchlist=FilteredRelation(
+            'states', condition=Q(states__state=MovieState.WATCHLIST)
+        ),
+        seen_count=F('stats__seen_count'),
+        watchlist_count=F('stats__watchlist_count'),
+        list_count=F('stats__list_count'),
+        rating_count=F('stats__rating_count'),
+        report_count=F('stats__report_count'),
+        stats_movie_id=F('stats__movie_id'),
+        avg_rating=Coalesce(
+            Cast('stats__rating_sum', FloatField()) /
+            NullIf('stats__rating_count', 0),
+            0.0
         )
     ).order_by('-created_at')
 
@@ -44,11 +101,10 @@ class MovieList(generics.ListCreateAPIView):
     ]
     filterset_fields = [
         'owner__followed__owner__profile',
-        'seen__owner__profile',
-        'watchlist__owner__profile',
         'owner__profile',
     ]
     ordering_fields = [
+        'avg_rating',
         'seen_count',
         'watchlist_count',
         'list_count',
@@ -57,10 +113,38 @@ class MovieList(generics.ListCreateAPIView):
         'seen__created_at',
         'report_count',
     ]
+    # Orderings that can be used with cursor pagination, paginated on
+    # (count, movie) like the indexes of the stats table
+    cursor_ordering_fields = [
+        'seen_count',
+        'watchlist_count',
+        'list_count',
+        'rating_count',
+        'report_count',
+    ]
+    cursor_tiebreaker_fields = ['stats_movie_id']
 
     def get_queryset(self):
         queryset = super().get_queryset()
 
+        # Full-text search over title, directors and main cast, ordered by
+        # relevance unless an ordering is given
+        q = self.request.query_params.get('q', None)
+        if q is not None:
+            queryset = search_movies(queryset, q)
+
+        # Filter by movies a profile marked as seen
+        seen_by = self.request.query_params.get('seen__owner__profile', None)
+        if seen_by is not None:
+            queryset = queryset.filter(seen__owner__profile=seen_by)
+
+        # Filter by movies a profile added to a watchlist
+        watchlist_of = self.request.query_params.get(
+            'watchlist__owner__profile', None
+        )
+        if watchlist_of is not None:
+            queryset = queryset.filter(watchlist__owner__profile=watchlist_of)
+
         # Filter by title
         title = self.request.query_params.get('title', None)
         if title is not None:
@@ -77,22 +161,30 @@ class MovieList(generics.ListCreateAPIView):
             queryset = queryset.filter(main_cast__icontains=main_cast)
 
         # Filter by release decade
-        release_decade = self.request.query_params.get('release_decade', None)
+        release_decade = get_number_param(self.request, 'release_decade', int)
         if release_decade is not None:
             queryset = queryset.filter(release_decade=release_decade)
 
         # Filter by owner (creator) ID
-        owner_id = self.request.query_params.get('owner_id', None)
+        owner_id = get_number_param(self.request, 'owner_id', int)
         if owner_id is not None:
             queryset = queryset.filter(owner__id=owner_id)
 
+        # Filter by minimum average rating
+        min_rating = get_number_param(self.request, 'min_rating', float)
+        if min_rating is not None:
+            queryset = queryset.filter(avg_rating__gte=min_rating)
+
         return queryset
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
 
-class MovieDetailView(generics.RetrieveUpdateDestroyAPIView):
+class MovieDetailView(
+    ConditionalGetMixin, CachedResponseMixin, ViewerStateMixin,
+    generics.RetrieveUpdateDestroyAPIView
+):
     """
     Detail of the movie. If the user is not the admin they only have reading
     permissions.
@@ -102,19 +194,187 @@ class MovieDetailView(generics.RetrieveUpdateDestroyAPIView):
     Provides the ammount of times the movie was rated.
     Provides the ammount of times the movie appears on a list.
     Provides the ammount of reports the movie has.
-    Gets the release decade from the release year.
+    Provides the average rating of the movie (0 if it was never rated).
+    Anonymous responses are cached until a related model changes.
+    Supports conditional GETs, based on the movie updated_at and the
+    changes of its seen, watchlist, rating, report and list instances.
     """
     serializer_class = MovieSerializer
+    cache_versions = (
+        'movie', 'movie_state', 'rating', 'report', 'list', 'profile',
+    )
     # Only the admin can edit/delete a movie
     permission_classes = [IsAdminOrReadOnly]
-    queryset = Movie.objects.annotate(
-        seen_count=Count('seen', distinct=True),
-        watchlist_count=Count('watchlist', distinct=True),
-        list_count=Count('lists', distinct=True),
-        rating_count=Count('rating', distinct=True),
-        report_count=Count('report', distinct=True),
-        release_decade=ExpressionWrapper(
-            F('release_year') - F('release_year') % 10,
-            output_field=IntegerField()
+    queryset = Movie.objects.select_related(
+        'stats', 'owner__profile'
+    ).annotate(
+        seen_count=F('stats__seen_count'),
+        watchlist_count=F('stats__watchlist_count'),
+        list_count=F('stats__list_count'),
+        rating_count=F('stats__rating_count'),
+        report_count=F('stats__report_count'),
+        avg_rating=Coalesce(
+            Cast('stats__rating_sum', FloatField()) /
+            NullIf('stats__rating_count', 0),
+            0.0
         )
     ).order_by('-created_at')
+
+    def get_change_stamps(self):
+        pk = self.kwargs['pk']
+        return get_object_stamps(
+            Movie.objects.all(), pk, [f'movie:{pk}', 'profile']
+        )
+
+
+class MovieAutocomplete(APIView):
+    """
+    Title suggestions (id, title, release year and poster) for the search
+    box, ranked by popularity.
+    Served from the in-process title index, without authentication so the
+    request doesn't touch the database.
+    Accepts the typed text in q and the amount of suggestions in limit
+    (10 by default, up to 20).
+    """
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+    max_limit = 20
+
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            limit = 10
+        limit = max(1, min(limit, self.max_limit))
+        return Response(
+            title_index.search(request.query_params.get('q', ''), limit)
+        )
+
+
+class MovieStateDetail(APIView):
+    """
+    State of the movie for the logged in user: seen, watchlist or none.
+    PUT moves the movie to the given state in one transaction (a movie in
+    the watchlist that is marked as seen leaves the watchlist). Sending
+    the current state again changes nothing, so the request can be safely
+    retried.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = MovieStateSerializer
+
+    def get_movie(self, pk):
+        try:
+            return Movie.objects.get(pk=pk)
+        except Movie.DoesNotExist:
+            raise Http404
+
+    def get_response(self, movie, instance, changed):
+        serializer = self.serializer_class({
+            'movie': movie,
+            'state': instance.state if instance else MovieStateSerializer.NONE,
+            'id': instance.id if instance else None,
+            'changed': changed,
+        })
+        return Response(serializer.data)
+
+    def get(self, request, pk):
+        movie = self.get_movie(pk)
+        instance = MovieState.objects.filter(
+            owner=request.user, movie=movie
+        ).first()
+        return self.get_response(movie, instance, False)
+
+    def put(self, request, pk):
+        movie = self.get_movie(pk)
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        state = serializer.validated_data['state']
+        if state == MovieStateSerializer.NONE:
+            state = None
+        instance, changed = set_movie_state(request.user, movie, state)
+        return self.get_response(movie, instance, changed)
+
+
+class SimilarMovieList(generics.ListAPIView):
+    """
+    The movies most similar to the movie, best first, from the users that
+    rated, saw or listed both. Precomputed by the build_similar_movies
+    command so the request is a single indexed read.
+    Accepts the amount of movies in limit (10 by default, up to 20).
+    """
+    serializer_class = SimilarMovieSerializer
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = None
+    max_limit = 20
+
+    def get_queryset(self):
+        try:
+            limit = int(self.request.query_params.get('limit', 10))
+        except ValueError:
+            limit = 10
+        limit = max(1, min(limit, self.max_limit))
+        return SimilarMovie.objects.filter(
+            movie_id=self.kwargs['pk']
+        ).select_related('similar')[:limit]
+
+
+class TrendingMovieList(generics.ListAPIView):
+    """
+    The movies with the most recent activity (seen, added to a watchlist
+    or a list, rated or commented, weighing less the older it is), best
+    first. Ranked by the update_trending_movies command so the request is
+    a single indexed read.
+    Accepts a movie_genre to get the ranking of a genre and the amount of
+    movies in limit (20 by default, up to 100).
+    """
+    serializer_class = TrendingMovieSerializer
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = None
+    max_limit = 100
+
+    def get_queryset(self):
+        try:
+            limit = int(self.request.query_params.get('limit', 20))
+        except ValueError:
+            limit = 20
+        limit = max(1, min(limit, self.max_limit))
+        # Filter by genre
+        genre = self.request.query_params.get('movie_genre', '')
+        return TrendingMovie.objects.filter(
+            genre=genre
+        ).select_related('movie')[:limit]
+
+
+class TopRatedMovieList(generics.ListAPIView):
+    """
+    The top rated movies, ranked by Bayesian average rating so a few high
+    ratings don't outrank many good ones. Each leaderboard (all movies, a
+    genre, a decade or both) is read from its own index, updated when the
+    ratings change.
+    Accepts a movie_genre, a decade (e.g. 1990) and the amount of movies
+    in limit (20 by default, up to 100).
+    """
+    serializer_class = LeaderboardEntrySerializer
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = None
+    max_limit = 100
+
+    def get_queryset(self):
+        try:
+            limit = int(self.request.query_params.get('limit', 20))
+        except ValueError:
+            limit = 20
+        limit = max(1, min(limit, self.max_limit))
+        queryset = LeaderboardEntry.objects.select_related('movie__stats')
+
+        # Filter by genre
+        movie_genre = self.request.query_params.get('movie_genre', None)
+        if movie_genre:
+            queryset = queryset.filter(movie_genre=movie_genre)
+
+        # Filter by release decade
+        decade = get_number_param(self.request, 'decade', int)
+        if decade is not None:
+            queryset = queryset.filter(release_decade=decade)
+
+        return queryset.order_by('-score', 'movie_id')[:limit]
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from followers.models import Follower
+from lists.models import List
+from movies.models import Movie
+from profiles.models import Profile, ProfileStats
+from ratings.models import Rating
+from seen_movie.models import Seen
+from watchlist.models import Watchlist
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the profile stats table from scratch.
+    Every counter is computed with one grouped query per related table,
+    by the user field that owns the rows, and the table is replaced in a
+    single transaction.
+    """
+    help = 'Rebuilds the ProfileStats table from the related tables.'
+
+    def handle(self, *args, **options):
+        counted = {
+            'movie_count': (Movie.objects.all(), 'owner'),
+            'seen_count': (Seen.objects.all(), 'owner'),
+            'watchlist_count': (Watchlist.objects.all(), 'owner'),
+            'rating_count': (Rating.objects.all(), 'owner'),
+            'list_count': (List.objects.all(), 'owner'),
+            'following_count': (Follower.objects.all(), 'owner'),
+            'followers_count': (Follower.objects.all(), 'followed'),
+        }
+        with transaction.atomic():
+            stats = {
+                owner_id: ProfileStats(profile_id=profile_id)
+                for owner_id, profile_id in Profile.objects.values_list(
+                    'owner_id', 'id'
+                )
+            }
+            for field, (queryset, user_field) in counted.items():
+                counts = queryset.order_by().values(user_field).annotate(
+                    total=Count('id')
+                ).values_list(user_field, 'total')
+                for owner_id, total in counts:
+                    if owner_id in stats:
+                        setattr(stats[owner_id], field, total)
+            ProfileStats.objects.all().delete()
+            ProfileStats.objects.bulk_create(stats.values(), batch_size=1000)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt the stats of {len(stats)} profiles.'
+        ))
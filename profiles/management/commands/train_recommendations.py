@@ -0,0 +1,107 @@
+from itertools import islice
+import numpy as np
+from django.core.management.base import BaseCommand
+from movies.models import MovieState
+from profiles.models import RecommendationModel
+from profiles.recommendations import (
+    SEEN_WEIGHT, WATCHLIST_WEIGHT, build_matrix, dump_factors, train,
+)
+from ratings.models import Rating
+
+# Rows read from the database at once
+READ_CHUNK = 100000
+# Models kept in the table (the latest is served)
+KEEP_MODELS = 2
+
+
+def read_interactions():
+    """
+    Returns the (user ids, movie ids, weights) arrays of the ratings (their
+    value), seen movies and watchlists, read in chunks so only one chunk
+    of rows is held as Python objects at a time.
+    """
+    state_weights = {
+        MovieState.SEEN: SEEN_WEIGHT,
+        MovieState.WATCHLIST: WATCHLIST_WEIGHT,
+    }
+    sources = [
+        (
+            Rating.objects.values_list('owner_id', 'movie_id', 'value'),
+            float
+        ),
+        (
+            MovieState.objects.values_list('owner_id', 'movie_id', 'state'),
+            state_weights.get
+        ),
+    ]
+    chunks = []
+    for queryset, weight in sources:
+        rows = queryset.iterator(chunk_size=READ_CHUNK)
+        while True:
+            chunk = list(islice(rows, READ_CHUNK))
+            if not chunk:
+                break
+            users, movies, values = zip(*chunk)
+            chunks.append((
+                np.array(users, dtype=np.int64),
+                np.array(movies, dtype=np.int64),
+                np.array([weight(value) for value in values]),
+            ))
+    if not chunks:
+        return None
+    return tuple(np.concatenate(arrays) for arrays in zip(*chunks))
+
+
+class Command(BaseCommand):
+    """
+    Trains the recommendation model: an implicit feedback ALS
+    factorization of the user x movie matrix of ratings, seen movies and
+    watchlists, stored as a new RecommendationModel the servers pick up.
+    Memory is bounded by the interaction arrays, the factors and the
+    solver batches (--batch-nnz interactions at a time).
+    """
+    help = 'Trains the movie recommendations model.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--factors', type=int, default=32)
+        parser.add_argument('--iterations', type=int, default=10)
+        parser.add_argument('--regularization', type=float, default=0.1)
+        parser.add_argument(
+            '--alpha', type=float, default=10.0,
+            help='Confidence added per unit of weight of an interaction.'
+        )
+        parser.add_argument(
+            '--batch-nnz', type=int, default=4096,
+            help='Interactions solved at once.'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        interactions = read_interactions()
+        if interactions is None:
+            self.stdout.write('There are no interactions.')
+            return
+        matrix, user_ids, movie_ids = build_matrix(*interactions)
+        user_factors, movie_factors = train(
+            matrix, factors=options['factors'],
+            iterations=options['iterations'],
+            regularization=options['regularization'],
+            alpha=options['alpha'], batch_nnz=max(1, options['batch_nnz']),
+            seed=options['seed'],
+        )
+        model = RecommendationModel.objects.create(
+            factors=dump_factors(
+                matrix, user_ids, movie_ids, user_factors, movie_factors
+            ),
+            user_count=len(user_ids), movie_count=len(movie_ids),
+            interaction_count=matrix.nnz,
+        )
+        RecommendationModel.objects.exclude(id__in=list(
+            RecommendationModel.objects.values_list('id', flat=True)[
+                :KEEP_MODELS
+            ]
+        )).delete()
+        self.stdout.write(self.style.SUCCESS(
+            f'Trained model {model.id} with {len(user_ids)} users, '
+            f'{len(movie_ids)} movies and {matrix.nnz} interactions.'
+        ))
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.18 on 2026-10-18 07:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0003_remove_profile_favorite_genre'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='image_thumbnail_url',
+            field=models.CharField(blank=True, editable=False, max_length=500),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='image_url',
+            field=models.CharField(blank=True, editable=False, max_length=500),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 3.2.18 on 2026-10-18 07:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0004_profile_image_urls'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecommendationModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('factors', models.BinaryField()),
+                ('user_count', models.IntegerField()),
+                ('movie_count', models.IntegerField()),
+                ('interaction_count', models.IntegerField()),
+            ],
+            options={
+                'ordering': ['-created_at', '-id'],
+            },
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 3.2.18 on 2026-10-18 08:13
+
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def backfill_profile_stats(apps, schema_editor):
+    Profile = apps.get_model('profiles', 'Profile')
+    ProfileStats = apps.get_model('profiles', 'ProfileStats')
+    MovieState = apps.get_model('movies', 'MovieState')
+    Follower = apps.get_model('followers', 'Follower')
+    counted = {
+        'movie_count': (apps.get_model('movies', 'Movie'), 'owner'),
+        'rating_count': (apps.get_model('ratings', 'Rating'), 'owner'),
+        'list_count': (apps.get_model('lists', 'List'), 'owner'),
+        'following_count': (Follower, 'owner'),
+        'followers_count': (Follower, 'followed'),
+    }
+    stats = {
+        owner_id: ProfileStats(profile_id=profile_id)
+        for owner_id, profile_id in Profile.objects.values_list(
+            'owner_id', 'id'
+        )
+    }
+    for field, (model, user_field) in counted.items():
+        counts = model.objects.order_by().values(user_field).annotate(
+            total=Count('id')
+        ).values_list(user_field, 'total')
+        for owner_id, total in counts:
+            if owner_id in stats:
+                setattr(stats[owner_id], field, total)
+    states = MovieState.objects.order_by().values('owner', 'state').annotate(
+        total=Count('id')
+    ).values_list('owner', 'state', 'total')
+    for owner_id, state, total in states:
+        if owner_id in stats:
+            setattr(stats[owner_id], f'{state}_count', total)
+    ProfileStats.objects.bulk_create(stats.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0005_recommendationmodel'),
+        ('movies', '0012_moviestate_owner_state_index'),
+        ('ratings', '0003_rating_ratings_rat_created_68aebc_idx'),
+        ('lists', '0002_list_lists_list_created_3f9545_idx'),
+        ('followers', '0002_follower_followers_f_created_19ebd2_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileStats',
+            fields=[
+                ('profile', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='profiles.profile')),
+                ('movie_count', models.IntegerField(db_index=True, default=0)),
+                ('seen_count', models.IntegerField(db_index=True, default=0)),
+                ('watchlist_count', models.IntegerField(db_index=True, default=0)),
+                ('rating_count', models.IntegerField(db_index=True, default=0)),
+                ('list_count', models.IntegerField(db_index=True, default=0)),
+                ('followers_count', models.IntegerField(db_index=True, default=0)),
+                ('following_count', models.IntegerField(db_index=True, default=0)),
+            ],
+        ),
+        migrations.RunPython(
+            backfill_profile_stats, migrations.RunPython.noop
+        ),
+    ]
@@ -1,6 +1,11 @@
 from django.db import models
+from django.db.models import F
 from django.db.models.signals import post_save
 from django.contrib.auth.models import User
+from utils.images import schedule_thumbnail, update_image_urls
+
+# Size the profile image thumbnails fit in
+IMAGE_THUMBNAIL_SIZE = (160, 160)
 
 
 class Profile(models.Model):
@@ -8,6 +13,8 @@ class Profile(models.Model):
     Model representing the profile.
     Establish a default image.
     Sets the profile as admin if the user is a superuser
+    The image URL is stored when the image is uploaded, and the URL of its
+    thumbnail once it is generated.
     """
     owner = models.OneToOneField(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -17,6 +24,10 @@ class Profile(models.Model):
     image = models.ImageField(
         upload_to='images/', default='../default_profile_i0yy2i'
     )
+    image_url = models.CharField(max_length=500, blank=True, editable=False)
+    image_thumbnail_url = models.CharField(
+        max_length=500, blank=True, editable=False
+    )
     is_admin = models.BooleanField(default=False)
 
     class Meta:
@@ -25,6 +36,76 @@ class Profile(models.Model):
     def __str__(self):
         return f"{self.owner}'s profile"
 
+    @property
+    def image_thumbnail(self):
+        return self.image_thumbnail_url or self.image_url or self.image.url
+
+    def save(self, *args, **kwargs):
+        """
+        Stores the image URLs when an image is uploaded.
+        """
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'image' in update_fields:
+            changed, self._create_thumbnail = update_image_urls(
+                self, 'image', 'image_url', 'image_thumbnail_url'
+            )
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *changed}
+        super().save(*args, **kwargs)
+
+
+class ProfileStats(models.Model):
+    """
+    Denormalized counters of a profile, one row per profile.
+    Kept up to date by the movies, seen, watchlist, ratings, lists and
+    followers apps so the profile views can read and sort by them without
+    counting the related tables. Can be rebuilt with the
+    reconcile_profile_stats command.
+    """
+    profile = models.OneToOneField(
+        Profile, on_delete=models.CASCADE, related_name='stats',
+        primary_key=True
+    )
+    movie_count = models.IntegerField(default=0, db_index=True)
+    seen_count = models.IntegerField(default=0, db_index=True)
+    watchlist_count = models.IntegerField(default=0, db_index=True)
+    rating_count = models.IntegerField(default=0, db_index=True)
+    list_count = models.IntegerField(default=0, db_index=True)
+    followers_count = models.IntegerField(default=0, db_index=True)
+    following_count = models.IntegerField(default=0, db_index=True)
+
+    def __str__(self):
+        return f'{self.profile} stats'
+
+
+class RecommendationModel(models.Model):
+    """
+    User and movie factors trained by the train_recommendations command,
+    stored as a compressed NumPy archive (see profiles.recommendations).
+    The servers recommend from the latest one.
+    """
+    created_at = models.DateTimeField(auto_now_add=True)
+    factors = models.BinaryField()
+    user_count = models.IntegerField()
+    movie_count = models.IntegerField()
+    interaction_count = models.IntegerField()
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+
+    def __str__(self):
+        return f'Recommendation model of {self.created_at}'
+
+
+def update_profile_stats(user_ids, **deltas):
+    """
+    Adds the given deltas to the counters of the profiles of the users in a
+    single UPDATE, e.g. update_profile_stats([user.id], seen_count=1).
+    """
+    ProfileStats.objects.filter(profile__owner_id__in=user_ids).update(**{
+        field: F(field) + delta for field, delta in deltas.items()
+    })
+
 
 def create_profile(sender, instance, created, **kwargs):
     if created:
@@ -35,3 +116,21 @@ def create_profile(sender, instance, created, **kwargs):
 
 
 post_save.connect(create_profile, sender=User)
+
+
+def create_profile_stats(sender, instance, created, **kwargs):
+    if created:
+        ProfileStats.objects.create(profile=instance)
+
+
+post_save.connect(create_profile_stats, sender=Profile)
+
+
+def create_image_thumbnail(sender, instance, **kwargs):
+    if instance.__dict__.pop('_create_thumbnail', False):
+        schedule_thumbnail(
+            instance, 'image', 'image_thumbnail_url', IMAGE_THUMBNAIL_SIZE
+        )
+
+
+post_save.connect(create_image_thumbnail, sender=Profile)
@@ -0,0 +1,203 @@
+"""
+Personalized movie recommendations from an implicit feedback matrix
+factorization (alternating least squares, Hu, Koren and Volinsky).
+The train_recommendations command fits user and movie factors over the
+ratings, seen movies and watchlists and stores them as a
+RecommendationModel. The servers keep the latest one in memory and score
+every movie for a user with one matrix-vector product.
+"""
+import threading
+import time
+from io import BytesIO
+import numpy as np
+from django.conf import settings
+from scipy import sparse
+
+# Preference weight of a seen movie the user didn't rate (ratings weigh
+# their value, 1 to 5) and of a movie in the watchlist
+SEEN_WEIGHT = 3.0
+WATCHLIST_WEIGHT = 1.0
+
+# Seconds after which the servers check for a newer model
+MAX_AGE = getattr(settings, 'RECOMMENDATIONS_MAX_AGE', 600)
+
+
+def build_matrix(users, movies, weights):
+    """
+    Builds the user x movie CSR matrix of weights, keeping the largest
+    weight of each user and movie.
+    Returns the matrix and the sorted user and movie ids of its rows and
+    columns.
+    """
+    user_ids, user_index = np.unique(users, return_inverse=True)
+    movie_ids, movie_index = np.unique(movies, return_inverse=True)
+    keys = user_index.astype(np.int64) * len(movie_ids) + movie_index
+    order = np.lexsort((-weights, keys))
+    keys = keys[order]
+    first = np.ones(len(keys), dtype=bool)
+    first[1:] = keys[1:] != keys[:-1]
+    order = order[first]
+    matrix = sparse.csr_matrix(
+        (weights[order], (user_index[order], movie_index[order])),
+        shape=(len(user_ids), len(movie_ids)), dtype=np.float64
+    )
+    return matrix, user_ids, movie_ids
+
+
+def get_batches(indptr, batch_nnz):
+    """
+    Yields (start, end) ranges of rows with up to batch_nnz interactions
+    (at least one row).
+    """
+    rows = len(indptr) - 1
+    start = 0
+    while start < rows:
+        end = np.searchsorted(indptr, indptr[start] + batch_nnz, 'right') - 1
+        end = min(max(end, start + 1), rows)
+        yield start, end
+        start = end
+
+
+def solve_factors(matrix, fixed, regularization, alpha, batch_nnz):
+    """
+    One half step of ALS: the factors of the rows of the matrix with the
+    factors of its columns fixed.
+    For a row with confidences c = 1 + alpha * weight on its columns Y:
+    x = (YtY + Yt (C - I) Y + regularization I)^-1 Yt C p
+    Rows are solved in batches of up to batch_nnz interactions, so the
+    stacked outer products need batch_nnz x factors^2 floats at most.
+    """
+    factors = fixed.shape[1]
+    base = fixed.T @ fixed + regularization * np.eye(factors)
+    result = np.zeros((matrix.shape[0], factors))
+    for start, end in get_batches(matrix.indptr, batch_nnz):
+        low, high = matrix.indptr[start], matrix.indptr[end]
+        counts = np.diff(matrix.indptr[start:end + 1])
+        rows = counts > 0
+        if not rows.any():
+            continue
+        offsets = (matrix.indptr[start:end] - low)[rows]
+        columns = fixed[matrix.indices[low:high]]
+        confidence = alpha * matrix.data[low:high]
+        outer = (
+            confidence[:, None, None] * columns[:, :, None] *
+            columns[:, None, :]
+        )
+        a = np.repeat(base[None], rows.sum(), axis=0)
+        a += np.add.reduceat(outer, offsets, axis=0)
+        b = np.add.reduceat(
+            (1 + confidence)[:, None] * columns, offsets, axis=0
+        )
+        result[start:end][rows] = np.linalg.solve(a, b[:, :, None])[:, :, 0]
+    return result
+
+
+def train(matrix, factors=32, iterations=10, regularization=0.1, alpha=10.0,
+          batch_nnz=4096, seed=0):
+    """
+    Returns the (user factors, movie factors) of the user x movie weight
+    matrix.
+    """
+    generator = np.random.default_rng(seed)
+    user_factors = generator.normal(0, 0.01, (matrix.shape[0], factors))
+    movie_factors = generator.normal(0, 0.01, (matrix.shape[1], factors))
+    transposed = matrix.T.tocsr()
+    for _ in range(iterations):
+        user_factors = solve_factors(
+            matrix, movie_factors, regularization, alpha, batch_nnz
+        )
+        movie_factors = solve_factors(
+            transposed, user_factors, regularization, alpha, batch_nnz
+        )
+    return user_factors, movie_factors
+
+
+def dump_factors(matrix, user_ids, movie_ids, user_factors, movie_factors):
+    """
+    Serializes what the servers need to recommend: the factors, the ids of
+    their rows, the movies of each user (excluded from their
+    recommendations) and the movie popularity (for users without factors).
+    """
+    output = BytesIO()
+    np.savez_compressed(
+        output, user_ids=user_ids, movie_ids=movie_ids,
+        user_factors=user_factors.astype(np.float32),
+        movie_factors=movie_factors.astype(np.float32),
+        indptr=matrix.indptr, indices=matrix.indices,
+        popularity=np.diff(matrix.tocsc().indptr).astype(np.float32),
+    )
+    return output.getvalue()
+
+
+class Factors:
+    """
+    Factors of a trained model loaded in memory.
+    """
+    def __init__(self, data):
+        arrays = np.load(BytesIO(bytes(data)))
+        for name in arrays.files:
+            setattr(self, name, arrays[name])
+
+    def recommend(self, user_id, exclude_movie_ids, limit):
+        """
+        Returns the (movie id, score) of the best scored movies for the user
+        that aren't in exclude_movie_ids nor were among their interactions
+        when the model was trained, best first.
+        """
+        row = np.searchsorted(self.user_ids, user_id)
+        if row < len(self.user_ids) and self.user_ids[row] == user_id:
+            scores = self.movie_factors @ self.user_factors[row]
+            excluded = self.indices[self.indptr[row]:self.indptr[row + 1]]
+        else:
+            scores = self.popularity.copy()
+            excluded = np.array([], dtype=np.int64)
+        exclude = np.fromiter(exclude_movie_ids, dtype=np.int64)
+        exclude = exclude[np.isin(exclude, self.movie_ids)]
+        scores[excluded] = -np.inf
+        scores[np.searchsorted(self.movie_ids, exclude)] = -np.inf
+
+        limit = min(limit, int(np.isfinite(scores).sum()))
+        if limit <= 0:
+            return []
+        best = np.argpartition(-scores, limit - 1)[:limit]
+        best = best[np.argsort(-scores[best], kind='stable')]
+        return [
+            (int(self.movie_ids[column]), float(scores[column]))
+            for column in best
+        ]
+
+
+class FactorCache:
+    """
+    The factors of the latest RecommendationModel, loaded on first use and
+    checked for a newer model once older than MAX_AGE.
+    """
+    def __init__(self, max_age=MAX_AGE):
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.model_id = None
+        self.factors = None
+        self.checked_at = 0
+
+    def get(self):
+        from .models import RecommendationModel
+        with self.lock:
+            if (
+                self.factors is None or
+                time.monotonic() - self.checked_at > self.max_age
+            ):
+                latest = RecommendationModel.objects.values_list(
+                    'id', flat=True
+                ).first()
+                if latest is not None and latest != self.model_id:
+                    self.factors = Factors(
+                        RecommendationModel.objects.values_list(
+                            'factors', flat=True
+                        ).get(id=latest)
+                    )
+                    self.model_id = latest
+                self.checked_at = time.monotonic()
+            return self.factors
+
+
+factor_cache = FactorCache()
@@ -1,17 +1,31 @@
 from rest_framework import serializers
 from .models import Profile
+from movies.models import Movie
+from followers.graph import follow_graph
 from followers.models import Follower
+from flixmix_rest_api.viewer_state import ViewerStateSerializerMixin
+from utils.images import StoredImageField, get_image_error
 
 
-class ProfileSerializer(serializers.ModelSerializer):
+class ProfileSerializer(
+    ViewerStateSerializerMixin, serializers.ModelSerializer
+):
     """
     Serializer for the profile.
     Gets the is admin field by the model.
     Gets the movie count, seen count, watchlist count, list count,
     rating count follower count and following count provided by the views.
-    Gets the following id if it exist.
+    Gets the following id if it exist, resolved for the whole page by the
+    views.
+    Validates the image size and dimensions, reading its header only.
+    The image is the stored URL of the full size image on the detail and
+    of the thumbnail on the lists.
     """
     owner = serializers.ReadOnlyField(source='owner.username')
+    image = StoredImageField(
+        url_field='image_url', thumbnail_field='image_thumbnail_url',
+        required=False
+    )
     is_owner = serializers.SerializerMethodField()
     following_id = serializers.SerializerMethodField()
     movie_count = serializers.ReadOnlyField()
@@ -22,18 +36,23 @@ class ProfileSerializer(serializers.ModelSerializer):
     followers_count = serializers.ReadOnlyField()
     following_count = serializers.ReadOnlyField()
 
+    viewer_state_relations = {
+        'following': (Follower, 'followed'),
+    }
+    viewer_state_key = 'owner_id'
+
     def get_is_owner(self, obj):
         request = self.context['request']
         return request.user == obj.owner
 
     def get_following_id(self, obj):
-        user = self.context['request'].user
-        if user.is_authenticated:
-            following = Follower.objects.filter(
-                owner=user, followed=obj.owner
-            ).first()
-            return following.id if following else None
-        return None
+        return self.get_viewer_state_id('following', obj)
+
+    def validate_image(self, value):
+        error = get_image_error(value.size, *value.image_size)
+        if error:
+            raise serializers.ValidationError(error)
+        return value
 
     class Meta:
         model = Profile
@@ -44,3 +63,53 @@ class ProfileSerializer(serializers.ModelSerializer):
             'rating_count', 'watchlist_count', 'list_count',
             'followers_count', 'following_count'
         ]
+
+
+class ProfileDetailSerializer(ProfileSerializer):
+    """
+    Serializer for the profile detail.
+    Provides the ammount of users the logged in user follows that follow
+    the profile, from the in-memory follow graph (None when logged out or
+    on their own profile).
+    """
+    mutual_followers_count = serializers.SerializerMethodField()
+
+    def get_mutual_followers_count(self, obj):
+        user = self.context['request'].user
+        if not user.is_authenticated or user.id == obj.owner_id:
+            return None
+        return follow_graph.mutual_followers_count(user.id, obj.owner_id)
+
+    class Meta(ProfileSerializer.Meta):
+        fields = ProfileSerializer.Meta.fields + ['mutual_followers_count']
+
+
+class SuggestedProfileSerializer(serializers.ModelSerializer):
+    """
+    Serializer for a suggested profile to follow.
+    Provides the owner username, the profile image (thumbnail) and the
+    ammount of the followed users that follow them (overlap).
+    """
+    owner = serializers.ReadOnlyField(source='owner.username')
+    image = serializers.ReadOnlyField(source='image_thumbnail')
+    overlap = serializers.ReadOnlyField()
+
+    class Meta:
+        model = Profile
+        fields = ['id', 'owner', 'name', 'image', 'overlap']
+
+
+class RecommendedMovieSerializer(serializers.ModelSerializer):
+    """
+    Serializer for a recommended movie.
+    Provides the movie id, title, poster (thumbnail), release year, genre
+    and the recommendation score.
+    """
+    poster = serializers.ReadOnlyField(source='poster_thumbnail')
+    score = serializers.ReadOnlyField()
+
+    class Meta:
+        model = Movie
+        fields = [
+            'id', 'title', 'poster', 'release_year', 'movie_genre', 'score'
+        ]
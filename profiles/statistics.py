@@ -0,0 +1,98 @@
+"""
+Statistics of the movies a user saw, added to their watchlist and rated.
+Computed with three grouped queries, so the database aggregates the rows
+of the user (however many movies they saw) and only the groups are read,
+and cached per user until their next seen, watchlist or rating write
+bumps the 'user:<id>' version (see flixmix_rest_api.cache).
+"""
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+from flixmix_rest_api.cache import CACHE_TIMEOUT, get_cache, get_versions
+from movies.models import MovieState
+from ratings.models import Rating
+
+
+def compute_profile_statistics(user_id):
+    """
+    Returns the statistics of the user: the amount of movies seen, in the
+    watchlist and rated, the genres and decades of the seen movies, the
+    genres of the watchlist, the rating histogram and average rating given
+    and the movies seen per month.
+    """
+    counts = {MovieState.SEEN: 0, MovieState.WATCHLIST: 0}
+    genres = {MovieState.SEEN: {}, MovieState.WATCHLIST: {}}
+    decades = {}
+    states = MovieState.objects.filter(owner_id=user_id).order_by().values(
+        'state', 'movie__movie_genre', 'movie__release_decade'
+    ).annotate(total=Count('id')).values_list(
+        'state', 'movie__movie_genre', 'movie__release_decade', 'total'
+    )
+    for state, genre, decade, total in states:
+        counts[state] += total
+        genres[state][genre] = genres[state].get(genre, 0) + total
+        if state == MovieState.SEEN:
+            decades[decade] = decades.get(decade, 0) + total
+
+    histogram = dict.fromkeys(range(1, 6), 0)
+    ratings = Rating.objects.filter(owner_id=user_id).order_by().values(
+        'value'
+    ).annotate(total=Count('id')).values_list('value', 'total')
+    for value, total in ratings:
+        histogram[value] = total
+    rating_count = sum(histogram.values())
+    rating_sum = sum(value * total for value, total in histogram.items())
+
+    months = MovieState.objects.filter(
+        owner_id=user_id, state=MovieState.SEEN
+    ).annotate(month=TruncMonth('created_at')).order_by('month').values(
+        'month'
+    ).annotate(total=Count('id')).values_list('month', 'total')
+
+    return {
+        'seen_count': counts[MovieState.SEEN],
+        'watchlist_count': counts[MovieState.WATCHLIST],
+        'rating_count': rating_count,
+        'avg_rating': rating_sum / rating_count if rating_count else None,
+        'rating_histogram': histogram,
+        'seen_genres': get_distribution(genres[MovieState.SEEN], 'genre'),
+        'watchlist_genres': get_distribution(
+            genres[MovieState.WATCHLIST], 'genre'
+        ),
+        'seen_decades': [
+            {'decade': decade, 'count': total}
+            for decade, total in sorted(decades.items())
+        ],
+        'seen_per_month': [
+            {'month': month.strftime('%Y-%m'), 'count': total}
+            for month, total in months
+        ],
+    }
+
+
+def get_distribution(counts, name):
+    """
+    The {value: count} as a list of {name: value, 'count': count}, the
+    largest count first.
+    """
+    return [
+        {name: value, 'count': total}
+        for value, total in sorted(
+            counts.items(), key=lambda item: (-item[1], item[0])
+        )
+    ]
+
+
+def get_profile_statistics(user_id):
+    """
+    The statistics of the user, from the cache unless they changed their
+    movies since they were computed. Edits of the movies themselves (e.g.
+    their genre) are picked up once the entry expires.
+    """
+    name = f'user:{user_id}'
+    key = f'profile_statistics:{user_id}:{get_versions([name])[name]}'
+    cache = get_cache()
+    statistics = cache.get(key)
+    if statistics is None:
+        statistics = compute_profile_statistics(user_id)
+        cache.set(key, statistics, CACHE_TIMEOUT)
+    return statistics
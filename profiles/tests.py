@@ -1,3 +1,493 @@
-from django.test import TestCase
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+from datetime import datetime, timezone
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError, connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APITestCase
+from followers.graph import follow_graph
+from followers.models import Follower
+from movies.models import Movie, MovieState
+from ratings.models import Rating
+from seen_movie.models import Seen
+from watchlist.models import Watchlist
+from lists.models import List
+from .models import ProfileStats, RecommendationModel
+from .recommendations import factor_cache
 
-# Create your tests here.
+
+class ProfileListViewTests(APITestCase):
+    def setUp(self):
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.brian = User.objects.create_user(
+            username='brian', password='pass'
+        )
+        self.carl = User.objects.create_user(username='carl', password='pass')
+        self.following = Follower.objects.create(
+            owner=self.adam, followed=self.brian
+        )
+
+    def get_profiles_query_count(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/profiles/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries)
+
+    def test_can_list_profiles(self):
+        response = self.client.get('/profiles/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 3)
+
+    def test_following_id_is_provided(self):
+        self.client.force_authenticate(user=self.adam)
+        response = self.client.get('/profiles/')
+        results = {
+            profile['owner']: profile for profile in response.data['results']
+        }
+        self.assertEqual(results['brian']['following_id'], self.following.id)
+        self.assertIsNone(results['carl']['following_id'])
+
+    def test_following_id_on_profile_detail(self):
+        self.client.force_authenticate(user=self.adam)
+        response = self.client.get(f'/profiles/{self.brian.profile.id}/')
+        self.assertEqual(response.data['following_id'], self.following.id)
+
+    def test_following_query_count_does_not_grow_with_page(self):
+        self.client.force_authenticate(user=self.adam)
+        query_count = self.get_profiles_query_count()
+        for name in ['dave', 'eric', 'fred']:
+            user = User.objects.create_user(username=name, password='pass')
+            Follower.objects.create(owner=self.adam, followed=user)
+        self.assertEqual(self.get_profiles_query_count(), query_count)
+
+
+class ProfileImageTests(APITestCase):
+    def setUp(self):
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.client.force_authenticate(user=self.adam)
+        self.url = f'/profiles/{self.adam.profile.id}/'
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(
+            DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage',
+            MEDIA_ROOT=directory.name, IMAGE_DERIVATIVES_ASYNC=False
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def get_upload(self, size, mode='RGB'):
+        output = BytesIO()
+        Image.new(mode, size).save(output, 'PNG')
+        return SimpleUploadedFile('avatar.png', output.getvalue())
+
+    def test_image_thumbnail_is_used_in_lists(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(
+                self.url, {'image': self.get_upload((400, 400))}
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.adam.profile.refresh_from_db()
+        profile = self.adam.profile
+        self.assertTrue(profile.image_url.startswith('/media/images/avatar'))
+        self.assertTrue(profile.image_thumbnail_url.startswith(
+            '/media/thumbnails/avatar'
+        ))
+        response = self.client.get('/profiles/')
+        self.assertTrue(response.data['results'][0]['image'].endswith(
+            profile.image_thumbnail_url
+        ))
+        response = self.client.get(self.url)
+        self.assertTrue(response.data['image'].endswith(profile.image_url))
+
+    def test_cant_upload_too_large_image(self):
+        response = self.client.put(
+            self.url, {'image': self.get_upload((4100, 10), mode='1')}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data['image'][0], 'Image width larger than 4096px!'
+        )
+
+
+class ProfileRecommendationTests(APITestCase):
+    def setUp(self):
+        factor_cache.factors = None
+        factor_cache.model_id = None
+        self.users = [
+            User.objects.create_user(username=f'user{number}', password='pass')
+            for number in range(4)
+        ]
+        self.movies = [
+            Movie.objects.create(
+                owner=self.users[0], title=f'title {number}',
+                synopsis='synopsis', directors='Test Director',
+                main_cast='Cast members', release_year=2000,
+                movie_genre='crime'
+            )
+            for number in range(5)
+        ]
+        # Users 1 to 3 like movies 0 to 2, user 0 only rated movie 0 and
+        # has movie 1 in their watchlist
+        for user in self.users[1:]:
+            for movie in self.movies[:3]:
+                Rating.objects.create(
+                    owner=user, movie=movie, value=5, title='title',
+                    content='content'
+                )
+        Seen.objects.create(owner=self.users[1], movie=self.movies[3])
+        Rating.objects.create(
+            owner=self.users[0], movie=self.movies[0], value=5,
+            title='title', content='content'
+        )
+        Watchlist.objects.create(owner=self.users[0], movie=self.movies[1])
+        self.url = f'/profiles/{self.users[0].profile.id}/recommendations/'
+
+    def train(self):
+        call_command(
+            'train_recommendations', '--factors', '4', '--iterations', '5',
+            '--batch-nnz', '3', stdout=StringIO()
+        )
+
+    def test_recommendations_exclude_seen_and_watchlist_movies(self):
+        self.train()
+        self.client.force_authenticate(user=self.users[0])
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ids = [movie['id'] for movie in response.data]
+        self.assertEqual(ids[0], self.movies[2].id)
+        self.assertNotIn(self.movies[0].id, ids)
+        self.assertNotIn(self.movies[1].id, ids)
+        self.assertFalse(any(
+            'ratings_rating' in query['sql']
+            for query in context.captured_queries
+        ))
+
+    def test_users_without_factors_get_popular_movies(self):
+        self.train()
+        user = User.objects.create_user(username='new', password='pass')
+        self.client.force_authenticate(user=user)
+        response = self.client.get(
+            f'/profiles/{user.profile.id}/recommendations/?limit=2'
+        )
+        self.assertEqual(
+            [movie['id'] for movie in response.data],
+            [self.movies[0].id, self.movies[1].id]
+        )
+
+    def test_cant_see_recommendations_of_other_profile(self):
+        self.train()
+        self.client.force_authenticate(user=self.users[1])
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_only_the_latest_models_are_kept(self):
+        for _ in range(3):
+            self.train()
+        self.assertEqual(RecommendationModel.objects.count(), 2)
+
+
+class ProfileSuggestionTests(APITestCase):
+    def setUp(self):
+        follow_graph.following = None
+        self.users = [
+            User.objects.create_user(username=f'user{number}', password='pass')
+            for number in range(6)
+        ]
+        # User 0 follows users 1 and 2, who both follow user 3, user 1
+        # also follows user 4 and user 0
+        for owner, followed in [
+            (0, 1), (0, 2), (1, 3), (2, 3), (1, 4), (1, 0), (2, 1)
+        ]:
+            Follower.objects.create(
+                owner=self.users[owner], followed=self.users[followed]
+            )
+        self.url = f'/profiles/{self.users[0].profile.id}/suggestions/'
+
+    def tearDown(self):
+        follow_graph.following = None
+
+    def test_suggestions_ranked_by_overlap_exclude_followed_users(self):
+        self.client.force_authenticate(user=self.users[0])
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [
+                (profile['owner'], profile['overlap'])
+                for profile in response.data
+            ],
+            [('user3', 2), ('user4', 1)]
+        )
+
+    def test_suggestions_are_only_for_the_owner(self):
+        self.client.force_authenticate(user=self.users[1])
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_follows_update_the_graph(self):
+        self.client.force_authenticate(user=self.users[0])
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Follower.objects.create(
+                owner=self.users[0], followed=self.users[3]
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            Follower.objects.filter(
+                owner=self.users[1], followed=self.users[4]
+            ).delete()
+        response = self.client.get(self.url)
+        self.assertEqual(response.data, [])
+
+    def test_rebuild_replays_the_follows_made_while_loading(self):
+        follow_graph.build()
+        load = follow_graph.load
+
+        def load_while_following():
+            graph = load()
+            follow_graph.add(self.users[0].id, self.users[3].id)
+            follow_graph.remove(self.users[1].id, self.users[4].id)
+            return graph
+
+        with mock.patch.object(follow_graph, 'load', load_while_following):
+            follow_graph.build()
+        self.assertEqual(follow_graph.suggest(self.users[0].id), [])
+        self.assertIsNone(follow_graph.changes)
+
+    def test_failed_rebuild_can_be_retried(self):
+        follow_graph.rebuilding = True
+        load = mock.patch.object(
+            follow_graph, 'load', side_effect=DatabaseError
+        )
+        with load, self.assertRaises(DatabaseError):
+            follow_graph.build()
+        self.assertFalse(follow_graph.rebuilding)
+        self.assertIsNone(follow_graph.changes)
+
+    def test_graph_is_not_read_from_the_followers_table_once_built(self):
+        self.client.force_authenticate(user=self.users[0])
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(self.url)
+        self.assertFalse(any(
+            'followers_follower' in query['sql']
+            for query in context.captured_queries
+        ))
+
+    def test_profile_detail_has_mutual_followers_count(self):
+        self.client.force_authenticate(user=self.users[0])
+        response = self.client.get(f'/profiles/{self.users[3].profile.id}/')
+        self.assertEqual(response.data['mutual_followers_count'], 2)
+        response = self.client.get(f'/profiles/{self.users[0].profile.id}/')
+        self.assertIsNone(response.data['mutual_followers_count'])
+        self.client.logout()
+        response = self.client.get(f'/profiles/{self.users[3].profile.id}/')
+        self.assertIsNone(response.data['mutual_followers_count'])
+
+
+class ProfileStatisticsTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.movies = [
+            Movie.objects.create(
+                owner=self.adam, title=f'title {number}',
+                synopsis='synopsis', directors='Test Director',
+                main_cast='Cast members', release_year=year,
+                movie_genre=genre
+            )
+            for number, (genre, year) in enumerate([
+                ('crime', 1994), ('crime', 2004), ('drama', 1999),
+                ('comedy', 2010),
+            ])
+        ]
+        for movie, month in zip(self.movies[:3], [1, 1, 3]):
+            Seen.objects.create(
+                owner=self.adam, movie=movie,
+                created_at=datetime(2026, month, 10, tzinfo=timezone.utc)
+            )
+        Watchlist.objects.create(owner=self.adam, movie=self.movies[3])
+        for movie, value in zip(self.movies, [5, 4, 4]):
+            Rating.objects.create(
+                owner=self.adam, movie=movie, value=value, title='title',
+                content='content'
+            )
+        self.url = f'/profiles/{self.adam.profile.id}/stats/'
+
+    def test_profile_statistics(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['seen_count'], 3)
+        self.assertEqual(response.data['watchlist_count'], 1)
+        self.assertEqual(response.data['rating_count'], 3)
+        self.assertAlmostEqual(response.data['avg_rating'], 13 / 3)
+        self.assertEqual(
+            response.data['rating_histogram'], {1: 0, 2: 0, 3: 0, 4: 2, 5: 1}
+        )
+        self.assertEqual(response.data['seen_genres'], [
+            {'genre': 'crime', 'count': 2}, {'genre': 'drama', 'count': 1},
+        ])
+        self.assertEqual(
+            response.data['watchlist_genres'],
+            [{'genre': 'comedy', 'count': 1}]
+        )
+        self.assertEqual(response.data['seen_decades'], [
+            {'decade': 1990, 'count': 2}, {'decade': 2000, 'count': 1},
+        ])
+        self.assertEqual(response.data['seen_per_month'], [
+            {'month': '2026-01', 'count': 2},
+            {'month': '2026-03', 'count': 1},
+        ])
+
+    def test_profile_statistics_are_cached_until_the_user_writes(self):
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url)
+        # Only the profile is read
+        self.assertEqual(len(context.captured_queries), 1)
+        self.assertEqual(response.data['seen_count'], 3)
+
+        # Other users writes keep the entry
+        brian = User.objects.create_user(username='brian', password='pass')
+        with self.captureOnCommitCallbacks(execute=True):
+            Seen.objects.create(owner=brian, movie=self.movies[3])
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(self.url)
+        self.assertEqual(len(context.captured_queries), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            MovieState.objects.filter(
+                owner=self.adam, movie=self.movies[3]
+            ).get().delete()
+            Seen.objects.create(owner=self.adam, movie=self.movies[3])
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['seen_count'], 4)
+        self.assertEqual(response.data['watchlist_count'], 0)
+
+    def test_bulk_ratings_refresh_the_profile_statistics(self):
+        self.client.get(self.url)
+        self.client.force_authenticate(user=self.adam)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/ratings/bulk/', {'ratings': [{
+                'movie': self.movies[3].id, 'value': 1, 'title': 'title',
+                'content': 'content',
+            }]}, format='json')
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['rating_count'], 4)
+        self.assertEqual(response.data['rating_histogram'][1], 1)
+
+    def test_profile_statistics_queries_do_not_grow_with_the_movies(self):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(self.url)
+        self.assertEqual(len(context.captured_queries), 4)
+
+    def test_missing_profile_statistics(self):
+        response = self.client.get('/profiles/999/stats/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ProfileStatsTests(APITestCase):
+    def setUp(self):
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.brian = User.objects.create_user(
+            username='brian', password='pass'
+        )
+        self.movies = [
+            Movie.objects.create(
+                owner=self.adam, title=f'title {number}',
+                synopsis='synopsis', directors='Test Director',
+                main_cast='Cast members', release_year=2000,
+                movie_genre='crime'
+            )
+            for number in range(3)
+        ]
+
+    def get_stats(self, user):
+        stats = ProfileStats.objects.get(profile__owner=user)
+        return {
+            field: getattr(stats, field) for field in [
+                'movie_count', 'seen_count', 'watchlist_count',
+                'rating_count', 'list_count', 'followers_count',
+                'following_count',
+            ]
+        }
+
+    def test_stats_follow_the_writes(self):
+        Seen.objects.create(owner=self.brian, movie=self.movies[0])
+        watchlist = Watchlist.objects.create(
+            owner=self.brian, movie=self.movies[1]
+        )
+        rating = Rating.objects.create(
+            owner=self.brian, movie=self.movies[0], value=4, title='title',
+            content='content'
+        )
+        List.objects.create(owner=self.brian, title='list')
+        follower = Follower.objects.create(
+            owner=self.brian, followed=self.adam
+        )
+        self.assertEqual(self.get_stats(self.brian), {
+            'movie_count': 0, 'seen_count': 1, 'watchlist_count': 1,
+            'rating_count': 1, 'list_count': 1, 'followers_count': 0,
+            'following_count': 1,
+        })
+        self.assertEqual(self.get_stats(self.adam)['movie_count'], 3)
+        self.assertEqual(self.get_stats(self.adam)['followers_count'], 1)
+
+        # Moving a movie from the watchlist to seen
+        watchlist.state = 'seen'
+        watchlist.save()
+        rating.delete()
+        follower.delete()
+        self.movies[2].delete()
+        stats = self.get_stats(self.brian)
+        self.assertEqual(stats['seen_count'], 2)
+        self.assertEqual(stats['watchlist_count'], 0)
+        self.assertEqual(stats['rating_count'], 0)
+        self.assertEqual(stats['following_count'], 0)
+        self.assertEqual(self.get_stats(self.adam)['movie_count'], 2)
+        self.assertEqual(self.get_stats(self.adam)['followers_count'], 0)
+
+    def test_bulk_writes_update_the_stats(self):
+        self.client.login(username='brian', password='pass')
+        Watchlist.objects.create(owner=self.brian, movie=self.movies[0])
+        self.client.post(
+            '/seen/bulk/', {'movies': [movie.id for movie in self.movies]},
+            format='json'
+        )
+        self.assertEqual(self.get_stats(self.brian)['seen_count'], 3)
+        self.assertEqual(self.get_stats(self.brian)['watchlist_count'], 0)
+        self.client.delete(
+            '/seen/bulk/', {'movies': [self.movies[0].id]}, format='json'
+        )
+        self.assertEqual(self.get_stats(self.brian)['seen_count'], 2)
+
+    def test_reconcile_command_rebuilds_stats(self):
+        Seen.objects.create(owner=self.brian, movie=self.movies[0])
+        Seen.objects.create(owner=self.brian, movie=self.movies[1])
+        Follower.objects.create(owner=self.brian, followed=self.adam)
+        ProfileStats.objects.update(
+            movie_count=10, seen_count=10, followers_count=10
+        )
+        call_command('reconcile_profile_stats', stdout=StringIO())
+        self.assertEqual(self.get_stats(self.brian)['seen_count'], 2)
+        self.assertEqual(self.get_stats(self.brian)['movie_count'], 0)
+        self.assertEqual(self.get_stats(self.adam)['movie_count'], 3)
+        self.assertEqual(self.get_stats(self.adam)['followers_count'], 1)
+
+    def test_profiles_are_ordered_by_the_stats(self):
+        Follower.objects.create(owner=self.brian, followed=self.adam)
+        response = self.client.get('/profiles/?ordering=-followers_count')
+        self.assertEqual(
+            [profile['owner'] for profile in response.data['results']],
+            ['adam', 'brian']
+        )
+        response = self.client.get('/profiles/?ordering=-movie_count')
+        self.assertEqual(response.data['results'][0]['movie_count'], 3)
+        response = self.client.get(f'/profiles/{self.brian.profile.id}/')
+        self.assertEqual(response.data['following_count'], 1)
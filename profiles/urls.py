@@ -3,5 +3,16 @@ from profiles import views
 
 urlpatterns = [
     path('profiles/', views.ProfileList.as_view()),
-    path('profiles/<int:pk>/', views.ProfileDetailView.as_view())
+    path('profiles/<int:pk>/', views.ProfileDetailView.as_view()),
+    path(
+        'profiles/<int:pk>/stats/', views.ProfileStatisticsView.as_view()
+    ),
+    path(
+        'profiles/<int:pk>/suggestions/',
+        views.ProfileSuggestionList.as_view()
+    ),
+    path(
+        'profiles/<int:pk>/recommendations/',
+        views.ProfileRecommendationList.as_view()
+    ),
 ]
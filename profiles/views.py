@@ -1,15 +1,29 @@
-from django.db.models import Count
-from rest_framework import generics, filters
+from django.db.models import F
+from django.shortcuts import get_object_or_404
+from movies.models import Movie, MovieState
+from rest_framework import generics, filters, permissions
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import Profile
-from .serializers import ProfileSerializer
+from .recommendations import factor_cache
+from .statistics import get_profile_statistics
+from .serializers import (
+    ProfileDetailSerializer, ProfileSerializer, RecommendedMovieSerializer,
+    SuggestedProfileSerializer,
+)
+from followers.graph import follow_graph
 from flixmix_rest_api.permissions import IsOwnerOrAdminOrReadOnly
+from flixmix_rest_api.viewer_state import ViewerStateMixin
 
 
-class ProfileList(generics.ListAPIView):
+class ProfileList(ViewerStateMixin, generics.ListAPIView):
     """
     Only list profiles (creation is done with signals)
     Comments are filtered by lists.
+    The counts are read from the profile stats table so they can be sorted
+    without counting the related tables.
     Provides the ammount of times the user movie marked a movie as seen.
     Provides the ammount of times the user movie marked a movie as a future
     watch.
@@ -19,15 +33,20 @@ class ProfileList(generics.ListAPIView):
     Provides the ammount of profiles the user is followed by.
     Provides filtering for the profiles a user follows and profiles that
     follow a user.
+    The logged in user following ids are fetched for the whole page at once.
     """
-    queryset = Profile.objects.annotate(
-        movie_count=Count('owner__movie', distinct=True),
-        seen_count=Count('owner__seen', distinct=True),
-        watchlist_count=Count('owner__watchlist', distinct=True),
-        rating_count=Count('owner__rating', distinct=True),
-        list_count=Count('owner__list', distinct=True),
-        followers_count=Count('owner__followed', distinct=True),
-        following_count=Count('owner__following', distinct=True),
+    # Every profile has stats, the inner join lets the count orderings be
+    # read from the indexes of the stats table
+    queryset = Profile.objects.select_related('owner', 'stats').filter(
+        stats__isnull=False
+    ).annotate(
+        movie_count=F('stats__movie_count'),
+        seen_count=F('stats__seen_count'),
+        watchlist_count=F('stats__watchlist_count'),
+        rating_count=F('stats__rating_count'),
+        list_count=F('stats__list_count'),
+        followers_count=F('stats__followers_count'),
+        following_count=F('stats__following_count'),
     ).order_by('-created_at')
     serializer_class = ProfileSerializer
     filter_backends = [
@@ -44,10 +63,11 @@ class ProfileList(generics.ListAPIView):
         'name',
     ]
     ordering_fields = [
-        'movie__count',
-        'seen__count',
-        'watchlist__count',
-        'list__count',
+        'movie_count',
+        'seen_count',
+        'watchlist_count',
+        'rating_count',
+        'list_count',
         'followers_count',
         'following_count',
         'owner__following__created_at',
@@ -55,7 +75,7 @@ class ProfileList(generics.ListAPIView):
     ]
 
 
-class ProfileDetailView(generics.RetrieveUpdateAPIView):
+class ProfileDetailView(ViewerStateMixin, generics.RetrieveUpdateAPIView):
     """
     Detail of the profile. If the user is not the admin or the profile they
     only have reading permissions.
@@ -67,16 +87,119 @@ class ProfileDetailView(generics.RetrieveUpdateAPIView):
     Provides the ammount of times the user movie created a list.
     Provides the ammount of profiles the user follows.
     Provides the ammount of profiles the user is followed by.
+    Provides the ammount of profiles the logged in user follows that follow
+    the user.
     """
     # Retrieve or update data if user is owner or admin
     permission_classes = [IsOwnerOrAdminOrReadOnly]
-    queryset = Profile.objects.annotate(
-        movie_count=Count('owner__movie', distinct=True),
-        seen_count=Count('owner__seen', distinct=True),
-        watchlist_count=Count('owner__watchlist', distinct=True),
-        rating_count=Count('owner__rating', distinct=True),
-        list_count=Count('owner__list', distinct=True),
-        followers_count=Count('owner__followed', distinct=True),
-        following_count=Count('owner__following', distinct=True),
+    queryset = Profile.objects.select_related('owner', 'stats').annotate(
+        movie_count=F('stats__movie_count'),
+        seen_count=F('stats__seen_count'),
+        watchlist_count=F('stats__watchlist_count'),
+        rating_count=F('stats__rating_count'),
+        list_count=F('stats__list_count'),
+        followers_count=F('stats__followers_count'),
+        following_count=F('stats__following_count'),
     ).order_by('-created_at')
-    serializer_class = ProfileSerializer
+    serializer_class = ProfileDetailSerializer
+
+
+class ProfileSuggestionList(APIView):
+    """
+    Profiles suggested for the owner to follow: the users followed by the
+    most of the users they follow, excluding the ones they already follow.
+    Only the owner can see them. Ranked from the in-memory follow graph,
+    so the followers table is not joined with itself.
+    Accepts the amount of profiles in limit (10 by default, up to 50).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    max_limit = 50
+
+    def get(self, request, pk):
+        profile = get_object_or_404(Profile.objects.only('owner_id'), pk=pk)
+        if profile.owner_id != request.user.id:
+            raise PermissionDenied()
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            limit = 10
+        limit = max(1, min(limit, self.max_limit))
+
+        suggested = follow_graph.suggest(request.user.id, limit)
+        profiles = {
+            profile.owner_id: profile
+            for profile in Profile.objects.select_related('owner').filter(
+                owner_id__in=[user_id for user_id, _ in suggested]
+            )
+        }
+        results = []
+        for user_id, overlap in suggested:
+            # Users deleted since the graph was built are skipped
+            if user_id in profiles:
+                profiles[user_id].overlap = overlap
+                results.append(profiles[user_id])
+        return Response(SuggestedProfileSerializer(
+            results, many=True, context={'request': request}
+        ).data)
+
+
+class ProfileStatisticsView(APIView):
+    """
+    Statistics of the movies of the profile owner.
+    Provides the ammount of movies they saw, added to their watchlist and
+    rated, the genres and decades of the movies they saw, the genres of
+    their watchlist, their rating histogram and average rating and the
+    movies they saw per month.
+    Cached until the owner changes their seen movies, watchlist or ratings.
+    """
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+
+    def get(self, request, pk):
+        profile = get_object_or_404(Profile.objects.only('owner_id'), pk=pk)
+        return Response(get_profile_statistics(profile.owner_id))
+
+
+class ProfileRecommendationList(APIView):
+    """
+    Movies recommended to the owner of the profile, best first, that they
+    haven't seen or added to their watchlist. Only the owner can see them.
+    Scored from the factors of the latest model trained by the
+    train_recommendations command, kept in memory, so the ratings are not
+    read. Users without factors get the most popular movies.
+    Accepts the amount of movies in limit (10 by default, up to 50).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    max_limit = 50
+
+    def get(self, request, pk):
+        profile = get_object_or_404(Profile.objects.only('owner_id'), pk=pk)
+        if profile.owner_id != request.user.id:
+            raise PermissionDenied()
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            limit = 10
+        limit = max(1, min(limit, self.max_limit))
+
+        factors = factor_cache.get()
+        if factors is None:
+            return Response([])
+        recommended = factors.recommend(
+            request.user.id,
+            MovieState.objects.filter(owner=request.user).values_list(
+                'movie_id', flat=True
+            ),
+            limit
+        )
+        movies = Movie.objects.in_bulk(
+            [movie_id for movie_id, _ in recommended]
+        )
+        results = []
+        for movie_id, score in recommended:
+            # Movies deleted since the model was trained are skipped
+            if movie_id in movies:
+                movies[movie_id].score = score
+                results.append(movies[movie_id])
+        return Response(RecommendedMovieSerializer(
+            results, many=True, context={'request': request}
+        ).data)
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.18 on 2026-10-18 07:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ratings', '0002_rating_title'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rating',
+            index=models.Index(fields=['-created_at', '-id'], name='ratings_rat_created_68aebc_idx'),
+        ),
+    ]
@@ -1,8 +1,12 @@
 from django.db import models
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
-from profiles.models import Profile
-from movies.models import Movie
+from profiles.models import Profile, update_profile_stats
+from movies.models import (
+    Movie, add_trending_activity, update_leaderboards, update_movie_stats,
+    rating_stats_deltas
+)
 
 
 class Rating(models.Model):
@@ -20,7 +24,55 @@ class Rating(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [models.Index(fields=['-created_at', '-id'])]
         unique_together = ['owner', 'movie']
 
     def __str__(self):
         return f'{self.owner} rated {self.movie}'
+
+
+def store_previous_rating(sender, instance, **kwargs):
+    """
+    Remembers the movie and value the rating had before the update so the
+    movie stats can be moved accordingly.
+    """
+    instance._previous_rating = None
+    if instance.pk is not None:
+        instance._previous_rating = sender.objects.filter(
+            pk=instance.pk
+        ).values_list('movie_id', 'value').first()
+
+
+def add_rating_to_stats(sender, instance, created, **kwargs):
+    previous = instance.__dict__.pop('_previous_rating', None)
+    current = (instance.movie_id, instance.value)
+    if created or previous is None:
+        update_movie_stats(
+            [instance.movie_id], **rating_stats_deltas(instance.value)
+        )
+        add_trending_activity([instance.movie_id], 'rating')
+        update_leaderboards([instance.movie_id])
+        update_profile_stats([instance.owner_id], rating_count=1)
+    elif previous != current:
+        previous_movie_id, previous_value = previous
+        deltas = rating_stats_deltas(previous_value, sign=-1)
+        if previous_movie_id != instance.movie_id:
+            update_movie_stats([previous_movie_id], **deltas)
+            deltas = {}
+        for field, delta in rating_stats_deltas(instance.value).items():
+            deltas[field] = deltas.get(field, 0) + delta
+        update_movie_stats([instance.movie_id], **deltas)
+        update_leaderboards({previous_movie_id, instance.movie_id})
+
+
+def remove_rating_from_stats(sender, instance, **kwargs):
+    update_movie_stats(
+        [instance.movie_id], **rating_stats_deltas(instance.value, sign=-1)
+    )
+    update_leaderboards([instance.movie_id], add_missing=False)
+    update_profile_stats([instance.owner_id], rating_count=-1)
+
+
+pre_save.connect(store_previous_rating, sender=Rating)
+post_save.connect(add_rating_to_stats, sender=Rating)
+post_delete.connect(remove_rating_from_stats, sender=Rating)
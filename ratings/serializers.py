@@ -15,10 +15,14 @@ class RatingSerializer(serializers.ModelSerializer):
     owner = serializers.ReadOnlyField(source='owner.username')
     is_owner = serializers.SerializerMethodField()
     profile_id = serializers.ReadOnlyField(source='owner.profile.id')
-    profile_image = serializers.ReadOnlyField(source='owner.profile.image.url')
+    profile_image = serializers.ReadOnlyField(
+        source='owner.profile.image_thumbnail'
+    )
     movie_title = serializers.ReadOnlyField(source='movie.title')
     movie_release_year = serializers.ReadOnlyField(source='movie.release_year')
-    movie_poster = serializers.ReadOnlyField(source='movie.poster.url')
+    movie_poster = serializers.ReadOnlyField(
+        source='movie.poster_thumbnail'
+    )
     comments_count = serializers.ReadOnlyField()
 
     def get_is_owner(self, obj):
@@ -48,3 +52,15 @@ class RatingDetailSerializer(RatingSerializer):
     Adds the movie id.
     """
     movie = serializers.ReadOnlyField(source='movie.id')
+
+
+class BulkRatingSerializer(serializers.Serializer):
+    """
+    Serializer for an item of a bulk rating request.
+    Validated without queries, the view looks up the movies of the whole
+    request at once.
+    """
+    movie = serializers.IntegerField()
+    value = serializers.IntegerField(min_value=1, max_value=5)
+    title = serializers.CharField(max_length=50)
+    content = serializers.CharField(max_length=250)
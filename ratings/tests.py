@@ -1,4 +1,11 @@
-from movies.models import Movie
+from unittest import mock
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from feed.models import FeedItem
+from flixmix_rest_api.bulk import create_missing_rows
+from followers.models import Follower
+from movies.models import LeaderboardEntry, Movie, MovieStats
+from profiles.models import ProfileStats
 from .models import Rating
 from django.contrib.auth.models import User
 from rest_framework import status
@@ -176,3 +183,190 @@ class RatingDetailViewTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
         rating_exists = Rating.objects.filter(pk=self.rating.pk).exists()
         self.assertTrue(rating_exists)
+
+
+class RatingStatsTests(APITestCase):
+    def setUp(self):
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.brian = User.objects.create_user(
+            username='brian', password='pass'
+        )
+        self.movie = Movie.objects.create(
+            owner=self.adam,
+            title='Test Movie',
+            release_year=2022,
+            directors='Test Director',
+            main_cast='Test Cast',
+            movie_genre='crime'
+        )
+        self.rating = Rating.objects.create(
+            owner=self.adam,
+            movie=self.movie,
+            value=5,
+            title='Great Movie',
+            content='This movie was amazing!'
+        )
+
+    def test_average_is_updated_when_rating_is_created(self):
+        Rating.objects.create(
+            owner=self.brian, movie=self.movie, value=2, title='Bad Movie',
+            content='Not great.'
+        )
+        stats = MovieStats.objects.get(movie=self.movie)
+        self.assertEqual(stats.rating_count, 2)
+        self.assertEqual(stats.avg_rating, 3.5)
+        self.assertEqual(
+            stats.rating_histogram, {1: 0, 2: 1, 3: 0, 4: 0, 5: 1}
+        )
+
+    def test_average_is_updated_when_rating_value_changes(self):
+        self.client.force_authenticate(user=self.adam)
+        self.client.put(f'/ratings/{self.rating.pk}/', {
+            'movie': self.movie.pk, 'value': 3, 'title': 'Updated Title',
+            'content': 'Updated content'
+        })
+        response = self.client.get(f'/movies/{self.movie.pk}/')
+        self.assertEqual(response.data['avg_rating'], '3.00')
+        self.assertEqual(response.data['rating_histogram'][3], 1)
+        self.assertEqual(response.data['rating_histogram'][5], 0)
+
+    def test_average_is_removed_when_rating_is_deleted(self):
+        self.rating.delete()
+        response = self.client.get(f'/movies/{self.movie.pk}/')
+        self.assertEqual(response.data['rating_count'], 0)
+        self.assertIsNone(response.data['avg_rating'])
+
+
+class RatingBulkTests(APITestCase):
+    def setUp(self):
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.brian = User.objects.create_user(
+            username='brian', password='pass'
+        )
+        Follower.objects.create(owner=self.brian, followed=self.adam)
+        self.movies = [
+            Movie.objects.create(
+                owner=self.brian, title=f'Movie {number}',
+                synopsis='synopsis', directors='Test Director',
+                main_cast='Test Cast', release_year=2000,
+                movie_genre='crime'
+            )
+            for number in range(3)
+        ]
+        Rating.objects.create(
+            owner=self.adam, movie=self.movies[0], value=1, title='title',
+            content='content'
+        )
+        self.client.login(username='adam', password='pass')
+
+    def rate(self, ratings):
+        return self.client.post(
+            '/ratings/bulk/', {'ratings': ratings}, format='json'
+        )
+
+    def item(self, movie_id, value):
+        return {
+            'movie': movie_id, 'value': value, 'title': 'title',
+            'content': 'content',
+        }
+
+    def test_bulk_rating_results(self):
+        response = self.rate([
+            self.item(self.movies[0].id, 5),
+            self.item(self.movies[1].id, 4),
+            self.item(self.movies[1].id, 2),
+            self.item(0, 3),
+            {'movie': self.movies[2].id, 'value': 6},
+        ])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual(
+            [result['status'] for result in results],
+            ['exists', 'created', 'duplicate', 'not_found', 'invalid']
+        )
+        rating = Rating.objects.get(owner=self.adam, movie=self.movies[1])
+        self.assertEqual(results[1]['id'], rating.id)
+        self.assertEqual(rating.value, 4)
+        self.assertIn('value', results[4]['errors'])
+
+    def test_bulk_rating_updates_stats_and_feeds(self):
+        self.rate([
+            self.item(self.movies[1].id, 4), self.item(self.movies[2].id, 5)
+        ])
+        stats = MovieStats.objects.get(movie=self.movies[2])
+        self.assertEqual(stats.rating_count, 1)
+        self.assertEqual(stats.rating_sum, 5)
+        self.assertEqual(stats.rating_5_count, 1)
+        self.assertGreater(stats.trending_score, 0)
+        self.assertTrue(
+            LeaderboardEntry.objects.filter(movie=self.movies[2]).exists()
+        )
+        self.assertEqual(
+            FeedItem.objects.filter(owner=self.brian, kind='rating').count(),
+            3
+        )
+
+    def test_bulk_rating_queries_do_not_grow_with_the_items(self):
+        with CaptureQueriesContext(connection) as context:
+            self.rate([self.item(self.movies[1].id, 4)])
+        Rating.objects.filter(owner=self.adam).exclude(
+            movie=self.movies[0]
+        ).delete()
+        with CaptureQueriesContext(connection) as more_context:
+            self.rate([
+                self.item(self.movies[1].id, 4),
+                self.item(self.movies[2].id, 3),
+            ])
+        # One more UPDATE of the stats for the second rating value
+        self.assertEqual(
+            len(more_context.captured_queries),
+            len(context.captured_queries) + 1
+        )
+
+    def test_bulk_rating_concurrent_duplicates_are_not_counted(self):
+        # A concurrent request rates a movie after it was read
+        Rating.objects.create(
+            owner=self.adam, movie=self.movies[2], value=1, title='title',
+            content='content'
+        )
+        reads = []
+
+        def create_after_stale_read(model, found, read_existing, make_row):
+            def read():
+                reads.append(read_existing())
+                if len(reads) == 1:
+                    return reads[0] - {self.movies[2].id}
+                return reads[-1]
+            return create_missing_rows(model, found, read, make_row)
+
+        with mock.patch(
+            'ratings.views.create_missing_rows',
+            side_effect=create_after_stale_read
+        ):
+            response = self.rate([
+                self.item(self.movies[1].id, 4),
+                self.item(self.movies[2].id, 5),
+            ])
+        self.assertEqual(len(reads), 2)
+        self.assertEqual(
+            [result['status'] for result in response.data['results']],
+            ['created', 'exists']
+        )
+        stats = MovieStats.objects.get(movie=self.movies[2])
+        self.assertEqual((stats.rating_count, stats.rating_sum), (1, 1))
+        self.assertEqual(
+            MovieStats.objects.get(movie=self.movies[1]).rating_count, 1
+        )
+        self.assertEqual(
+            ProfileStats.objects.get(profile__owner=self.adam).rating_count,
+            3
+        )
+
+    def test_bulk_rating_requires_a_list(self):
+        response = self.client.post(
+            '/ratings/bulk/', {'ratings': 'all'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.client.logout()
+        response = self.rate([])
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -3,5 +3,6 @@ from ratings import views
 
 urlpatterns = [
     path('ratings/', views.RatingList.as_view()),
+    path('ratings/bulk/', views.RatingBulk.as_view()),
     path('ratings/<int:pk>/', views.RatingDetailView.as_view())
 ]
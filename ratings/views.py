@@ -1,25 +1,47 @@
+from collections import defaultdict
+from django.db import transaction
 from django.db.models import Count
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import generics, permissions, filters
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from flixmix_rest_api.bulk import (
+    bump_movie_versions, create_missing_rows, get_bulk_items
+)
+from flixmix_rest_api.cache import CachedResponseMixin
 from flixmix_rest_api.permissions import IsOwnerOrAdminOrReadOnly
 from .models import Rating
-from .serializers import RatingSerializer, RatingDetailSerializer
+from .serializers import (
+    RatingSerializer, RatingDetailSerializer, BulkRatingSerializer
+)
+from feed.models import add_feed_items
+from profiles.models import update_profile_stats
+from movies.models import (
+    Movie, add_trending_activity, update_leaderboards, update_movie_stats,
+    rating_stats_deltas
+)
 from watchlist.models import Watchlist
 from seen_movie.models import Seen
 
 
-class RatingList(generics.ListCreateAPIView):
+class RatingList(CachedResponseMixin, generics.ListCreateAPIView):
     """
     List of ratings. Without log in status only has reading permissions.
     Provides the ammount of comments the rating has.
     Provides filtering for the movie and owner a user follows.
     Provides custom search fields for movie title, owner username, owner id.
+    Anonymous responses are cached until a related model changes.
     """
     serializer_class = RatingSerializer
+    cache_versions = (
+        'rating', 'comment', 'movie', 'profile', 'follower',
+    )
     permission_classes = [
         permissions.IsAuthenticatedOrReadOnly
     ]
-    queryset = Rating.objects.annotate(
+    queryset = Rating.objects.select_related(
+        'owner__profile', 'movie'
+    ).annotate(
         comments_count=Count('ratingcomment', distinct=True),
     ).order_by('-created_at')
     filter_backends = [
@@ -66,6 +88,90 @@ class RatingDetailView(generics.RetrieveUpdateDestroyAPIView):
     """
     permission_classes = [IsOwnerOrAdminOrReadOnly]
     serializer_class = RatingDetailSerializer
-    queryset = Rating.objects.annotate(
+    queryset = Rating.objects.select_related(
+        'owner__profile', 'movie'
+    ).annotate(
         comments_count=Count('ratingcomment', distinct=True),
     ).order_by('-created_at')
+
+
+class RatingBulk(APIView):
+    """
+    Rates a list of movies at once, taking
+    {"ratings": [{"movie", "value", "title", "content"}]}.
+    The ratings are inserted with a single bulk_create in one transaction,
+    and the movie stats (one UPDATE per rating value), trending scores,
+    leaderboards, profile stats and the feeds of the user followers are
+    updated by hand as bulk_create skips the signals.
+    Returns a result per item: created (with the rating id), exists,
+    not_found, duplicate (movie repeated in the request) or invalid (with
+    the errors).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        items = get_bulk_items(request.data, 'ratings')
+        user = request.user
+        results = []
+        valid = {}
+        for item in items:
+            serializer = BulkRatingSerializer(data=item)
+            if not serializer.is_valid():
+                results.append({
+                    'status': 'invalid', 'errors': serializer.errors
+                })
+                continue
+            rating = serializer.validated_data
+            results.append({'movie': rating['movie']})
+            if rating['movie'] in valid:
+                results[-1]['status'] = 'duplicate'
+            else:
+                valid[rating['movie']] = rating
+
+        with transaction.atomic():
+            found = set(Movie.objects.filter(
+                id__in=valid
+            ).values_list('id', flat=True))
+            new, existing = create_missing_rows(
+                Rating, found,
+                lambda: set(Rating.objects.filter(
+                    owner=user, movie__in=found
+                ).values_list('movie_id', flat=True)),
+                lambda movie_id: Rating(owner=user, movie_id=movie_id, **{
+                    field: valid[movie_id][field]
+                    for field in ('value', 'title', 'content')
+                })
+            )
+
+            by_value = defaultdict(list)
+            for movie_id in new:
+                by_value[valid[movie_id]['value']].append(movie_id)
+            for value, movie_ids in by_value.items():
+                update_movie_stats(movie_ids, **rating_stats_deltas(value))
+            add_trending_activity(new, 'rating')
+            update_leaderboards(new)
+            update_profile_stats([user.id], rating_count=len(new))
+
+            created = Rating.objects.filter(
+                owner=user, movie__in=new
+            ).values_list('movie_id', 'id', 'created_at')
+            rating_ids = {}
+            for movie_id, rating_id, created_at in created:
+                rating_ids[movie_id] = (rating_id, created_at)
+            add_feed_items('rating', user.id, rating_ids.values())
+        bump_movie_versions(
+            ['rating', f'user:{user.id}'] if new else [], new
+        )
+
+        for result in results:
+            if 'status' in result:
+                continue
+            movie_id = result['movie']
+            if movie_id not in found:
+                result['status'] = 'not_found'
+            elif movie_id in existing:
+                result['status'] = 'exists'
+            else:
+                result['status'] = 'created'
+                result['id'] = rating_ids[movie_id][0]
+        return Response({'results': results})
@@ -1,6 +1,7 @@
 from django.db import models
+from django.db.models.signals import post_save, post_delete
 from django.contrib.auth.models import User
-from movies.models import Movie
+from movies.models import Movie, update_movie_stats
 
 
 class Report(models.Model):
@@ -18,3 +19,16 @@ class Report(models.Model):
 
     def __str__(self):
         return f'{self.owner} reported {self.movie}'
+
+
+def increment_report_count(sender, instance, created, **kwargs):
+    if created:
+        update_movie_stats([instance.movie_id], report_count=1)
+
+
+def decrement_report_count(sender, instance, **kwargs):
+    update_movie_stats([instance.movie_id], report_count=-1)
+
+
+post_save.connect(increment_report_count, sender=Report)
+post_delete.connect(decrement_report_count, sender=Report)
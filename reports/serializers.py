@@ -13,10 +13,14 @@ class ReportSerializer(serializers.ModelSerializer):
     """
     owner = serializers.ReadOnlyField(source='owner.username')
     profile_id = serializers.ReadOnlyField(source='owner.profile.id')
-    profile_image = serializers.ReadOnlyField(source='owner.profile.image.url')
+    profile_image = serializers.ReadOnlyField(
+        source='owner.profile.image_thumbnail'
+    )
     movie_title = serializers.ReadOnlyField(source='movie.title')
     movie_release_year = serializers.ReadOnlyField(source='movie.release_year')
-    movie_poster = serializers.ReadOnlyField(source='movie.poster.url')
+    movie_poster = serializers.ReadOnlyField(
+        source='movie.poster_thumbnail'
+    )
 
     class Meta:
         model = Report
@@ -13,7 +13,7 @@ class ReportList(generics.ListCreateAPIView):
     """
     serializer_class = ReportSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    queryset = Report.objects.all()
+    queryset = Report.objects.select_related('owner__profile', 'movie')
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ['created_at']
 
@@ -43,4 +43,4 @@ class ReportDetailView(generics.RetrieveDestroyAPIView):
     """
     permission_classes = [IsAdminOrReadOnly]
     serializer_class = ReportSerializer
-    queryset = Report.objects.all()
+    queryset = Report.objects.select_related('owner__profile', 'movie')
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.18 on 2026-10-18 07:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seen_movie', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='seen',
+            index=models.Index(fields=['-created_at', '-id'], name='seen_movie__created_74211a_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.2.18 on 2026-10-18 07:43
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0007_moviestate'),
+        ('seen_movie', '0002_seen_seen_movie__created_74211a_idx'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='Seen',
+        ),
+        migrations.CreateModel(
+            name='Seen',
+            fields=[
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('movies.moviestate',),
+        ),
+    ]
@@ -1,21 +1,26 @@
-from django.db import models
-from django.contrib.auth.models import User
-from movies.models import Movie
+from django.db.models.signals import pre_save, post_save, post_delete
+from movies.models import (
+    MovieState, MovieStateManager, store_previous_state, add_state_to_stats,
+    remove_state_from_stats,
+)
 
 
-class Seen(models.Model):
+class Seen(MovieState):
     """
-    Seen model, related to 'owner', i.e. a User instance and Movie model.
+    Seen model, the movies a user has seen, i.e. the MovieState rows in the
+    seen state.
     """
-    owner = models.ForeignKey(User, on_delete=models.CASCADE)
-    movie = models.ForeignKey(
-        Movie, related_name='seen', on_delete=models.CASCADE
-    )
-    created_at = models.DateTimeField(auto_now_add=True)
+    proxy_state = MovieState.SEEN
+    objects = MovieStateManager(MovieState.SEEN)
 
     class Meta:
+        proxy = True
         ordering = ['-created_at']
-        unique_together = ['owner', 'movie']
 
     def __str__(self):
         return f'{self.owner} has seen {self.movie}'
+
+
+pre_save.connect(store_previous_state, sender=Seen)
+post_save.connect(add_state_to_stats, sender=Seen)
+post_delete.connect(remove_state_from_stats, sender=Seen)
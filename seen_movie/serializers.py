@@ -1,5 +1,5 @@
-from django.db import IntegrityError
 from rest_framework import serializers
+from movies.models import MovieState, set_movie_state
 from .models import Seen
 
 
@@ -7,6 +7,7 @@ class SeenSerializer(serializers.ModelSerializer):
     """
     Serializer for the seen movie.
     Provides the movie title.
+    Moves the movie from the watchlist if it is there.
     Raises an error if the user tries to mark a movie as seen that they
     already have marked as that.
     """
@@ -20,9 +21,12 @@ class SeenSerializer(serializers.ModelSerializer):
         ]
 
     def create(self, validated_data):
-        try:
-            return super().create(validated_data)
-        except IntegrityError:
+        instance, changed = set_movie_state(
+            validated_data['owner'], validated_data['movie'],
+            MovieState.SEEN
+        )
+        if not changed:
             raise serializers.ValidationError({
                 'detail': 'Yoy have already marked this movie as seen!'
             })
+        return instance
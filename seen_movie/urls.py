@@ -3,5 +3,6 @@ from seen_movie import views
 
 urlpatterns = [
     path('seen/', views.SeenList.as_view()),
+    path('seen/bulk/', views.SeenBulk.as_view()),
     path('seen/<int:pk>/', views.SeenDetailView.as_view())
 ]
@@ -1,8 +1,8 @@
 from rest_framework import generics, permissions
+from flixmix_rest_api.bulk import BulkMovieCollectionView
 from flixmix_rest_api.permissions import IsOwnerOrReadOnly
 from .models import Seen
 from .serializers import SeenSerializer
-from watchlist.models import Watchlist
 
 
 class SeenList(generics.ListCreateAPIView):
@@ -15,20 +15,11 @@ class SeenList(generics.ListCreateAPIView):
         permissions.IsAuthenticatedOrReadOnly
     ]
     serializer_class = SeenSerializer
-    queryset = Seen.objects.all()
+    queryset = Seen.objects.select_related('owner', 'movie')
 
     def perform_create(self, serializer):
-        user = self.request.user
-        movie = serializer.validated_data['movie']
-        try:
-            # Check if the movie is already in the watchlist for the user
-            watchlist = Watchlist.objects.get(owner=user, movie=movie)
-            # In that case, delete it from the watchlist and add it to the
-            # seen list instead
-            watchlist.delete()
-            serializer.save(owner=user)
-        except Watchlist.DoesNotExist:
-            serializer.save(owner=user)
+        # The serializer moves the movie from the watchlist if it is there
+        serializer.save(owner=self.request.user)
 
 
 class SeenDetailView(generics.RetrieveDestroyAPIView):
@@ -38,4 +29,14 @@ class SeenDetailView(generics.RetrieveDestroyAPIView):
     """
     permission_classes = [IsOwnerOrReadOnly]
     serializer_class = SeenSerializer
-    queryset = Seen.objects.all()
+    queryset = Seen.objects.select_related('owner', 'movie')
+
+
+class SeenBulk(BulkMovieCollectionView):
+    """
+    Marks (POST) or unmarks (DELETE) a list of movies as seen at once.
+    Marked movies are removed from the user's watchlist.
+    """
+    model = Seen
+    counter = 'seen_count'
+    exclusive_counter = 'watchlist_count'
@@ -14,3 +14,11 @@ GENRES_CHOICES = [
     ('historical', 'Historical'),
     ('musical', 'Musical')
 ]
+
+FEED_KIND_CHOICES = [
+    ('movie', 'Movie'),
+    ('rating', 'Rating'),
+    ('list', 'List'),
+    ('listcomment', 'List comment'),
+    ('ratingcomment', 'Rating comment'),
+]
@@ -0,0 +1,178 @@
+"""
+Uploaded images of the movies (poster) and profiles (image).
+Uploads are checked from the image header, without decoding the pixels.
+The URL of an image is stored with its model when it is uploaded, and a
+thumbnail for the list payloads is generated in a background thread once
+the upload is committed, so the serializers read both from the row instead
+of asking the storage for them.
+"""
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from PIL import Image
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+# Max size of an uploaded image in bytes
+MAX_IMAGE_SIZE = 2 * 1024 * 1024
+# Max width and height of an uploaded image in pixels
+MAX_IMAGE_SIDE = 4096
+THUMBNAIL_QUALITY = 85
+
+executor = ThreadPoolExecutor(
+    max_workers=2, thread_name_prefix='image-derivatives'
+)
+
+
+def read_image_size(file):
+    """
+    Returns the (width, height) of the image file reading its header only,
+    or None if it is not an image Pillow can identify.
+    """
+    position = file.tell()
+    try:
+        with Image.open(file) as image:
+            return image.size
+    except (OSError, Image.DecompressionBombError):
+        return None
+    finally:
+        file.seek(position)
+
+
+def get_image_error(size, width, height):
+    """
+    Returns why an image of the given size and dimensions is not valid, or
+    None if it is.
+    """
+    if size > MAX_IMAGE_SIZE:
+        return 'Image size larger than 2MB!'
+    if height > MAX_IMAGE_SIDE:
+        return 'Image height larger than 4096px!'
+    if width > MAX_IMAGE_SIDE:
+        return 'Image width larger than 4096px!'
+    return None
+
+
+class StoredImageField(serializers.FileField):
+    """
+    Image upload field checked from the image header, the (width, height)
+    of the upload is set as image_size on the validated file.
+    Represented by the URL stored in url_field, or the thumbnail URL stored
+    in thumbnail_field when the object is serialized in a list.
+    """
+    default_error_messages = {
+        'invalid_image': (
+            'Upload a valid image. The file you uploaded was either not an '
+            'image or a corrupted image.'
+        ),
+    }
+
+    def __init__(self, url_field, thumbnail_field, **kwargs):
+        self.url_field = url_field
+        self.thumbnail_field = thumbnail_field
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        file = super().to_internal_value(data)
+        file.image_size = read_image_size(file)
+        if file.image_size is None:
+            self.fail('invalid_image')
+        return file
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        url = getattr(value.instance, self.url_field)
+        if isinstance(
+            getattr(self.parent, 'parent', None), serializers.ListSerializer
+        ):
+            url = getattr(value.instance, self.thumbnail_field) or url
+        if not url:
+            return super().to_representation(value)
+        request = self.context.get('request')
+        if request is not None and url.startswith('/'):
+            return request.build_absolute_uri(url)
+        return url
+
+
+def update_image_urls(instance, field_name, url_field, thumbnail_field):
+    """
+    Called by the model save before the row is written. Uploads a new image
+    of the field and stores its URL, which is also used as the thumbnail
+    of the default image.
+    Returns the fields it changed and whether a thumbnail has to be
+    generated.
+    """
+    file = getattr(instance, field_name)
+    uploaded = bool(file) and not file._committed
+    if not uploaded and getattr(instance, url_field):
+        return [], False
+    if uploaded:
+        file.save(file.name, file.file, save=False)
+    url = file.url if file else ''
+    is_default = file.name == instance._meta.get_field(field_name).default
+    setattr(instance, url_field, url)
+    setattr(instance, thumbnail_field, url if is_default else '')
+    return [field_name, url_field, thumbnail_field], bool(file) and (
+        not is_default
+    )
+
+
+def save_thumbnail(storage, name, size):
+    """
+    Saves a JPEG thumbnail (fitting in size) of the image with the given
+    name to the storage and returns its name.
+    """
+    with storage.open(name) as file, Image.open(file) as image:
+        # Lets JPEG decoding skip the pixels the thumbnail doesn't need
+        image.draft('RGB', size)
+        image.thumbnail(size)
+        output = BytesIO()
+        image.convert('RGB').save(output, 'JPEG', quality=THUMBNAIL_QUALITY)
+    base = os.path.splitext(os.path.basename(name))[0]
+    return storage.save(
+        f'thumbnails/{base}.jpg', ContentFile(output.getvalue())
+    )
+
+
+def create_thumbnail(model, pk, field_name, name, thumbnail_field, size):
+    """
+    Saves the thumbnail of the image with the given name and stores its
+    URL, unless the image of the row changed meanwhile.
+    """
+    storage = model._meta.get_field(field_name).storage
+    url = storage.url(save_thumbnail(storage, name, size))
+    model.objects.filter(pk=pk, **{field_name: name}).update(
+        **{thumbnail_field: url}
+    )
+
+
+def run_create_thumbnail(*args):
+    try:
+        create_thumbnail(*args)
+    except Exception:
+        logger.exception('Thumbnail of %s could not be created', args[3])
+    finally:
+        connections.close_all()
+
+
+def schedule_thumbnail(instance, field_name, thumbnail_field, size):
+    """
+    Generates the thumbnail of the image once the transaction commits, in
+    the background unless IMAGE_DERIVATIVES_ASYNC is False.
+    """
+    args = (
+        type(instance), instance.pk, field_name,
+        getattr(instance, field_name).name, thumbnail_field, size
+    )
+    if getattr(settings, 'IMAGE_DERIVATIVES_ASYNC', True):
+        transaction.on_commit(
+            lambda: executor.submit(run_create_thumbnail, *args)
+        )
+    else:
+        transaction.on_commit(lambda: create_thumbnail(*args))
@@ -0,0 +1,30 @@
+"""
+Bulk writes that update the stats and cache versions of all their rows at
+once. Inside bulk_write(model), rows of the model are deleted through the
+ORM (so whatever cascades from them is deleted with its own signals) while
+the per row handlers of the model, that would update them again one row at
+a time, return early.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+bulk_models = ContextVar('bulk_models', default=frozenset())
+
+
+@contextmanager
+def bulk_write(model):
+    token = bulk_models.set(
+        bulk_models.get() | {model._meta.concrete_model}
+    )
+    try:
+        yield
+    finally:
+        bulk_models.reset(token)
+
+
+def in_bulk_write(sender):
+    """
+    True if the rows of sender (or of its concrete model, for proxies) are
+    being written by a bulk write.
+    """
+    return sender._meta.concrete_model in bulk_models.get()
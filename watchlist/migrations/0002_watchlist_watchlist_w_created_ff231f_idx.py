@@ -0,0 +1,17 @@
+# Generated by Django 3.2.18 on 2026-10-18 07:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('watchlist', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='watchlist',
+            index=models.Index(fields=['-created_at', '-id'], name='watchlist_w_created_ff231f_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.2.18 on 2026-10-18 07:43
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0007_moviestate'),
+        ('watchlist', '0002_watchlist_watchlist_w_created_ff231f_idx'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='Watchlist',
+        ),
+        migrations.CreateModel(
+            name='Watchlist',
+            fields=[
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('movies.moviestate',),
+        ),
+    ]
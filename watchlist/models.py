@@ -1,21 +1,26 @@
-from django.db import models
-from django.contrib.auth.models import User
-from movies.models import Movie
+from django.db.models.signals import pre_save, post_save, post_delete
+from movies.models import (
+    MovieState, MovieStateManager, store_previous_state, add_state_to_stats,
+    remove_state_from_stats,
+)
 
 
-class Watchlist(models.Model):
+class Watchlist(MovieState):
     """
-    Watchlist model, related to 'owner', i.e. a User instance and Movie model.
+    Watchlist model, the movies a user wants to watch, i.e. the MovieState
+    rows in the watchlist state.
     """
-    owner = models.ForeignKey(User, on_delete=models.CASCADE)
-    movie = models.ForeignKey(
-        Movie, related_name='watchlist', on_delete=models.CASCADE
-    )
-    created_at = models.DateTimeField(auto_now_add=True)
+    proxy_state = MovieState.WATCHLIST
+    objects = MovieStateManager(MovieState.WATCHLIST)
 
     class Meta:
+        proxy = True
         ordering = ['-created_at']
-        unique_together = ['owner', 'movie']
 
     def __str__(self):
         return f'{self.owner} wants to watch {self.movie}'
+
+
+pre_save.connect(store_previous_state, sender=Watchlist)
+post_save.connect(add_state_to_stats, sender=Watchlist)
+post_delete.connect(remove_state_from_stats, sender=Watchlist)
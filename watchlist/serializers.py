@@ -1,5 +1,5 @@
-from django.db import IntegrityError
 from rest_framework import serializers
+from movies.models import MovieState, set_movie_state
 from .models import Watchlist
 
 
@@ -7,6 +7,7 @@ class WatchlistSerializer(serializers.ModelSerializer):
     """
     Serializer for the watchlist.
     Provides the movie title.
+    Unmarks the movie as seen if it is marked.
     Raises an error if the user tries to mark a movie as a future watch that
     they already have marked as that.
     """
@@ -20,9 +21,12 @@ class WatchlistSerializer(serializers.ModelSerializer):
         ]
 
     def create(self, validated_data):
-        try:
-            return super().create(validated_data)
-        except IntegrityError:
+        instance, changed = set_movie_state(
+            validated_data['owner'], validated_data['movie'],
+            MovieState.WATCHLIST
+        )
+        if not changed:
             raise serializers.ValidationError({
                 'detail': 'You have already added this movie to your watchlist'
             })
+        return instance
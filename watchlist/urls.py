@@ -3,5 +3,6 @@ from watchlist import views
 
 urlpatterns = [
     path('watchlist/', views.WatchlistList.as_view()),
+    path('watchlist/bulk/', views.WatchlistBulk.as_view()),
     path('watchlist/<int:pk>/', views.WatchlistDetailView.as_view())
 ]
@@ -1,8 +1,8 @@
 from rest_framework import generics, permissions
+from flixmix_rest_api.bulk import BulkMovieCollectionView
 from flixmix_rest_api.permissions import IsOwnerOrReadOnly
 from .models import Watchlist
 from .serializers import WatchlistSerializer
-from seen_movie.models import Seen
 from ratings.models import Rating
 
 
@@ -17,22 +17,11 @@ class WatchlistList(generics.ListCreateAPIView):
         permissions.IsAuthenticatedOrReadOnly
     ]
     serializer_class = WatchlistSerializer
-    queryset = Watchlist.objects.all()
+    queryset = Watchlist.objects.select_related('owner', 'movie')
 
     def perform_create(self, serializer):
-        user = self.request.user
-        movie = serializer.validated_data['movie']
-
-        # Check if the movie is already in the seen list for the user
-        try:
-            seen = Seen.objects.get(owner=user, movie=movie)
-            # In that case, delete it from the seen list and add it to the
-            # watchlist instead
-            seen.delete()
-        except Seen.DoesNotExist:
-            pass
-
-        serializer.save(owner=user)
+        # The serializer moves the movie from the seen list if it is there
+        serializer.save(owner=self.request.user)
 
 
 class WatchlistDetailView(generics.RetrieveDestroyAPIView):
@@ -42,4 +31,14 @@ class WatchlistDetailView(generics.RetrieveDestroyAPIView):
     """
     permission_classes = [IsOwnerOrReadOnly]
     serializer_class = WatchlistSerializer
-    queryset = Watchlist.objects.all()
+    queryset = Watchlist.objects.select_related('owner', 'movie')
+
+
+class WatchlistBulk(BulkMovieCollectionView):
+    """
+    Adds (POST) or removes (DELETE) a list of movies to the watchlist at
+    once. Added movies are unmarked as seen.
+    """
+    model = Watchlist
+    counter = 'watchlist_count'
+    exclusive_counter = 'seen_count'